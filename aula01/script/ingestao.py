@@ -0,0 +1,411 @@
+"""
+Ingestão em streaming do State of Data
+Aula 01 - Pandas - Organização do Dataset
+
+Lê o CSV bruto do questionário direto de dentro do .zip, em pedaços (chunks),
+carregando apenas as colunas necessárias com tipos explícitos. Cada pedaço é
+renomeado (colunas_para_renomear), filtrado e convertido (dict_mapeamento) e
+gravado incrementalmente na saída, então o uso de memória depende do tamanho
+do chunk e não do tamanho do arquivo.
+
+Modo de anexação (--anexar): lotes novos de respostas (mesmo formato bruto)
+são acrescentados ao fim do CSV processado, sem reescrever o histórico.
+Cada resposta é identificada pelo `token` (ou, sem token, pelo hash da
+linha); as já gravadas e as repetidas dentro do lote são descartadas. O CSV
+processado não guarda o token, então as chaves ficam ao lado dele, em
+<saida>.ingestao/: segmentos .npy ordenados (um por lote, compactados de
+tempos em tempos) e o diário lotes.json com o intervalo de bytes de cada
+lote. O custo de um lote é proporcional ao lote, não ao histórico, e os
+caches dos apps (dados_cache.py) detectam o acréscimo e leem só o final.
+
+Um CSV gerado por esta ingestão já sai indexado; para um CSV que já existia,
+use --indexar-historico com os dumps que o geraram. Um lote interrompido no
+meio é desfeito na anexação seguinte (o CSV volta ao tamanho do diário).
+Só um processo deve anexar por vez.
+
+Uso:
+    python ingestao.py "data/raw/Final Dataset - State of Data 2024 - Kaggle - df_survey_2024.zip"
+    python ingestao.py dump_2024.zip dump_2025.zip -o data/processed/dataset_salarios_dados.parquet
+    python ingestao.py --indexar-historico dump_2024.zip
+    python ingestao.py --anexar respostas_junho.csv
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import zipfile
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from faixas_salariais import VALORES_FAIXAS, converter
+
+ARQUIVO_RAW_PADRAO = os.path.join('data', 'raw', 'Final Dataset - State of Data 2024 - Kaggle - df_survey_2024.zip')
+SAIDA_PADRAO = os.path.join('data', 'processed', 'dataset_salarios_dados.csv')
+TAMANHO_CHUNK_PADRAO = 50_000
+MAX_SEGMENTOS = 16          # segmentos de chaves antes de compactar em um só
+TAMANHO_CAUDA = 64 * 1024   # bytes do fim do CSV conferidos contra o diário
+
+# Mesmo mapeamento da aula, mais as colunas de satisfação/importância do dataset processado
+colunas_para_renomear = {
+    '0.a_token': 'token',
+    '0.d_data/hora_envio': 'timestamp_envio',
+    '1.a.1_faixa_idade': 'faixa_etaria',
+    '1.b_genero': 'genero',
+    '1.c_cor/raca/etnia': 'etnia',
+    '1.a_idade': 'idade',
+    '1.d_pcd': 'pcd',
+    '1.e_experiencia_profissional_prejudicada': 'xp_profissional_prejudicada',
+    '1.i.1_uf_onde_mora': 'uf_residencia',
+    '1.l_nivel_de_ensino': 'nivel_ensino',
+    '1.m_área_de_formação': 'area_formacao',
+    '2.a_situação_de_trabalho': 'situacao_trabalho',
+    '2.f_cargo_atual': 'cargo_atual',
+    '2.h_faixa_salarial': 'faixa_salarial',
+    '2.i_tempo_de_experiencia_em_dados': 'tempo_experiencia_dados',
+    '2.l.1_Remuneração/Salário': 'satisfacao_remuneracao',
+    '2.o.1_Remuneração/Salário': 'importancia_salario_escolha_emprego',
+    '2.l.2_Benefícios': 'satisfacao_beneficios',
+    '2.o.2_Benefícios': 'importancia_beneficios_escolha_emprego',
+}
+
+# Tipos explícitos (nomes já renomeados): evita a inferência de tipos em cada chunk
+tipos_colunas = {
+    'token': 'str',
+    'timestamp_envio': 'str',
+    'faixa_etaria': 'str',
+    'genero': 'str',
+    'etnia': 'str',
+    'idade': 'Int16',
+    'pcd': 'str',
+    'xp_profissional_prejudicada': 'str',
+    'uf_residencia': 'str',
+    'nivel_ensino': 'str',
+    'area_formacao': 'str',
+    'situacao_trabalho': 'str',
+    'cargo_atual': 'str',
+    'faixa_salarial': 'str',
+    'tempo_experiencia_dados': 'str',
+    'satisfacao_remuneracao': 'float32',
+    'importancia_salario_escolha_emprego': 'float32',
+    'satisfacao_beneficios': 'float32',
+    'importancia_beneficios_escolha_emprego': 'float32',
+}
+
+# Colunas (e ordem) do dataset processado usado nas aulas 02 a 05
+colunas_saida = [
+    'faixa_etaria', 'genero', 'etnia', 'idade', 'pcd', 'xp_profissional_prejudicada',
+    'uf_residencia', 'nivel_ensino', 'area_formacao', 'situacao_trabalho', 'cargo_atual',
+    'faixa_salarial', 'tempo_experiencia_dados', 'satisfacao_remuneracao',
+    'importancia_salario_escolha_emprego', 'satisfacao_beneficios',
+    'importancia_beneficios_escolha_emprego'
+]
+
+# Dicionário pra mapear as faixas para valores numéricos (tabela única de faixas_salariais.py)
+dict_mapeamento = VALORES_FAIXAS
+
+
+def abrir_csvs(caminho):
+    """Gera (nome, arquivo) para cada CSV de um .zip ou para um CSV solto"""
+    if zipfile.is_zipfile(caminho):
+        with zipfile.ZipFile(caminho) as z:
+            for nome in z.namelist():
+                if nome.lower().endswith('.csv'):
+                    with z.open(nome) as f:
+                        yield nome, f
+    else:
+        with open(caminho, 'rb') as f:
+            yield os.path.basename(caminho), f
+
+
+def ler_em_chunks(arquivo, tamanho_chunk=TAMANHO_CHUNK_PADRAO, mapeamento=colunas_para_renomear):
+    """Lê o CSV bruto em pedaços, apenas com as colunas do mapeamento"""
+    originais = {v: k for k, v in mapeamento.items()}
+    dtype = {originais[c]: t for c, t in tipos_colunas.items() if c in originais}
+    return pd.read_csv(
+        arquivo,
+        usecols=list(mapeamento),
+        dtype=dtype,
+        chunksize=tamanho_chunk,
+    )
+
+
+def transformar_chunk(chunk, mapeamento=colunas_para_renomear, salario_numerico=True):
+    """Renomeia, filtra respostas sem faixa salarial e converte o salário"""
+    chunk = chunk.rename(columns=mapeamento)
+    chunk = chunk[chunk['faixa_salarial'].notna()]
+    if salario_numerico:
+        chunk = chunk.assign(faixa_salarial_numerico=converter(chunk['faixa_salarial']).astype('float32'))
+    return chunk
+
+
+class EscritorIncremental:
+    """Grava os chunks em CSV (append) ou Parquet (um row group por chunk)"""
+
+    def __init__(self, caminho, colunas):
+        self.caminho = caminho
+        self.colunas = colunas
+        self.formato = 'parquet' if caminho.endswith('.parquet') else 'csv'
+        self.tmp = caminho + '.tmp'
+        self.linhas = 0
+        self._writer = None
+        self._primeiro = True
+
+    def escrever(self, df):
+        df = df[self.colunas]
+        if self.formato == 'csv':
+            df.to_csv(self.tmp, mode='w' if self._primeiro else 'a', header=self._primeiro, index=False)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            tabela = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.tmp, tabela.schema, compression='zstd')
+            self._writer.write_table(tabela.cast(self._writer.schema))
+        self._primeiro = False
+        self.linhas += len(df)
+
+    def fechar(self):
+        if self._writer is not None:
+            self._writer.close()
+        if self._primeiro:
+            # Nenhum chunk válido: ainda assim gera um arquivo com o cabeçalho
+            pd.DataFrame(columns=self.colunas).to_csv(self.tmp, index=False)
+        os.replace(self.tmp, self.caminho)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, tb):
+        if tipo is None:
+            self.fechar()
+        else:
+            if self._writer is not None:
+                self._writer.close()
+            if os.path.exists(self.tmp):
+                os.remove(self.tmp)
+
+
+def chaves_respostas(chunk, colunas=colunas_saida):
+    """Chave uint64 de cada resposta: hash do token ou, sem token, das colunas de saída"""
+    chaves = pd.util.hash_pandas_object(chunk[colunas], index=False).to_numpy(copy=True)
+    if 'token' in chunk:
+        tem_token = chunk['token'].notna().to_numpy()
+        chaves[tem_token] = pd.util.hash_array(chunk['token'].to_numpy(dtype=object)[tem_token])
+    return chaves
+
+
+def _sha_cauda(caminho, fim):
+    """sha256 dos últimos TAMANHO_CAUDA bytes antes de `fim`"""
+    inicio = max(0, fim - TAMANHO_CAUDA)
+    with open(caminho, 'rb') as f:
+        f.seek(inicio)
+        return hashlib.sha256(f.read(fim - inicio)).hexdigest()
+
+
+class IndiceRespostas:
+    """Chaves das respostas já gravadas no CSV processado e diário dos lotes anexados
+
+    Fica em <saida>.ingestao/: segmentos .npy com chaves ordenadas (lidos
+    com memmap) e lotes.json, que aponta os segmentos válidos, o tamanho do
+    CSV até onde ele está consistente e o sha do final desse trecho.
+    """
+
+    def __init__(self, saida):
+        self.saida = saida
+        self.pasta = os.path.splitext(saida)[0] + '.ingestao'
+        self.caminho_diario = os.path.join(self.pasta, 'lotes.json')
+        self.diario = None
+        self._segmentos = []
+        if os.path.exists(self.caminho_diario):
+            with open(self.caminho_diario) as f:
+                self.diario = json.load(f)
+            self._segmentos = [np.load(os.path.join(self.pasta, s), mmap_mode='r') for s in self.diario['segmentos']]
+
+    @property
+    def existe(self):
+        return self.diario is not None
+
+    def contem(self, chaves):
+        """Máscara das chaves que já estão em algum segmento"""
+        presentes = np.zeros(len(chaves), dtype=bool)
+        for segmento in self._segmentos:
+            if not len(segmento):
+                continue
+            pos = np.minimum(np.searchsorted(segmento, chaves), len(segmento) - 1)
+            presentes |= segmento[pos] == chaves
+        return presentes
+
+    def _gravar_segmento(self, chaves):
+        nome = f"chaves_{datetime.now():%Y%m%d-%H%M%S-%f}.npy"
+        caminho = os.path.join(self.pasta, nome)
+        with open(caminho + '.tmp', 'wb') as f:
+            np.save(f, np.unique(chaves).astype(np.uint64))
+        os.replace(caminho + '.tmp', caminho)
+        return nome
+
+    def _gravar_diario(self):
+        tmp = self.caminho_diario + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.diario, f, indent=2)
+        os.replace(tmp, self.caminho_diario)
+        self._segmentos = [np.load(os.path.join(self.pasta, s), mmap_mode='r') for s in self.diario['segmentos']]
+        self._remover_orfaos()
+
+    def _remover_orfaos(self):
+        validos = set(self.diario['segmentos']) | {'lotes.json'}
+        for nome in os.listdir(self.pasta):
+            if nome not in validos:
+                os.remove(os.path.join(self.pasta, nome))
+
+    def recriar(self, chaves):
+        """Índice novo com todas as chaves do CSV atual (descarta o anterior)"""
+        os.makedirs(self.pasta, exist_ok=True)
+        tamanho = os.path.getsize(self.saida)
+        self.diario = {
+            'segmentos': [self._gravar_segmento(chaves)],
+            'tamanho': tamanho,
+            'cauda': _sha_cauda(self.saida, tamanho),
+            'lotes': [],
+        }
+        self._gravar_diario()
+
+    def conferir(self):
+        """Garante que o CSV bate com o diário, desfazendo um lote interrompido"""
+        if not self.existe:
+            raise ValueError(f"{self.saida} não tem índice de respostas: rode --indexar-historico com os dumps que o geraram")
+        tamanho = self.diario['tamanho']
+        atual = os.path.getsize(self.saida)
+        if atual < tamanho or _sha_cauda(self.saida, tamanho) != self.diario['cauda']:
+            raise ValueError(f"{self.saida} mudou fora da ingestão: o índice não vale mais (rode --indexar-historico)")
+        if atual > tamanho:
+            print(f"⚠️ Desfazendo lote incompleto: {atual - tamanho} bytes no fim de {self.saida}")
+            with open(self.saida, 'r+b') as f:
+                f.truncate(tamanho)
+        self._remover_orfaos()
+
+    def registrar_lote(self, chaves, inicio, linhas, duplicadas):
+        """Acrescenta as chaves do lote já gravado no CSV e o registra no diário"""
+        fim = os.path.getsize(self.saida)
+        if len(chaves):
+            self.diario['segmentos'].append(self._gravar_segmento(chaves))
+        if len(self.diario['segmentos']) > MAX_SEGMENTOS:
+            todas = np.concatenate([np.asarray(s) for s in self._segmentos] + [chaves.astype(np.uint64)])
+            self.diario['segmentos'] = [self._gravar_segmento(todas)]
+        self.diario['lotes'].append({
+            'inicio': inicio, 'fim': fim, 'linhas': linhas, 'duplicadas': duplicadas,
+            'data': datetime.now().isoformat(timespec='seconds'),
+        })
+        self.diario['tamanho'] = fim
+        self.diario['cauda'] = _sha_cauda(self.saida, fim)
+        self._gravar_diario()
+
+
+def _chunks_transformados(entradas, tamanho_chunk, salario_numerico=True):
+    """Gera (nome, i, chunk transformado) de todos os CSVs das entradas"""
+    for entrada in entradas:
+        for nome, arquivo in abrir_csvs(entrada):
+            for i, chunk in enumerate(ler_em_chunks(arquivo, tamanho_chunk)):
+                yield nome, i, transformar_chunk(chunk, salario_numerico=salario_numerico)
+
+
+def ingerir(entradas, saida=SAIDA_PADRAO, tamanho_chunk=TAMANHO_CHUNK_PADRAO,
+            colunas=colunas_saida, salario_numerico=True, verbose=True):
+    """Processa um ou mais dumps do questionário e grava o dataset processado (CSV já sai indexado)"""
+    if isinstance(entradas, str):
+        entradas = [entradas]
+    colunas = list(colunas) + (['faixa_salarial_numerico'] if salario_numerico else [])
+    os.makedirs(os.path.dirname(saida) or '.', exist_ok=True)
+
+    chaves = []
+    with EscritorIncremental(saida, colunas) as escritor:
+        for nome, i, chunk in _chunks_transformados(entradas, tamanho_chunk, salario_numerico):
+            escritor.escrever(chunk)
+            chaves.append(chaves_respostas(chunk))
+            if verbose:
+                print(f"{nome} | chunk {i + 1}: {escritor.linhas} linhas gravadas")
+    if escritor.formato == 'csv':
+        IndiceRespostas(saida).recriar(np.concatenate(chaves) if chaves else np.empty(0, np.uint64))
+    return escritor.linhas
+
+
+def indexar_historico(entradas, saida=SAIDA_PADRAO, tamanho_chunk=TAMANHO_CHUNK_PADRAO, verbose=True):
+    """Cria o índice de respostas de um CSV processado que já existe, a partir dos dumps que o geraram"""
+    if isinstance(entradas, str):
+        entradas = [entradas]
+    chaves = [chaves_respostas(chunk) for _, _, chunk in _chunks_transformados(entradas, tamanho_chunk, False)]
+    chaves = np.concatenate(chaves) if chaves else np.empty(0, np.uint64)
+    IndiceRespostas(saida).recriar(chaves)
+    if verbose:
+        print(f"{len(np.unique(chaves))} respostas indexadas para {saida}")
+    return len(chaves)
+
+
+def anexar(entradas, saida=SAIDA_PADRAO, tamanho_chunk=TAMANHO_CHUNK_PADRAO, verbose=True):
+    """Acrescenta ao CSV processado as respostas novas dos lotes; devolve (gravadas, duplicadas)
+
+    Descarta respostas já gravadas (pelo índice) e repetidas dentro do
+    próprio lote. As linhas vão no fim do CSV, nas colunas do cabeçalho dele.
+    """
+    if isinstance(entradas, str):
+        entradas = [entradas]
+    if saida.endswith('.parquet'):
+        raise ValueError("a anexação só funciona com a saída em CSV")
+    indice = IndiceRespostas(saida)
+    indice.conferir()
+    colunas = list(pd.read_csv(saida, nrows=0).columns)
+    salario_numerico = 'faixa_salarial_numerico' in colunas
+
+    inicio = os.path.getsize(saida)
+    gravadas, duplicadas, novas = 0, 0, []
+    with open(saida, 'a', newline='', encoding='utf-8') as f:
+        for nome, i, chunk in _chunks_transformados(entradas, tamanho_chunk, salario_numerico):
+            faltando = [c for c in colunas if c not in chunk]
+            if faltando:
+                raise ValueError(f"{nome}: o lote não tem as colunas {faltando} do CSV processado")
+            chaves = chaves_respostas(chunk)
+            repetida = indice.contem(chaves) | pd.Series(chaves).duplicated().to_numpy()
+            if novas:
+                repetida |= np.isin(chaves, np.concatenate(novas))
+            chunk, chaves = chunk[~repetida], chaves[~repetida]
+            chunk[colunas].to_csv(f, header=False, index=False)
+            novas.append(chaves)
+            gravadas += len(chunk)
+            duplicadas += int(repetida.sum())
+            if verbose:
+                print(f"{nome} | chunk {i + 1}: {gravadas} novas, {duplicadas} duplicadas")
+        f.flush()
+        os.fsync(f.fileno())
+    indice.registrar_lote(np.concatenate(novas) if novas else np.empty(0, np.uint64), inicio, gravadas, duplicadas)
+    return gravadas, duplicadas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera o dataset processado de salários a partir dos dumps brutos do State of Data")
+    parser.add_argument('entradas', nargs='*', default=[ARQUIVO_RAW_PADRAO], help="Arquivos .zip ou .csv brutos")
+    parser.add_argument('-o', '--saida', default=SAIDA_PADRAO, help="Arquivo de saída (.csv ou .parquet)")
+    parser.add_argument('--chunksize', type=int, default=TAMANHO_CHUNK_PADRAO, help="Linhas lidas por vez")
+    parser.add_argument('--sem-salario-numerico', action='store_true', help="Não gera a coluna faixa_salarial_numerico")
+    parser.add_argument('--quiet', action='store_true')
+    modo = parser.add_mutually_exclusive_group()
+    modo.add_argument('--anexar', action='store_true', help="Acrescenta só as respostas novas ao CSV de saída")
+    modo.add_argument('--indexar-historico', action='store_true',
+                      help="Indexa as respostas de um CSV de saída já existente (para usar --anexar depois)")
+    args = parser.parse_args()
+
+    if args.anexar:
+        gravadas, duplicadas = anexar(args.entradas, args.saida, args.chunksize, verbose=not args.quiet)
+        print(f"✅ {gravadas} respostas novas anexadas a {args.saida} ({duplicadas} duplicadas descartadas)")
+    elif args.indexar_historico:
+        indexar_historico(args.entradas, args.saida, args.chunksize, verbose=not args.quiet)
+    else:
+        linhas = ingerir(args.entradas, args.saida, args.chunksize,
+                         salario_numerico=not args.sem_salario_numerico, verbose=not args.quiet)
+        print(f"✅ {linhas} respostas gravadas em {args.saida}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Micro-benchmark dos filtros do dashboard de salários
+
+Compara o filtro original do remuneracao_app.py (três isin + cópia do
+DataFrame filtrado + cópia para o mapa) com o cubo de contagens que o
+dashboard usa hoje, num dataset "inflado" N vezes (padrão: 100×).
+
+Uso:
+    python benchmark_filtros.py
+    python benchmark_filtros.py --fator 20 --repeticoes 50
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from cubo_salarios import CuboContagens
+from dados_cache import carregar_dados
+
+def inflar(df, fator):
+    """Repete o dataset `fator` vezes, mantendo os tipos categóricos"""
+    return pd.concat([df] * fator, ignore_index=True)
+
+
+def filtros_exemplo(df):
+    """Filtros parecidos com um uso típico: alguns cargos, todos os gêneros, quase toda experiência"""
+    cargos = df['cargo_atual'].value_counts().index[:5].tolist()
+    generos = df['genero'].dropna().unique().tolist()
+    experiencia = df['tempo_experiencia_dados'].dropna().unique().tolist()[:-1]
+    return {'cargo_atual': cargos, 'genero': generos, 'tempo_experiencia_dados': experiencia}
+
+
+def caminho_original(df, filtros):
+    df_filt = df[
+        (df.cargo_atual.isin(filtros['cargo_atual'])) &
+        (df.genero.isin(filtros['genero'])) &
+        (df.tempo_experiencia_dados.isin(filtros['tempo_experiencia_dados']))
+    ]
+    df_mapa = df_filt.copy()
+    return len(df_mapa)
+
+
+def medir(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return np.median(tempos) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--fator', type=int, default=100, help="Quantas vezes repetir o dataset")
+    parser.add_argument('--repeticoes', type=int, default=20)
+    args = parser.parse_args()
+
+    df = inflar(carregar_dados(), args.fator)
+    filtros = filtros_exemplo(df)
+    print(f"Dataset: {len(df):,} linhas ({args.fator}×)")
+
+    inicio = time.perf_counter()
+    cubo = CuboContagens(df)
+    t_cubo = (time.perf_counter() - inicio) * 1000
+    print(f"Construção do cubo (uma vez): {t_cubo:.1f} ms")
+
+    assert caminho_original(df, filtros) == cubo.total(filtros)
+
+    resultados = {
+        'original (isin + cópias)': medir(lambda: caminho_original(df, filtros), args.repeticoes),
+        'cubo → contagem por faixa': medir(lambda: cubo.contar('faixa_salarial', filtros), args.repeticoes),
+    }
+    base = resultados['original (isin + cópias)']
+    print(f"{'Caminho':<30}{'mediana (ms)':>14}{'speedup':>10}")
+    for nome, ms in resultados.items():
+        print(f"{nome:<30}{ms:>14.2f}{base / ms:>9.1f}×")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""
+Cache LRU de figuras do dashboard
+
+Guarda as figuras Plotly (go.Figure) já montadas, indexadas pelo nome do
+gráfico e pela combinação normalizada dos filtros. A própria figura fica
+no cache, e não o JSON: o st.plotly_chart valida de novo qualquer dict
+que recebe (refaz um go.Figure), então guardar texto custava um
+json.loads mais essa validação a cada acerto. Quem pede uma figura recebe
+uma cópia (go.Figure(fig)): mudar a cópia não afeta as outras sessões. O
+tamanho de cada figura (para o limite de bytes) é estimado percorrendo
+os valores dela uma vez, sem serializar. limpar() avança a geração do
+cache, e figuras montadas antes dela não são guardadas. Uma única instância é
+compartilhada por todas as sessões do processo (via st.cache_resource),
+então combinações populares (como os filtros padrão) são servidas sem
+recalcular nada. O cache tem limite de itens, de bytes e tempo de vida
+(TTL), e conta acertos, falhas e remoções.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+
+def normalizar_filtros(filtros):
+    """Chave hashable e independente da ordem de seleção dos filtros"""
+    return tuple(
+        (coluna, None if valores is None else tuple(sorted('<NA>' if pd.isna(v) else str(v) for v in valores)))
+        for coluna, valores in sorted(filtros.items())
+    )
+
+
+def tamanho_aproximado(valor):
+    """Bytes aproximados de um valor aninhado (dicts, listas, arrays, textos), sem serializar"""
+    total, pendentes = 0, [valor]
+    while pendentes:
+        v = pendentes.pop()
+        if isinstance(v, dict):
+            total += sum(len(str(k)) for k in v)
+            pendentes.extend(v.values())
+        elif isinstance(v, (list, tuple)):
+            pendentes.extend(v)
+        elif isinstance(v, np.ndarray) and v.dtype != object:
+            total += v.nbytes
+        elif isinstance(v, np.ndarray):
+            pendentes.extend(v.tolist())
+        elif isinstance(v, str):
+            total += len(v)
+        else:
+            total += 8
+    return total
+
+
+def tamanho_figura(fig):
+    """Tamanho aproximado da figura, direto das propriedades guardadas (sem to_dict/to_json)"""
+    return tamanho_aproximado(fig._data) + tamanho_aproximado(fig._layout)
+
+
+class CacheFiguras:
+    """LRU de valores com tamanho, com limite de itens, de bytes e TTL (thread-safe)"""
+
+    def __init__(self, max_itens=256, max_bytes=64 * 1024 * 1024, ttl=3600):
+        self.max_itens = max_itens
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._itens = OrderedDict()  # chave → (instante, valor, bytes)
+        self._bytes = 0
+        self._geracao = 0  # avança em limpar(): valores montados antes não entram mais
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.remocoes = 0
+
+    def _remover(self, chave):
+        _, _, tamanho = self._itens.pop(chave)
+        self._bytes -= tamanho
+
+    def obter(self, chave):
+        """Valor guardado para a chave, ou None (conta acerto/falha)"""
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is not None and (self.ttl is None or time.monotonic() - item[0] <= self.ttl):
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return item[1]
+            if item is not None:
+                self._remover(chave)
+                self.remocoes += 1
+            self.falhas += 1
+            return None
+
+    def guardar(self, chave, valor, tamanho=None, geracao=None):
+        """Guarda o valor; `tamanho` em bytes (padrão: len(valor))
+
+        Com `geracao` (lida antes de montar o valor), não guarda nada se
+        limpar() foi chamado nesse meio tempo.
+        """
+        tamanho = len(valor) if tamanho is None else tamanho
+        with self._lock:
+            if geracao is not None and geracao != self._geracao:
+                return
+            if chave in self._itens:
+                self._remover(chave)
+            if tamanho > self.max_bytes:
+                return
+            self._itens[chave] = (time.monotonic(), valor, tamanho)
+            self._bytes += tamanho
+            while len(self._itens) > self.max_itens or self._bytes > self.max_bytes:
+                self._remover(next(iter(self._itens)))
+                self.remocoes += 1
+
+    def obter_ou_criar(self, chave, criar, medir=len):
+        """Valor da chave; se não existir (ou expirou), chama criar() e guarda com o tamanho medir(valor)"""
+        with self._lock:
+            geracao = self._geracao
+        valor = self.obter(chave)
+        if valor is None:
+            valor = criar()
+            self.guardar(chave, valor, medir(valor), geracao)
+        return valor
+
+    def figura(self, nome, filtros, construir):
+        """Cópia da go.Figure do gráfico `nome` para os filtros; construir(filtros) monta a figura"""
+        chave = (nome, normalizar_filtros(filtros))
+        return go.Figure(self.obter_ou_criar(chave, lambda: construir(filtros), tamanho_figura))
+
+    def limpar(self):
+        """Esvazia o cache; figuras que estavam sendo montadas também não entram"""
+        with self._lock:
+            self._itens.clear()
+            self._bytes = 0
+            self._geracao += 1
+
+    def estatisticas(self):
+        with self._lock:
+            total = self.acertos + self.falhas
+            return {
+                'itens': len(self._itens),
+                'bytes': self._bytes,
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'remocoes': self.remocoes,
+                'taxa_acerto': self.acertos / total if total else 0.0,
+            }
@@ -0,0 +1,205 @@
+"""
+Cubo de contagens pré-calculado para o dashboard de salários
+
+Em vez de filtrar o DataFrame e refazer value_counts/groupby a cada rerun,
+o dashboard monta uma única vez um array NumPy com a contagem de
+profissionais para cada combinação de (cargo × gênero × experiência ×
+faixa salarial × UF). Todo gráfico vira a soma de uma fatia desse cubo,
+então o custo de mexer nos filtros não depende do número de linhas.
+
+Novas respostas entram com somar_linhas(df_novo): só o lote é contado e
+somado ao cubo (categorias novas ganham uma posição a mais no eixo).
+"""
+
+import threading
+
+import numpy as np
+import pandas as pd
+
+from dados_cache import CSV_PADRAO, PASTA_CACHE, construir_cache, ler_partes
+
+DIMENSOES = ('cargo_atual', 'genero', 'tempo_experiencia_dados', 'faixa_salarial', 'uf_residencia')
+
+
+class CuboContagens:
+    """Contagens por combinação de categorias; valores faltantes ficam numa posição extra"""
+
+    def __init__(self, df, dimensoes=DIMENSOES):
+        self.dimensoes = tuple(dimensoes)
+        self.categorias = {}
+        self.tipos = {}
+        codigos = []
+        for dim in self.dimensoes:
+            coluna = df[dim]
+            if not isinstance(coluna.dtype, pd.CategoricalDtype):
+                coluna = coluna.astype('category')
+            cats = coluna.cat.categories
+            cod = coluna.cat.codes.to_numpy().astype(np.int64)
+            cod[cod < 0] = len(cats)  # NaN → última posição
+            self.categorias[dim] = cats
+            self.tipos[dim] = coluna.dtype
+            codigos.append(cod)
+
+        self.forma = tuple(len(self.categorias[d]) + 1 for d in self.dimensoes)
+        if codigos and len(codigos[0]):
+            plano = np.ravel_multi_index(codigos, self.forma)
+            contagens = np.bincount(plano, minlength=int(np.prod(self.forma)))
+        else:
+            contagens = np.zeros(int(np.prod(self.forma)), dtype=np.int64)
+        self.contagens = contagens.reshape(self.forma).astype(np.int32)
+
+    def somar_linhas(self, df):
+        """Novo cubo com as contagens de `df` somadas (o cubo atual não muda)"""
+        novo = object.__new__(CuboContagens)
+        novo.dimensoes = self.dimensoes
+        novo.categorias, novo.tipos = dict(self.categorias), dict(self.tipos)
+        codigos = []
+        for dim in self.dimensoes:
+            coluna = df[dim]
+            valores = coluna.astype(object).where(coluna.notna(), None)
+            extras = [v for v in pd.unique(valores.to_numpy()) if v is not None and v not in self.categorias[dim]]
+            if extras:
+                novo.categorias[dim] = self.categorias[dim].append(pd.Index(extras, dtype=self.categorias[dim].dtype))
+                novo.tipos[dim] = pd.CategoricalDtype(novo.categorias[dim], ordered=self.tipos[dim].ordered)
+            cod = novo.categorias[dim].get_indexer(valores.to_numpy()).astype(np.int64)
+            cod[cod < 0] = len(novo.categorias[dim])  # NaN → última posição
+            codigos.append(cod)
+
+        novo.forma = tuple(len(novo.categorias[d]) + 1 for d in self.dimensoes)
+        if novo.forma == self.forma:
+            contagens = self.contagens.copy()
+        else:
+            # Categorias antigas ficam nas mesmas posições; a de NaN vai para o fim do eixo
+            contagens = np.zeros(novo.forma, dtype=self.contagens.dtype)
+            destino = [np.r_[np.arange(len(self.categorias[d])), len(novo.categorias[d])] for d in self.dimensoes]
+            contagens[np.ix_(*destino)] = self.contagens
+        if codigos and len(codigos[0]):
+            plano = np.ravel_multi_index(codigos, novo.forma)
+            contagens += np.bincount(plano, minlength=contagens.size).reshape(novo.forma).astype(contagens.dtype)
+        novo.contagens = contagens
+        return novo
+
+    def _indices(self, dim, selecionados):
+        """Códigos (posições no cubo) dos valores selecionados em uma dimensão"""
+        n = len(self.categorias[dim])
+        if selecionados is None:
+            return np.arange(n + 1)
+        cats = self.categorias[dim]
+        cod = cats.get_indexer([v for v in selecionados if not pd.isna(v)])
+        cod = cod[cod >= 0]
+        if any(pd.isna(v) for v in selecionados):
+            cod = np.append(cod, n)
+        return np.unique(cod)
+
+    def fatia(self, filtros=None):
+        """Sub-cubo com os filtros aplicados e as posições escolhidas de cada dimensão"""
+        filtros = filtros or {}
+        indices = [self._indices(dim, filtros.get(dim)) for dim in self.dimensoes]
+        return self.contagens[np.ix_(*indices)], indices
+
+    def total(self, filtros=None):
+        """Número de profissionais que passam pelos filtros"""
+        sub, _ = self.fatia(filtros)
+        return int(sub.sum())
+
+    def agregar(self, por, filtros=None):
+        """Array de contagens por `por`, sem as posições de valor faltante"""
+        por = [por] if isinstance(por, str) else list(por)
+        sub, indices = self.fatia(filtros)
+        eixos_soma = tuple(i for i, d in enumerate(self.dimensoes) if d not in por)
+        reduzido = sub.sum(axis=eixos_soma)
+
+        # Reordena os eixos na ordem pedida e descarta a posição de NaN (como o value_counts)
+        restantes = [d for d in self.dimensoes if d in por]
+        reduzido = np.moveaxis(reduzido, [restantes.index(d) for d in por], range(len(por)))
+        cods = []
+        for eixo, dim in enumerate(por):
+            cod = indices[self.dimensoes.index(dim)]
+            validos = cod < len(self.categorias[dim])
+            reduzido = np.compress(validos, reduzido, axis=eixo)
+            cods.append(cod[validos])
+        return reduzido, cods
+
+    def contar(self, por, filtros=None, manter_zeros=False):
+        """DataFrame no formato do groupby(...).size(): colunas `por` + 'contagem'"""
+        por = [por] if isinstance(por, str) else list(por)
+        reduzido, cods = self.agregar(por, filtros)
+        if manter_zeros:
+            # Como o value_counts de uma coluna categórica: todas as categorias aparecem
+            completo = np.zeros([len(self.categorias[d]) for d in por], dtype=reduzido.dtype)
+            completo[np.ix_(*cods)] = reduzido
+            reduzido, cods = completo, [np.arange(len(self.categorias[d])) for d in por]
+            posicoes = [g.ravel() for g in np.meshgrid(*[np.arange(len(c)) for c in cods], indexing='ij')]
+        else:
+            posicoes = np.nonzero(reduzido)
+        dados = {}
+        for dim, cod, pos in zip(por, cods, posicoes):
+            dados[dim] = pd.Categorical.from_codes(cod[pos], dtype=self.tipos[dim])
+        dados['contagem'] = reduzido[tuple(posicoes)].astype(np.int64)
+        return pd.DataFrame(dados)
+
+    def media_ponderada(self, por, dim_valor, valores, filtros=None):
+        """Média de `valores` (um número por categoria de dim_valor) agrupada por `por`"""
+        reduzido, cods = self.agregar([por, dim_valor], filtros)
+        pesos = np.asarray(valores, dtype=float)[cods[1]]
+        validos = ~np.isnan(pesos)
+        n = reduzido[:, validos].sum(axis=1)
+        soma = reduzido[:, validos] @ pesos[validos]
+        com_dados = n > 0
+        return pd.DataFrame({
+            por: pd.Categorical.from_codes(cods[0][com_dados], dtype=self.tipos[por]),
+            'media': soma[com_dados] / n[com_dados],
+        })
+
+
+class CuboAtualizavel:
+    """Cubo + opções dos filtros que acompanham o cache de dados_cache.py
+
+    atualizar() confere o cache (só um stat quando nada mudou) e, se
+    chegaram partes novas (linhas anexadas ao CSV), lê só elas e soma ao
+    cubo. Se o cache foi refeito do zero, recarrega tudo. Leitores usam
+    `cubo` e `opcoes` sem trava: os dois são trocados inteiros.
+    """
+
+    def __init__(self, csv_path=CSV_PADRAO, pasta_cache=PASTA_CACHE, preparar=None,
+                 colunas_opcoes=(), dimensoes=DIMENSOES):
+        self.csv_path = csv_path
+        self.pasta_cache = pasta_cache
+        self.preparar = preparar or (lambda df: df)
+        self.colunas_opcoes = tuple(colunas_opcoes)
+        self.dimensoes = dimensoes
+        self.partes = []  # ids das partes já contadas
+        self._lock = threading.Lock()
+        self.atualizar()
+
+    def _ler(self, partes):
+        return self.preparar(ler_partes(partes).to_pandas())
+
+    def _opcoes(self, df, atuais=None):
+        """Valores de cada coluna na ordem em que aparecem (como o unique()), sem repetir os atuais"""
+        opcoes = {}
+        for coluna in self.colunas_opcoes:
+            valores = np.asarray(df[coluna].unique(), dtype=object)
+            if atuais is not None:
+                valores = np.concatenate([np.asarray(atuais[coluna], dtype=object), valores])
+            opcoes[coluna] = list(pd.unique(valores))
+        return opcoes
+
+    def atualizar(self):
+        """Número de linhas novas incorporadas (0 se nada mudou)"""
+        with self._lock:
+            partes = construir_cache(self.csv_path, self.pasta_cache)['partes']
+            ids = [p['id'] for p in partes]
+            if ids == self.partes:
+                return 0
+            if self.partes and ids[:len(self.partes)] == self.partes:
+                novas = partes[len(self.partes):]
+                df = self._ler(novas)
+                self.cubo = self.cubo.somar_linhas(df)
+                self.opcoes = self._opcoes(df, self.opcoes)
+            else:
+                df = self._ler(partes)
+                self.cubo = CuboContagens(df, self.dimensoes)
+                self.opcoes = self._opcoes(df)
+            self.partes = ids
+            return len(df)
@@ -0,0 +1,12 @@
+"""Atalho para comum/faixas_salariais.py (módulo compartilhado pelas aulas)"""
+
+import os
+import sys
+
+_RAIZ = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, os.pardir))
+if _RAIZ not in sys.path:
+    sys.path.insert(0, _RAIZ)
+
+from comum import faixas_salariais as _modulo  # noqa: E402
+
+sys.modules[__name__] = _modulo
@@ -0,0 +1,211 @@
+"""
+Geometrias dos estados brasileiros para o mapa do dashboard
+
+O GeoJSON dos estados fica versionado em data/geo/ junto com versões
+simplificadas em alguns níveis de resolução; o app só lê do disco, sem
+rede. O original (br_states.json) vem da malha municipal 1:2.500.000 do
+IBGE com os municípios unidos por UF (ilhas e lagoas minúsculas descartadas).
+A simplificação preserva a topologia: as fronteiras compartilhadas entre
+dois estados são quebradas em arcos, cada arco é simplificado uma única
+vez (Douglas-Peucker) e reaproveitado pelos dois lados, então não surgem
+buracos nem sobreposições entre vizinhos. As coordenadas são arredondadas
+e as propriedades descartadas (só o 'id' da UF fica), o que reduz o
+tamanho da figura enviada ao navegador a cada rerun.
+
+Uso (regera os níveis a partir do original, ou de outra origem):
+    python geo_estados.py
+    python geo_estados.py --origem caminho/ou/url/br_states.json
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+
+URL_GEOJSON = "https://raw.githubusercontent.com/giuliano-macedo/geodata-br-states/refs/heads/main/geojson/br_states.json"
+PASTA_GEO = os.path.join('data', 'geo')
+ARQUIVO_ORIGINAL = 'br_states.json'
+
+# Nível → tolerância da simplificação (em graus) e casas decimais das coordenadas
+NIVEIS = {
+    'alta': (0.0, 5),
+    'media': (0.01, 3),
+    'baixa': (0.05, 2),
+}
+NIVEL_PADRAO = 'media'
+
+
+def caminho_nivel(nivel, pasta=PASTA_GEO):
+    if nivel == 'original':
+        return os.path.join(pasta, ARQUIVO_ORIGINAL)
+    return os.path.join(pasta, f'br_states_{nivel}.json')
+
+
+def _douglas_peucker(pontos, tolerancia):
+    """Índices dos pontos mantidos (sempre inclui o primeiro e o último)"""
+    n = len(pontos)
+    if n <= 2 or tolerancia <= 0:
+        return np.arange(n)
+    manter = np.zeros(n, dtype=bool)
+    manter[0] = manter[-1] = True
+    pilha = [(0, n - 1)]
+    while pilha:
+        ini, fim = pilha.pop()
+        if fim - ini < 2:
+            continue
+        a, b = pontos[ini], pontos[fim]
+        meio = pontos[ini + 1:fim]
+        ab = b - a
+        norma = np.hypot(*ab)
+        if norma == 0:
+            dist = np.hypot(*(meio - a).T)
+        else:
+            dist = np.abs(ab[0] * (meio[:, 1] - a[1]) - ab[1] * (meio[:, 0] - a[0])) / norma
+        i = int(np.argmax(dist))
+        if dist[i] > tolerancia:
+            k = ini + 1 + i
+            manter[k] = True
+            pilha.append((ini, k))
+            pilha.append((k, fim))
+    return np.flatnonzero(manter)
+
+
+def _aneis(geometria):
+    """Lista de anéis (listas de pontos) de um Polygon/MultiPolygon"""
+    if geometria['type'] == 'Polygon':
+        return [geometria['coordinates']]
+    return geometria['coordinates']
+
+
+def _normalizar(anel):
+    """Pontos (x, y) arredondados do anel, sem repetir o ponto de fechamento"""
+    pontos = [tuple(round(c, 7) for c in p[:2]) for p in anel]
+    if len(pontos) > 1 and pontos[0] == pontos[-1]:
+        pontos = pontos[:-1]
+    return pontos
+
+
+def simplificar_geojson(geojson, tolerancia, casas_decimais):
+    """Simplifica todas as feições preservando as fronteiras compartilhadas"""
+    # 1) Vértices (arredondados) e anéis que passam por cada um
+    aneis = []
+    for f in geojson['features']:
+        for poligono in _aneis(f['geometry']):
+            for anel in poligono:
+                aneis.append(_normalizar(anel))
+    donos = {}
+    for i, anel in enumerate(aneis):
+        for p in anel:
+            donos.setdefault(p, set()).add(i)
+
+    # 2) Vértices fixos: onde muda o conjunto de anéis vizinhos (junções entre arcos)
+    cache_arcos = {}
+
+    def simplificar_anel(anel):
+        n = len(anel)
+        if n < 4:
+            return anel
+        fixos = [
+            k for k in range(n)
+            if donos[anel[k]] != donos[anel[k - 1]] or donos[anel[k]] != donos[anel[(k + 1) % n]]
+        ]
+        if not fixos:
+            # Anel isolado (ilha): fixa o primeiro ponto e o mais distante dele
+            pts = np.array(anel)
+            fixos = [0, int(np.argmax(np.hypot(*(pts - pts[0]).T)))]
+        resultado = []
+        for j, ini in enumerate(fixos):
+            fim = fixos[(j + 1) % len(fixos)]
+            arco = anel[ini:fim + 1] if fim > ini else anel[ini:] + anel[:fim + 1]
+            # Mesmo arco percorrido nos dois sentidos → mesma chave e mesmo resultado
+            invertido = arco[0] > arco[-1]
+            chave = tuple(reversed(arco)) if invertido else tuple(arco)
+            if chave not in cache_arcos:
+                pts = np.array(chave)
+                cache_arcos[chave] = [chave[k] for k in _douglas_peucker(pts, tolerancia)]
+            simplificado = cache_arcos[chave]
+            if invertido:
+                simplificado = simplificado[::-1]
+            resultado.extend(simplificado[:-1])
+        return resultado
+
+    # 3) Remonta as feições só com o 'id' e coordenadas arredondadas
+    def montar_anel(anel):
+        pontos = simplificar_anel(_normalizar(anel))
+        pontos = [[round(x, casas_decimais), round(y, casas_decimais)] for x, y in pontos]
+        # Remove pontos repetidos após o arredondamento
+        limpos = [p for k, p in enumerate(pontos) if k == 0 or p != pontos[k - 1]]
+        return limpos + [limpos[0]]
+
+    features = []
+    for f in geojson['features']:
+        poligonos = []
+        for poligono in _aneis(f['geometry']):
+            novos = [montar_anel(anel) for anel in poligono]
+            # Descarta anéis degenerados (ilhas minúsculas que viraram linha)
+            novos = [anel for anel in novos if len(anel) >= 4]
+            if novos:
+                poligonos.append(novos)
+        geometria = {'type': 'MultiPolygon', 'coordinates': poligonos}
+        if len(poligonos) == 1:
+            geometria = {'type': 'Polygon', 'coordinates': poligonos[0]}
+        features.append({'type': 'Feature', 'id': f.get('id', f.get('properties', {}).get('id')), 'geometry': geometria})
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def _ler_origem(origem, timeout=10):
+    if origem.startswith(('http://', 'https://')):
+        import requests
+
+        resposta = requests.get(origem, timeout=timeout)
+        resposta.raise_for_status()
+        return resposta.json()
+    with open(origem, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _salvar(caminho, geojson):
+    tmp = caminho + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(geojson, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp, caminho)
+
+
+def preparar_geojson(origem=None, pasta=PASTA_GEO, timeout=10):
+    """Grava o GeoJSON original e as versões simplificadas de cada nível"""
+    os.makedirs(pasta, exist_ok=True)
+    original = caminho_nivel('original', pasta)
+    if origem is None:
+        origem = original if os.path.exists(original) else URL_GEOJSON
+    geojson = _ler_origem(origem, timeout)
+    if os.path.abspath(origem) != os.path.abspath(original):
+        _salvar(original, geojson)
+    tamanhos = {}
+    for nivel, (tolerancia, casas) in NIVEIS.items():
+        destino = caminho_nivel(nivel, pasta)
+        _salvar(destino, simplificar_geojson(geojson, tolerancia, casas))
+        tamanhos[nivel] = os.path.getsize(destino)
+    return tamanhos
+
+
+def carregar_geojson(nivel=NIVEL_PADRAO, pasta=PASTA_GEO):
+    """Lê o GeoJSON do nível pedido do disco (FileNotFoundError se não foi gerado)"""
+    destino = caminho_nivel(nivel, pasta)
+    if not os.path.exists(destino):
+        raise FileNotFoundError(f"{destino} não encontrado: rode `python geo_estados.py` para gerar os arquivos de data/geo/")
+    with open(destino, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera os GeoJSON (original e simplificados) dos estados em data/geo/")
+    parser.add_argument('--origem', default=None, help="Arquivo ou URL do GeoJSON original (padrão: data/geo/br_states.json ou o GitHub)")
+    args = parser.parse_args()
+    tamanhos = preparar_geojson(args.origem)
+    for nivel, tamanho in tamanhos.items():
+        print(f"{nivel:>6}: {tamanho / 1024:,.0f} KB")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,276 +3,311 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-import re
 import json
-import requests
+
+from cubo_salarios import CuboAtualizavel
+from faixas_salariais import ORDEM_FAIXAS, valores_das_categorias
+from geo_estados import NIVEL_PADRAO, carregar_geojson
+from cache_figuras import CacheFiguras
+from metricas import Metricas
+
+PORTA_METRICAS = 9103
 
 # --- Configuração da Página ---
 st.set_page_config(page_title="Análise de Salários", layout="wide")
 
-# --- Título e Descrição ---
-st.title("Análise de Salários de Profissionais de Dados no Brasil")
-st.markdown("Explore as remunerações por cargo, nível de experiência e outros filtros.")
-
-# --- Carregamento de Dados ---
-@st.cache_data
-def load_data():
-    df = pd.read_csv('data/processed/dataset_salarios_dados.csv')
-    return df
-
-df = load_data()
-
-# --- Barra Lateral (Sidebar) com Filtros ---
-st.sidebar.header("Filtros")
-cargos = st.sidebar.multiselect(
-    "Cargo", options=df.cargo_atual.unique(), default=df.cargo_atual.unique()
-)
-
-generos = st.sidebar.multiselect(
-    "Gênero", options=df.genero.unique(), default=df.genero.unique()
-)
-
-# Definindo a ordem da experiência
-ordem_experiencia = [
-    'Não tenho experiência na área de dados',
-    'Menos de 1 ano',
-    'de 1 a 2 anos',
-    'de 3 a 5 anos',
-    'de 6 a 10 anos',
-    'Mais de 10 anos'
-]
-df['tempo_experiencia_dados'] = pd.Categorical(df['tempo_experiencia_dados'], categories=ordem_experiencia, ordered=True)
-
-experiencia = st.sidebar.multiselect(
-    "Tempo de Experiência em Dados", 
-    options=ordem_experiencia, 
-    default=ordem_experiencia
-)
-
-df_filt = df[
-    (df.cargo_atual.isin(cargos)) & 
-    (df.genero.isin(generos)) & 
-    (df.tempo_experiencia_dados.isin(experiencia))
-]
-
-
-# --- Ordem das faixas salariais ---
-ordem_faixa_salarial = [
-    'Menos de R$ 1.000/mês',
-    'de R$ 1.001/mês a R$ 2.000/mês',
-    'de R$ 2.001/mês a R$ 3.000/mês',
-    'de R$ 3.001/mês a R$ 4.000/mês',
-    'de R$ 4.001/mês a R$ 6.000/mês',
-    'de R$ 6.001/mês a R$ 8.000/mês',
-    'de R$ 8.001/mês a R$ 12.000/mês',
-    'de R$ 12.001/mês a R$ 16.000/mês',
-    'de R$ 16.001/mês a R$ 20.000/mês',
-    'de R$ 20.001/mês a R$ 25.000/mês',
-    'de R$ 25.001/mês a R$ 30.000/mês',
-    'de R$ 30.001/mês a R$ 40.000/mês',
-    'Acima de R$ 40.001/mês'
-]
-
-# --- Visualizações ---
-st.header("Distribuição de Salários")
-
-# Gráfico de barras da faixa salarial
-s_faixa_salarial = pd.Series(df_filt['faixa_salarial'])
-df_faixa_salarial = s_faixa_salarial.value_counts().reset_index()
-df_faixa_salarial.columns = ['faixa_salarial', 'contagem']
-
-# Convertendo a coluna para tipo Categoria com a ordem definida
-df_faixa_salarial['faixa_salarial'] = pd.Categorical(df_faixa_salarial['faixa_salarial'], categories=ordem_faixa_salarial, ordered=True)
-df_faixa_salarial = df_faixa_salarial.sort_values('faixa_salarial')
-
-fig_faixa = px.bar(
-    df_faixa_salarial,
-    x='faixa_salarial',
-    y='contagem',
-    title='Distribuição de Faixas Salariais',
-    labels={'faixa_salarial': 'Faixa Salarial', 'contagem': 'Número de Profissionais'},
-    text_auto=True
-)
-st.plotly_chart(fig_faixa, use_container_width=True)
-
-st.markdown("---")
-
-st.header("Análise por Cargo")
-# Gráfico de barras dos cargos
-s_cargos = pd.Series(df_filt['cargo_atual'])
-df_cargos = s_cargos.value_counts().reset_index()
-df_cargos.columns = ['cargo_atual', 'contagem']
-
-fig_cargos = px.bar(
-    df_cargos,
-    y='cargo_atual',
-    x='contagem',
-    orientation='h',
-    title='Distribuição de Cargos',
-    labels={'cargo_atual': 'Cargo Atual', 'contagem': 'Número de Profissionais'},
-    text_auto=True
-)
-fig_cargos.update_layout(yaxis={'categoryorder':'total ascending'})
-st.plotly_chart(fig_cargos, use_container_width=True)
-
-st.markdown("---")
-
-# --- Gráficos Demográficos ---
-st.header("Análises Demográficas")
-col1, col2 = st.columns(2)
-
-with col1:
-    st.subheader("Distribuição por Gênero")
-    s_genero = pd.Series(df_filt['genero'])
-    df_genero = s_genero.value_counts().reset_index()
-    df_genero.columns = ['genero', 'contagem']
-    fig_genero = px.treemap(
-        df_genero,
-        path=['genero'],
-        values='contagem',
-        title='Proporção de Gêneros'
+# Tempos por etapa e acertos dos caches (por processo), em /metrics no formato do Prometheus
+@st.cache_resource
+def load_metricas():
+    metricas = Metricas('dashboard')
+    metricas.iniciar_servidor(PORTA_METRICAS)
+    return metricas
+
+metricas = load_metricas()
+# Mede o rerun inteiro, inclusive os interrompidos (novo rerun, st.stop) ou com erro
+with metricas.iniciar_rerun():
+    # --- Título e Descrição ---
+    st.title("Análise de Salários de Profissionais de Dados no Brasil")
+    st.markdown("Explore as remunerações por cargo, nível de experiência e outros filtros.")
+
+    # Definindo a ordem da experiência
+    ordem_experiencia = [
+        'Não tenho experiência na área de dados',
+        'Menos de 1 ano',
+        'de 1 a 2 anos',
+        'de 3 a 5 anos',
+        'de 6 a 10 anos',
+        'Mais de 10 anos'
+    ]
+
+    # --- Carregamento de Dados ---
+    def ordenar_experiencia(df):
+        df['tempo_experiencia_dados'] = pd.Categorical(df['tempo_experiencia_dados'], categories=ordem_experiencia, ordered=True)
+        return df
+
+    # Cubo de contagens (cargo × gênero × experiência × faixa × UF): os gráficos
+    # somam fatias dele em vez de varrer as linhas do DataFrame a cada rerun.
+    # cache_resource: um por processo, compartilhado entre as sessões; respostas
+    # anexadas ao CSV entram no próximo rerun, somando só o lote novo ao cubo.
+    @st.cache_resource
+    def load_dados():
+        return CuboAtualizavel(preparar=ordenar_experiencia, colunas_opcoes=['cargo_atual', 'genero'])
+
+    # Cache LRU das figuras já montadas, compartilhado entre todas as sessões
+    @st.cache_resource
+    def load_cache_figuras():
+        return CacheFiguras(max_itens=512, max_bytes=128 * 1024 * 1024, ttl=6 * 3600)
+
+    with metricas.etapa('carregar_dados'):
+        dados = load_dados()
+    cache_figuras = load_cache_figuras()
+    with metricas.etapa('atualizar_dados'):
+        if dados.atualizar():
+            cache_figuras.limpar()  # figuras em cache são dos dados antigos
+    cubo = dados.cubo
+    metricas.registrar_cache('figuras', cache_figuras.estatisticas)
+
+    def mostrar_figura(nome, construir):
+        """Figura do cache (ou construída e medida) + envio ao navegador"""
+        with metricas.etapa(f'figura_{nome}'):
+            fig = cache_figuras.figura(nome, filtros, metricas.cronometrar(f'construir_{nome}')(construir))
+        with metricas.etapa('plotly_chart'):
+            st.plotly_chart(fig, use_container_width=True)
+
+    # --- Barra Lateral (Sidebar) com Filtros ---
+    st.sidebar.header("Filtros")
+    cargos = st.sidebar.multiselect(
+        "Cargo", options=dados.opcoes['cargo_atual'], default=dados.opcoes['cargo_atual']
     )
-    st.plotly_chart(fig_genero, use_container_width=True)
-
-with col2:
-    st.subheader("Distribuição por Experiência")
-    s_experiencia = pd.Series(df_filt['tempo_experiencia_dados'])
-    df_experiencia = s_experiencia.value_counts().reset_index()
-    df_experiencia.columns = ['experiencia', 'contagem']
-    df_experiencia['experiencia'] = pd.Categorical(df_experiencia['experiencia'], categories=ordem_experiencia, ordered=True)
-    df_experiencia = df_experiencia.sort_values('experiencia')
-    fig_experiencia = px.bar(
-        df_experiencia,
-        x='experiencia',
-        y='contagem',
-        title='Níveis de Experiência na Área de Dados',
-        labels={'experiencia': 'Tempo de Experiência', 'contagem': 'Número de Profissionais'},
-        text_auto=True
+
+    generos = st.sidebar.multiselect(
+        "Gênero", options=dados.opcoes['genero'], default=dados.opcoes['genero']
     )
-    st.plotly_chart(fig_experiencia, use_container_width=True)
-
-st.markdown("---")
-
-# --- Análises Cruzadas com Salário ---
-st.header("Salário vs. Outras Variáveis")
-
-st.subheader("Faixa Salarial por Gênero")
-df_salario_genero = df_filt.groupby(['faixa_salarial', 'genero'], observed=True).size().reset_index(name='contagem')
-df_salario_genero['faixa_salarial'] = pd.Categorical(df_salario_genero['faixa_salarial'], categories=ordem_faixa_salarial, ordered=True)
-df_salario_genero = df_salario_genero.sort_values('faixa_salarial')
-
-fig_sal_gen = px.bar(
-    df_salario_genero,
-    x='faixa_salarial',
-    y='contagem',
-    color='genero',
-    barmode='group',
-    title='Comparativo de Faixa Salarial por Gênero',
-    labels={'faixa_salarial': 'Faixa Salarial', 'contagem': 'Número de Profissionais', 'genero': 'Gênero'},
-)
-st.plotly_chart(fig_sal_gen, use_container_width=True)
-
-st.subheader("Hierarquia de Experiência e Salário")
-df_treemap_exp_sal = df_filt.groupby(['tempo_experiencia_dados', 'faixa_salarial'], observed=True).size().reset_index(name='contagem')
-fig_treemap = px.treemap(
-    df_treemap_exp_sal,
-    path=['tempo_experiencia_dados', 'faixa_salarial'],
-    values='contagem',
-    title='Distribuição de Salário por Nível de Experiência',
-    color='tempo_experiencia_dados',
-    color_discrete_map={'(?)':'black', 'Menos de 1 ano':'gold', 'de 1 a 2 anos':'darkorange', 'de 3 a 5 anos':'red', 'de 6 a 10 anos': 'darkred', 'Mais de 10 anos': 'maroon'}
-)
-st.plotly_chart(fig_treemap, use_container_width=True)
-
-st.markdown("---")
-
-# --- Análise Geográfica ---
-st.header("Análise Geográfica de Salários")
-
-# Função para converter faixa salarial para valor numérico
-def converte_salario_para_numero(faixa):
-    if isinstance(faixa, str):
-        numeros = [int(s) for s in re.findall(r'\d+', faixa)]
-        if 'Menos de' in faixa:
-            return numeros[0] * 1000
-        elif 'Acima de' in faixa:
-            return numeros[0] * 1000
-        elif len(numeros) == 2:
-            return ((numeros[0] + numeros[1]) / 2) * 1000
-        elif len(numeros) == 4: # Formato de 1.001 a 2.000
-            return ((numeros[0] * 1000 + numeros[1]) + (numeros[2] * 1000 + numeros[3])) / 2
-    return None
-
-# Carregar GeoJSON do Brasil
-@st.cache_data
-def load_geojson():
-    url = "https://raw.githubusercontent.com/giuliano-macedo/geodata-br-states/refs/heads/main/geojson/br_states.json"
-    try:
-        response = requests.get(url)
-        response.raise_for_status()  # Lança um erro para status HTTP ruins
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        st.error(f"Erro ao carregar dados geográficos: {e}")
-        return None
-    except json.JSONDecodeError:
-        st.error("Erro ao decodificar os dados geográficos. O formato pode ser inválido.")
-        return None
-
-geojson = load_geojson()
-
-if geojson:
-    # Get all state abbreviations from GeoJSON
-    all_states = [feature['id'] for feature in geojson.get('features', [])]
-    df_all_states = pd.DataFrame(data=all_states, columns=['uf_residencia'])
-
-    df_mapa = df_filt.copy()
-    df_mapa['salario_medio'] = pd.Series(df_mapa['faixa_salarial']).apply(converte_salario_para_numero)
-
-    df_estado_salario = df_mapa.groupby('uf_residencia')['salario_medio'].mean().reset_index()
-
-    # Merge with all states to include those with no data
-    df_mapa_completo = pd.merge(df_all_states, df_estado_salario, on='uf_residencia', how='left')
-
-    # Binning the salary data
-    bins = [0, 4000, 8000, 12000, 16000, 20000, 100000]
-    labels = [
-        'Até R$4k', 
-        'R$4k - R$8k', 
-        'R$8k - R$12k',
-        'R$12k - R$16k', 
-        'R$16k - R$20k', 
-        'Acima de R$20k'
-    ]
-    df_mapa_completo['faixa_salario_medio'] = pd.cut(df_mapa_completo['salario_medio'], bins=bins, labels=labels, right=False)
-
-    # Fill NaN with "Sem Informação"
-    # Usando .cat.add_categories antes de fillna para tratar como categoria
-    df_mapa_completo['faixa_salario_medio'] = df_mapa_completo['faixa_salario_medio'].cat.add_categories(['Sem Informação'])
-    df_mapa_completo['faixa_salario_medio'].fillna('Sem Informação', inplace=True)
-    
-    # Criar mapa coroplético
-    fig_mapa = px.choropleth(
-        df_mapa_completo,
-        geojson=geojson,
-        locations='uf_residencia',
-        featureidkey="id",
-        color='faixa_salario_medio',
-        color_discrete_map={
-            'Sem Informação': 'lightgrey',
-            'Até R$4k': '#eff3ff',
-            'R$4k - R$8k': '#c6dbef',
-            'R$8k - R$12k': '#9ecae1',
-            'R$12k - R$16k': '#6baed6',
-            'R$16k - R$20k': '#3182bd',
-            'Acima de R$20k': '#08519c'
-        },
-        category_orders={'faixa_salario_medio': labels + ['Sem Informação']},
-        scope="south america",
-        title="Média Salarial por Estado",
-        labels={'uf_residencia':'Estado', 'faixa_salario_medio':'Faixa Salarial Média (R$)'}
+
+    experiencia = st.sidebar.multiselect(
+        "Tempo de Experiência em Dados", 
+        options=ordem_experiencia, 
+        default=ordem_experiencia
     )
-    fig_mapa.update_layout(height=800)
-    fig_mapa.update_geos(fitbounds="locations", visible=False)
-    st.plotly_chart(fig_mapa, use_container_width=True)
-else:
-    st.warning("O mapa não pôde ser exibido pois os dados geográficos não foram carregados.") 
\ No newline at end of file
+
+    filtros = {
+        'cargo_atual': cargos,
+        'genero': generos,
+        'tempo_experiencia_dados': experiencia,
+    }
+
+
+    # --- Ordem das faixas salariais ---
+    ordem_faixa_salarial = ORDEM_FAIXAS
+
+    # --- Visualizações ---
+    st.header("Distribuição de Salários")
+
+    # Gráfico de barras da faixa salarial
+    def grafico_faixa(filtros):
+        df_faixa_salarial = cubo.contar('faixa_salarial', filtros)
+
+        # Convertendo a coluna para tipo Categoria com a ordem definida
+        df_faixa_salarial['faixa_salarial'] = pd.Categorical(df_faixa_salarial['faixa_salarial'], categories=ordem_faixa_salarial, ordered=True)
+        df_faixa_salarial = df_faixa_salarial.sort_values('faixa_salarial')
+
+        return px.bar(
+            df_faixa_salarial,
+            x='faixa_salarial',
+            y='contagem',
+            title='Distribuição de Faixas Salariais',
+            labels={'faixa_salarial': 'Faixa Salarial', 'contagem': 'Número de Profissionais'},
+            text_auto=True
+        )
+
+    mostrar_figura('faixa', grafico_faixa)
+
+    st.markdown("---")
+
+    st.header("Análise por Cargo")
+    # Gráfico de barras dos cargos
+    def grafico_cargos(filtros):
+        df_cargos = cubo.contar('cargo_atual', filtros).sort_values('contagem', ascending=False)
+
+        fig_cargos = px.bar(
+            df_cargos,
+            y='cargo_atual',
+            x='contagem',
+            orientation='h',
+            title='Distribuição de Cargos',
+            labels={'cargo_atual': 'Cargo Atual', 'contagem': 'Número de Profissionais'},
+            text_auto=True
+        )
+        fig_cargos.update_layout(yaxis={'categoryorder':'total ascending'})
+        return fig_cargos
+
+    mostrar_figura('cargos', grafico_cargos)
+
+    st.markdown("---")
+
+    # --- Gráficos Demográficos ---
+    def grafico_genero(filtros):
+        df_genero = cubo.contar('genero', filtros).sort_values('contagem', ascending=False)
+        return px.treemap(
+            df_genero,
+            path=['genero'],
+            values='contagem',
+            title='Proporção de Gêneros'
+        )
+
+    def grafico_experiencia(filtros):
+        df_experiencia = cubo.contar('tempo_experiencia_dados', filtros, manter_zeros=True)
+        df_experiencia.columns = ['experiencia', 'contagem']
+        df_experiencia['experiencia'] = pd.Categorical(df_experiencia['experiencia'], categories=ordem_experiencia, ordered=True)
+        df_experiencia = df_experiencia.sort_values('experiencia')
+        return px.bar(
+            df_experiencia,
+            x='experiencia',
+            y='contagem',
+            title='Níveis de Experiência na Área de Dados',
+            labels={'experiencia': 'Tempo de Experiência', 'contagem': 'Número de Profissionais'},
+            text_auto=True
+        )
+
+    st.header("Análises Demográficas")
+    col1, col2 = st.columns(2)
+
+    with col1:
+        st.subheader("Distribuição por Gênero")
+        mostrar_figura('genero', grafico_genero)
+
+    with col2:
+        st.subheader("Distribuição por Experiência")
+        mostrar_figura('experiencia', grafico_experiencia)
+
+    st.markdown("---")
+
+    # --- Análises Cruzadas com Salário ---
+    st.header("Salário vs. Outras Variáveis")
+
+    st.subheader("Faixa Salarial por Gênero")
+    def grafico_salario_genero(filtros):
+        df_salario_genero = cubo.contar(['faixa_salarial', 'genero'], filtros)
+        df_salario_genero['faixa_salarial'] = pd.Categorical(df_salario_genero['faixa_salarial'], categories=ordem_faixa_salarial, ordered=True)
+        df_salario_genero = df_salario_genero.sort_values('faixa_salarial')
+
+        return px.bar(
+            df_salario_genero,
+            x='faixa_salarial',
+            y='contagem',
+            color='genero',
+            barmode='group',
+            title='Comparativo de Faixa Salarial por Gênero',
+            labels={'faixa_salarial': 'Faixa Salarial', 'contagem': 'Número de Profissionais', 'genero': 'Gênero'},
+        )
+
+    mostrar_figura('salario_genero', grafico_salario_genero)
+
+    st.subheader("Hierarquia de Experiência e Salário")
+    def grafico_treemap(filtros):
+        df_treemap_exp_sal = cubo.contar(['tempo_experiencia_dados', 'faixa_salarial'], filtros)
+        return px.treemap(
+            df_treemap_exp_sal,
+            path=['tempo_experiencia_dados', 'faixa_salarial'],
+            values='contagem',
+            title='Distribuição de Salário por Nível de Experiência',
+            color='tempo_experiencia_dados',
+            color_discrete_map={'(?)':'black', 'Menos de 1 ano':'gold', 'de 1 a 2 anos':'darkorange', 'de 3 a 5 anos':'red', 'de 6 a 10 anos': 'darkred', 'Mais de 10 anos': 'maroon'}
+        )
+
+    mostrar_figura('treemap', grafico_treemap)
+
+    st.markdown("---")
+
+    # --- Análise Geográfica ---
+    st.header("Análise Geográfica de Salários")
+
+    # Carregar GeoJSON do Brasil (arquivo local em data/geo/, já simplificado)
+    @st.cache_resource
+    def load_geojson():
+        try:
+            return carregar_geojson(NIVEL_PADRAO)
+        except FileNotFoundError as e:
+            st.error(f"Erro ao carregar dados geográficos: {e}")
+            return None
+        except json.JSONDecodeError:
+            st.error("Erro ao decodificar os dados geográficos. O formato pode ser inválido.")
+            return None
+
+    geojson = load_geojson()
+
+    def grafico_mapa(filtros):
+        # Get all state abbreviations from GeoJSON
+        all_states = [feature['id'] for feature in geojson.get('features', [])]
+        df_all_states = pd.DataFrame(data=all_states, columns=['uf_residencia'])
+
+        # Valor de cada faixa (tabela de faixas_salariais.py) e média ponderada pelo cubo
+        valores_faixa = valores_das_categorias(cubo.categorias['faixa_salarial'])
+        df_estado_salario = cubo.media_ponderada('uf_residencia', 'faixa_salarial', valores_faixa, filtros)
+        df_estado_salario = df_estado_salario.rename(columns={'media': 'salario_medio'})
+        df_estado_salario['uf_residencia'] = df_estado_salario['uf_residencia'].astype(str)
+
+        # Merge with all states to include those with no data
+        df_mapa_completo = pd.merge(df_all_states, df_estado_salario, on='uf_residencia', how='left')
+
+        # Binning the salary data
+        bins = [0, 4000, 8000, 12000, 16000, 20000, 100000]
+        labels = [
+            'Até R$4k', 
+            'R$4k - R$8k', 
+            'R$8k - R$12k',
+            'R$12k - R$16k', 
+            'R$16k - R$20k', 
+            'Acima de R$20k'
+        ]
+        df_mapa_completo['faixa_salario_medio'] = pd.cut(df_mapa_completo['salario_medio'], bins=bins, labels=labels, right=False)
+
+        # Fill NaN with "Sem Informação"
+        # Usando .cat.add_categories antes de fillna para tratar como categoria
+        df_mapa_completo['faixa_salario_medio'] = df_mapa_completo['faixa_salario_medio'].cat.add_categories(['Sem Informação'])
+        df_mapa_completo['faixa_salario_medio'] = df_mapa_completo['faixa_salario_medio'].fillna('Sem Informação')
+
+        # Criar mapa coroplético
+        fig_mapa = px.choropleth(
+            df_mapa_completo,
+            geojson=geojson,
+            locations='uf_residencia',
+            featureidkey="id",
+            color='faixa_salario_medio',
+            color_discrete_map={
+                'Sem Informação': 'lightgrey',
+                'Até R$4k': '#eff3ff',
+                'R$4k - R$8k': '#c6dbef',
+                'R$8k - R$12k': '#9ecae1',
+                'R$12k - R$16k': '#6baed6',
+                'R$16k - R$20k': '#3182bd',
+                'Acima de R$20k': '#08519c'
+            },
+            category_orders={'faixa_salario_medio': labels + ['Sem Informação']},
+            scope="south america",
+            title="Média Salarial por Estado",
+            labels={'uf_residencia':'Estado', 'faixa_salario_medio':'Faixa Salarial Média (R$)'}
+        )
+        # O px.choropleth repete o GeoJSON inteiro em cada trace (uma por faixa);
+        # cada uma só precisa dos estados que pinta (figura ~5x menor para copiar e enviar)
+        estados = {feature['id']: feature for feature in geojson['features']}
+        fig_mapa.for_each_trace(lambda trace: trace.update(geojson={
+            'type': 'FeatureCollection', 'features': [estados[uf] for uf in trace.locations],
+        }))
+        fig_mapa.update_layout(height=800)
+        fig_mapa.update_geos(fitbounds="locations", visible=False)
+        return fig_mapa
+
+    if geojson:
+        mostrar_figura('mapa', grafico_mapa)
+    else:
+        st.warning("O mapa não pôde ser exibido pois os dados geográficos não foram carregados.") 
+
+    # --- Estatísticas do cache de gráficos (por processo, todas as sessões) ---
+    stats_cache = cache_figuras.estatisticas()
+    with st.sidebar.expander("⚙️ Cache de gráficos"):
+        st.caption(
+            f"Acertos: {stats_cache['acertos']} | Falhas: {stats_cache['falhas']} | "
+            f"Taxa de acerto: {stats_cache['taxa_acerto']:.0%} | "
+            f"{stats_cache['itens']} figuras ({stats_cache['bytes'] / 1024:,.0f} KB)"
+        )
@@ -8,9 +8,15 @@ para predizer salários específicos de profissionais de dados.
 
 import streamlit as st
 import pandas as pd
-import pickle
 import numpy as np
 
+from modelo_compacto import codificador_do_modelo
+from predicao import QUANTIS_PADRAO, carregar_modelo_padrao, incerteza_da_matriz, pontuar_dataframe
+from tabela_predicoes import carregar_tabela_predicoes
+from metricas import Metricas
+
+PORTA_METRICAS = 9104
+
 # Configuração da página
 st.set_page_config(
     page_title="Calculadora de Salários com ML (Regressão)",
@@ -18,50 +24,51 @@ st.set_page_config(
     layout="wide"
 )
 
+@st.cache_resource
+def carregar_metricas():
+    """Tempos por etapa e acertos da tabela (por processo), em /metrics no formato do Prometheus"""
+    metricas = Metricas('calculadora')
+    metricas.iniciar_servidor(PORTA_METRICAS)
+    return metricas
+
 @st.cache_resource
 def carregar_modelo():
     """Carrega o modelo treinado"""
     # Principal parte do código para unir o modelo com o aplicativo Streamlit
+    # Usa o formato compacto (modelo_salarios/, arrays em memory-map) quando existir
     try:
-        with open('modelo_salarios.pkl', 'rb') as f:
-            modelo_completo = pickle.load(f)
-        return modelo_completo
+        return carregar_modelo_padrao()
     except FileNotFoundError:
         st.error("❌ Modelo não encontrado! Execute primeiro o script 'modelo_salarios.py' para treinar o modelo.")
         st.stop()
 
+@st.cache_resource
+def carregar_tabela():
+    """Tabela pré-calculada de predições (None se não foi gerada para o modelo atual)"""
+    return carregar_tabela_predicoes()
+
 def fazer_predicao(dados_usuario, modelo_completo):
     """Faz a predição usando o modelo carregado"""
     
-    # Criar DataFrame com os dados do usuário
-    df_usuario = pd.DataFrame([dados_usuario])
-    
-    # Aplicar label encoding usando os encoders salvos
-    for coluna, encoder in modelo_completo['label_encoders'].items():
-        if coluna in df_usuario.columns:
-            try:
-                # Se o valor não foi visto durante o treinamento, usar o primeiro valor conhecido
-                if dados_usuario[coluna] in encoder.classes_:
-                    df_usuario[coluna] = encoder.transform([dados_usuario[coluna]])[0]
-                else:
-                    df_usuario[coluna] = 0  # Valor padrão
-            except:
-                df_usuario[coluna] = 0
-    
-    # Fazer predição (agora retorna um valor numérico)
-    salario_predito = modelo_completo['modelo'].predict(df_usuario)[0]
+    metricas = carregar_metricas()
+
+    # Codificar o perfil com os dicionários de categorias do modelo
+    with metricas.etapa('codificar'):
+        X, nao_vistos = codificador_do_modelo(modelo_completo).codificar(dados_usuario)
+    if nao_vistos:
+        valores = ", ".join(f"{coluna} = '{valor}'" for coluna, contagem in nao_vistos.items() for valor in contagem)
+        st.warning(f"⚠️ Valores não vistos no treino (o modelo usa a categoria mais frequente no treino): {valores}")
+    X = pd.DataFrame(X, columns=modelo_completo['features'])
     
-    # Para regressão, podemos calcular uma estimativa de incerteza usando várias árvores
-    if hasattr(modelo_completo['modelo'], 'estimators_'):
-        # Predições de todas as árvores individuais
-        predicoes_arvores = [arvore.predict(df_usuario)[0] for arvore in modelo_completo['modelo'].estimators_]
-        std_predicao = np.std(predicoes_arvores)
-        intervalo_confianca = 1.96 * std_predicao  # ~95% confiança
-    else:
-        std_predicao = 0
-        intervalo_confianca = 0
+    # Para florestas, a incerteza vem da variação entre as árvores (std 0 nos outros modelos)
+    with metricas.etapa('predizer_modelo'):
+        predito, std, inferior, superior = incerteza_da_matriz(modelo_completo['modelo'], X, QUANTIS_PADRAO)
+    salario_predito = predito[0]
+    std_predicao = std[0]
+    intervalo_confianca = 1.96 * std_predicao  # ~95% confiança
+    intervalo_quantis = (inferior[0], superior[0])
     
-    return salario_predito, std_predicao, intervalo_confianca
+    return salario_predito, std_predicao, intervalo_confianca, intervalo_quantis
 
 def formatar_salario(valor):
     """Formata valor para exibição em R$"""
@@ -78,8 +85,11 @@ def main():
     do seu salário específico com base em padrões aprendidos dos dados.
     """)
     
+    metricas = carregar_metricas()
+
     # Carregar modelo
-    modelo_completo = carregar_modelo()
+    with metricas.etapa('carregar_modelo'):
+        modelo_completo = carregar_modelo()
     
     # Mostrar informações do modelo
     if 'metricas' in modelo_completo:
@@ -208,12 +218,24 @@ def main():
             'uf_residencia': uf_residencia
         }
         
-        # Fazer predição
+        # Fazer predição: primeiro a tabela pré-calculada (consulta O(1)), depois o modelo
         try:
-            salario_predito, std_predicao, intervalo_confianca = fazer_predicao(dados_usuario, modelo_completo)
+            with metricas.etapa('carregar_tabela'):
+                tabela = carregar_tabela()
+            if tabela is not None:
+                metricas.registrar_cache('tabela_predicoes', tabela.estatisticas)
+            with metricas.etapa('consultar_tabela'):
+                resultado = tabela.consultar(dados_usuario) if tabela is not None else None
+            da_tabela = resultado is not None
+            if not da_tabela:
+                resultado = fazer_predicao(dados_usuario, modelo_completo)
+            salario_predito, std_predicao, intervalo_confianca, intervalo_quantis = resultado
             
             # Mostrar resultado
             st.header("🎯 Resultado da Predição")
+            if da_tabela:
+                inicio, fim = tabela.faixa_idade(idade)
+                st.caption(f"⚡ Resposta da tabela pré-calculada (idade considerada na faixa de {inicio} a {fim} anos)")
             
             col1, col2 = st.columns(2)
             
@@ -238,6 +260,9 @@ def main():
                 st.info(f"""
                 **📈 Intervalo de Confiança (95%):**
                 Entre {formatar_salario(limite_inferior)} e {formatar_salario(limite_superior)}
+
+                **🌳 95% das árvores do modelo preveem:**
+                Entre {formatar_salario(intervalo_quantis[0])} e {formatar_salario(intervalo_quantis[1])}
                 """)
             
             # Análise da predição
@@ -282,6 +307,33 @@ def main():
         except Exception as e:
             st.error(f"❌ Erro ao fazer predição: {str(e)}")
     
+    # Pontuação em lote: vários perfis de uma vez a partir de um CSV
+    with st.expander("📂 Calcular salários de vários perfis (CSV)"):
+        st.markdown(
+            "Envie um CSV com as colunas: " + ", ".join(f"`{c}`" for c in modelo_completo['features'])
+        )
+        arquivo_csv = st.file_uploader("Arquivo CSV", type=['csv'])
+        if arquivo_csv is not None:
+            try:
+                with metricas.etapa('pontuar_lote'):
+                    df_lote = pontuar_dataframe(pd.read_csv(arquivo_csv), modelo_completo)
+                st.success(f"✅ {len(df_lote)} perfis calculados")
+                st.dataframe(df_lote.head(100), use_container_width=True)
+                st.download_button(
+                    "⬇️ Baixar resultados",
+                    data=df_lote.to_csv(index=False).encode('utf-8'),
+                    file_name='salarios_previstos.csv',
+                    mime='text/csv'
+                )
+            except Exception as e:
+                st.error(f"❌ Erro ao calcular o lote: {str(e)}")
+
+    # Categorias recebidas que o modelo não conhecia (acumulado de todas as sessões)
+    nao_vistos = codificador_do_modelo(modelo_completo).relatorio()
+    if not nao_vistos.empty:
+        with st.expander(f"🔎 Categorias não vistas no treino ({int(nao_vistos['ocorrencias'].sum())})"):
+            st.dataframe(nao_vistos, use_container_width=True, hide_index=True)
+
     # Informações sobre o modelo
     with st.expander("ℹ️ Sobre o Modelo"):
         st.markdown("""
@@ -309,4 +361,5 @@ def main():
         """)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    with carregar_metricas().iniciar_rerun():
+        main() 
\ No newline at end of file
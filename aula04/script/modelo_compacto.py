@@ -0,0 +1,324 @@
+"""
+Formato compacto do modelo de salários
+Aula 04 - Machine Learning Básico
+
+Exporta o modelo treinado (o dicionário salvo em 'modelo_salarios.pkl')
+para uma pasta com:
+
+- arrays NumPy planos (.npy) com os nós de todas as árvores concatenados
+  (feature, threshold, filhos, valor), que podem ser abertos via
+  memory-map e compartilhados por vários workers;
+- um manifest.json com features, encoders (dicionário valor → código e a
+  categoria padrão para valores não vistos no treino), métricas e importâncias.
+
+A inferência é feita em NumPy puro, percorrendo todas as árvores e linhas
+ao mesmo tempo (um passo por nível de profundidade), sem scikit-learn e
+sem pickle na hora de carregar.
+
+Uso:
+    python modelo_compacto.py                      # modelo_salarios.pkl → modelo_salarios/
+    python modelo_compacto.py --pkl outro.pkl --saida pasta_modelo
+"""
+
+import argparse
+import json
+import os
+import pickle
+import threading
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+PASTA_MODELO = 'modelo_salarios'
+ARQUIVO_MANIFESTO = 'manifest.json'
+VERSAO_FORMATO = 3
+# Marca de valor não visto no treino (o mesmo -1 do pd.Index.get_indexer): fora da faixa
+# das classes (0..n-1), não chega ao modelo; a linha recebe a categoria padrão da coluna
+CODIGO_DESCONHECIDO = -1
+ARRAYS = ('feature', 'threshold', 'esquerda', 'direita', 'valor', 'nan_esquerda', 'inicio_arvores')
+TAMANHO_BLOCO = 20_000  # linhas avaliadas por vez (limita a memória de trabalho)
+
+
+class EncoderCompacto:
+    """Substituto leve do LabelEncoder: mapa valor → código (dict) e o transform"""
+
+    def __init__(self, codigos):
+        self.codigos = {str(v): int(c) for v, c in codigos.items()}
+        self.classes_ = np.array(sorted(self.codigos, key=self.codigos.get), dtype=object)
+
+    def transform(self, valores):
+        codigos = [self.codigos.get(str(v)) for v in valores]
+        desconhecidos = sorted({str(v) for v, c in zip(valores, codigos) if c is None})
+        if desconhecidos:
+            raise ValueError(f"Valores não vistos no treino: {desconhecidos}")
+        return np.array(codigos)
+
+
+class CodificadorCategorias:
+    """Codifica um lote inteiro (DataFrame, dict ou lista de dicts) na matriz de features
+
+    Cada coluna categórica é resolvida de uma vez com um índice hash das
+    classes de treino (pd.Index.get_indexer); um único perfil (dict) usa
+    direto os dicionários valor → código. Valores fora do treino (marcados
+    com CODIGO_DESCONHECIDO) recebem a categoria padrão da coluna, a mais
+    frequente no treino, e são contados em `nao_vistos`, em vez de sumirem
+    silenciosamente. Modelos salvos sem `padroes` usam o código 0.
+    """
+
+    def __init__(self, features, encoders, padroes=None):
+        self.features = list(features)
+        self.mapas = {}
+        self.indices = {}
+        self.padroes = {}
+        for coluna, encoder in encoders.items():
+            mapa = getattr(encoder, 'codigos', None) or {str(v): i for i, v in enumerate(encoder.classes_)}
+            self.mapas[coluna] = mapa
+            self.indices[coluna] = pd.Index(list(mapa))
+            self.padroes[coluna] = (padroes or {}).get(coluna, 0)
+        # Código de cada posição do índice (o índice segue a ordem de inserção do mapa)
+        self.codigos_indice = {c: np.fromiter(m.values(), dtype=np.int64, count=len(m)) for c, m in self.mapas.items()}
+        self.nao_vistos = Counter()  # (coluna, valor) → vezes que apareceu
+        self._lock = threading.Lock()
+
+    def _registrar(self, novos):
+        if novos:
+            with self._lock:
+                for coluna, contagem in novos.items():
+                    for valor, n in contagem.items():
+                        self.nao_vistos[(coluna, valor)] += n
+
+    def _codificar_perfil(self, dados):
+        linha = np.empty(len(self.features), dtype=np.float32)
+        novos = {}
+        for j, coluna in enumerate(self.features):
+            valor = dados[coluna]
+            if coluna not in self.mapas:
+                linha[j] = valor
+                continue
+            codigo = self.mapas[coluna].get(str(valor), CODIGO_DESCONHECIDO)
+            if codigo == CODIGO_DESCONHECIDO:
+                codigo = self.padroes[coluna]
+                novos[coluna] = {str(valor): 1}
+            linha[j] = codigo
+        return linha[None, :], novos
+
+    def _codificar_tabela(self, df):
+        X = np.empty((len(df), len(self.features)), dtype=np.float32)
+        novos = {}
+        for j, coluna in enumerate(self.features):
+            if coluna not in self.mapas:
+                X[:, j] = df[coluna].to_numpy(dtype=np.float32)
+                continue
+            # O treino usou astype(str), então NaN vira a classe 'nan'
+            valores = df[coluna].astype(str).fillna('nan')
+            posicoes = self.indices[coluna].get_indexer(valores)
+            fora = posicoes == CODIGO_DESCONHECIDO
+            X[:, j] = np.where(fora, self.padroes[coluna], self.codigos_indice[coluna][posicoes])
+            if fora.any():
+                novos[coluna] = valores[fora].value_counts().to_dict()
+        return X, novos
+
+    def codificar(self, dados):
+        """(matriz float32 linhas × features, {coluna: {valor não visto: contagem}}) deste lote"""
+        perfil = isinstance(dados, dict) and not any(
+            isinstance(v, (list, tuple, np.ndarray, pd.Series)) for v in dados.values()
+        )
+        if not perfil and not isinstance(dados, pd.DataFrame):
+            dados = pd.DataFrame(dados)
+        faltando = [c for c in self.features if c not in dados]
+        if faltando:
+            raise ValueError(f"Colunas obrigatórias ausentes: {', '.join(faltando)}")
+        X, novos = self._codificar_perfil(dados) if perfil else self._codificar_tabela(dados)
+        self._registrar(novos)
+        return X, novos
+
+    def relatorio(self):
+        """DataFrame com as categorias não vistas no treino e quantas vezes apareceram"""
+        with self._lock:
+            itens = [(c, v, n) for (c, v), n in self.nao_vistos.most_common()]
+        return pd.DataFrame(itens, columns=['coluna', 'valor', 'ocorrencias'])
+
+
+def codificador_do_modelo(modelo_completo):
+    """Codificador do modelo (criado na primeira chamada e guardado no dicionário)"""
+    if 'codificador' not in modelo_completo:
+        modelo_completo['codificador'] = CodificadorCategorias(
+            modelo_completo['features'], modelo_completo['label_encoders'], modelo_completo.get('categorias_padrao')
+        )
+    return modelo_completo['codificador']
+
+
+class ModeloCompacto:
+    """Floresta (ou gradient boosting) avaliada com NumPy a partir dos arrays exportados"""
+
+    def __init__(self, arrays, profundidade, agregacao='media', valor_inicial=0.0, taxa_aprendizado=1.0,
+                 feature_importances=None, n_features=None):
+        for nome in ARRAYS:
+            setattr(self, nome, arrays[nome])
+        self.profundidade = profundidade
+        self.agregacao = agregacao
+        self.valor_inicial = valor_inicial
+        self.taxa_aprendizado = taxa_aprendizado
+        self.n_arvores = len(self.inicio_arvores) - 1
+        self.n_features_in_ = n_features
+        if feature_importances is not None:
+            self.feature_importances_ = np.asarray(feature_importances)
+
+    def _folhas(self, X):
+        """Índice (global) da folha alcançada em cada árvore, matriz árvores × linhas
+
+        As folhas apontam para si mesmas, então basta dar `profundidade`
+        passos em todas as árvores e linhas ao mesmo tempo, sem máscaras.
+        """
+        nos = np.repeat(self.inicio_arvores[:-1, None], X.shape[0], axis=1)
+        linhas = np.arange(X.shape[0])
+        for _ in range(self.profundidade):
+            x = X[linhas, self.feature[nos]]
+            # Mesma regra do scikit-learn: X em float32 comparado ao threshold em float64
+            vai_esquerda = x <= self.threshold[nos]
+            nan = np.isnan(x)
+            if nan.any():
+                vai_esquerda[nan] = self.nan_esquerda[nos[nan]].astype(bool)
+            nos = np.where(vai_esquerda, self.esquerda[nos], self.direita[nos])
+        return nos
+
+    def predicoes_por_arvore(self, X):
+        """Matriz (árvores × linhas) com a saída de cada árvore"""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        matriz = np.empty((self.n_arvores, X.shape[0]))
+        for ini in range(0, X.shape[0], TAMANHO_BLOCO):
+            bloco = X[ini:ini + TAMANHO_BLOCO]
+            matriz[:, ini:ini + len(bloco)] = self.valor[self._folhas(bloco)]
+        return matriz
+
+    def predict(self, X):
+        matriz = self.predicoes_por_arvore(X)
+        if self.agregacao == 'media':
+            return matriz.mean(axis=0)
+        return self.valor_inicial + self.taxa_aprendizado * matriz.sum(axis=0)
+
+
+def _arvores_sklearn(modelo):
+    """Lista de árvores, tipo de agregação e parâmetros de um ensemble do scikit-learn"""
+    if hasattr(modelo, 'learning_rate'):  # GradientBoostingRegressor
+        arvores = [e.tree_ for e in np.ravel(modelo.estimators_)]
+        if modelo.init_ == 'zero':
+            inicial = 0.0
+        else:
+            inicial = float(np.ravel(modelo.init_.predict(np.zeros((1, modelo.n_features_in_))))[0])
+        return arvores, 'soma', inicial, float(modelo.learning_rate)
+    if hasattr(modelo, 'estimators_'):  # RandomForest / ExtraTrees
+        return [e.tree_ for e in modelo.estimators_], 'media', 0.0, 1.0
+    return [modelo.tree_], 'media', 0.0, 1.0  # árvore única
+
+
+def arrays_do_modelo(modelo):
+    """Concatena os nós de todas as árvores em arrays planos com índices globais"""
+    arvores, agregacao, inicial, taxa = _arvores_sklearn(modelo)
+    inicio = np.zeros(len(arvores) + 1, dtype=np.int64)
+    partes = {nome: [] for nome in ARRAYS if nome != 'inicio_arvores'}
+    for i, arvore in enumerate(arvores):
+        deslocamento = inicio[i]
+        folha = arvore.children_left == -1
+        proprio = np.arange(arvore.node_count) + deslocamento  # folhas apontam para si mesmas
+        partes['feature'].append(np.where(folha, 0, arvore.feature).astype(np.int32))
+        partes['threshold'].append(arvore.threshold.astype(np.float64))
+        partes['esquerda'].append(np.where(folha, proprio, arvore.children_left + deslocamento).astype(np.int64))
+        partes['direita'].append(np.where(folha, proprio, arvore.children_right + deslocamento).astype(np.int64))
+        partes['valor'].append(arvore.value.reshape(arvore.node_count, -1)[:, 0].astype(np.float64))
+        nan_esq = getattr(arvore, 'missing_go_to_left', np.zeros(arvore.node_count, dtype=np.uint8))
+        partes['nan_esquerda'].append(np.asarray(nan_esq, dtype=np.uint8))
+        inicio[i + 1] = deslocamento + arvore.node_count
+    arrays = {nome: np.concatenate(lista) for nome, lista in partes.items()}
+    arrays['inicio_arvores'] = inicio
+    parametros = {
+        'profundidade': int(max(a.max_depth for a in arvores)),
+        'agregacao': agregacao,
+        'valor_inicial': inicial,
+        'taxa_aprendizado': taxa,
+    }
+    return arrays, parametros
+
+
+def exportar_modelo(modelo_completo, pasta=PASTA_MODELO):
+    """Grava os arrays .npy e o manifest.json do modelo na pasta"""
+    os.makedirs(pasta, exist_ok=True)
+    modelo = modelo_completo['modelo']
+    arrays, parametros = arrays_do_modelo(modelo)
+    for nome, array in arrays.items():
+        np.save(os.path.join(pasta, f'{nome}.npy'), array)
+
+    padroes = modelo_completo.get('categorias_padrao', {})
+    manifesto = {
+        'versao_formato': VERSAO_FORMATO,
+        'tipo': modelo_completo.get('tipo', 'regressao'),
+        'algoritmo': type(modelo).__name__,
+        'features': list(modelo_completo['features']),
+        'encoders': {
+            c: {'codigos': {str(v): i for i, v in enumerate(e.classes_)}, 'padrao': int(padroes.get(c, 0))}
+            for c, e in modelo_completo['label_encoders'].items()
+        },
+        'metricas': {k: float(v) for k, v in modelo_completo.get('metricas', {}).items()},
+        'feature_importances': [float(v) for v in getattr(modelo, 'feature_importances_', [])],
+        'n_arvores': int(len(arrays['inicio_arvores']) - 1),
+        'n_nos': int(len(arrays['feature'])),
+        **parametros,
+    }
+    # Manifesto por último: ele marca a exportação como completa
+    caminho = os.path.join(pasta, ARQUIVO_MANIFESTO)
+    with open(caminho + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=2)
+    os.replace(caminho + '.tmp', caminho)
+    return manifesto
+
+
+def existe_modelo_compacto(pasta=PASTA_MODELO):
+    return os.path.exists(os.path.join(pasta, ARQUIVO_MANIFESTO))
+
+
+def carregar_modelo_compacto(pasta=PASTA_MODELO, mmap=True):
+    """Carrega o modelo exportado no mesmo formato de dicionário do pickle"""
+    with open(os.path.join(pasta, ARQUIVO_MANIFESTO), encoding='utf-8') as f:
+        manifesto = json.load(f)
+    if manifesto.get('versao_formato') != VERSAO_FORMATO:
+        raise ValueError(f"Formato de modelo não suportado: {manifesto.get('versao_formato')}")
+    arrays = {
+        nome: np.load(os.path.join(pasta, f'{nome}.npy'), mmap_mode='r' if mmap else None)
+        for nome in ARRAYS
+    }
+    modelo = ModeloCompacto(
+        arrays,
+        profundidade=manifesto['profundidade'],
+        agregacao=manifesto['agregacao'],
+        valor_inicial=manifesto['valor_inicial'],
+        taxa_aprendizado=manifesto['taxa_aprendizado'],
+        feature_importances=manifesto['feature_importances'] or None,
+        n_features=len(manifesto['features']),
+    )
+    return {
+        'modelo': modelo,
+        'label_encoders': {c: EncoderCompacto(e['codigos']) for c, e in manifesto['encoders'].items()},
+        'categorias_padrao': {c: e['padrao'] for c, e in manifesto['encoders'].items()},
+        'features': manifesto['features'],
+        'tipo': manifesto['tipo'],
+        'metricas': manifesto['metricas'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta o modelo pickle para o formato compacto (NumPy + JSON)")
+    parser.add_argument('--pkl', default='modelo_salarios.pkl')
+    parser.add_argument('--saida', default=PASTA_MODELO)
+    args = parser.parse_args()
+
+    with open(args.pkl, 'rb') as f:
+        modelo_completo = pickle.load(f)
+    manifesto = exportar_modelo(modelo_completo, args.saida)
+    tamanho = sum(os.path.getsize(os.path.join(args.saida, a)) for a in os.listdir(args.saida))
+    print(f"✅ {manifesto['n_arvores']} árvores / {manifesto['n_nos']} nós exportados para "
+          f"{args.saida}/ ({tamanho / 1024 / 1024:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
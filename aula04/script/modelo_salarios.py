@@ -0,0 +1,318 @@
+"""
+Modelo de Machine Learning para Predição de Salários (REGRESSÃO)
+Aula 04 - Machine Learning Básico
+
+Versão em script do treino do notebook (treinar_modelo), usada para gerar o
+modelo da calculadora:
+
+1. a matriz de features já preprocessada e codificada fica em cache em
+   data/cache/ (só é refeita quando o hash do CSV muda);
+2. uma busca de hiperparâmetros com validação cruzada compara Random
+   Forest e Gradient Boosting, com os ajustes (candidato × fold)
+   distribuídos entre processos;
+3. o melhor candidato é treinado de novo, avaliado no conjunto de teste e
+   salvo como 'modelo_salarios.pkl' e no formato compacto
+   ('modelo_salarios/'), junto com um relatório de tempos em JSON.
+
+Uso:
+    python modelo_salarios.py
+    python modelo_salarios.py --workers 8 --folds 5
+    python modelo_salarios.py --rapido          # só a configuração do notebook
+"""
+
+import argparse
+import itertools
+import json
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import KFold, train_test_split
+from sklearn.preprocessing import LabelEncoder
+
+from dados_cache import CSV_PADRAO, PASTA_CACHE, escrever_atomico, hash_arquivo, ler_json, salvar_json
+from faixas_salariais import converter
+from modelo_compacto import PASTA_MODELO, exportar_modelo
+
+ARQUIVO_MODELO = 'modelo_salarios.pkl'
+ARQUIVO_RELATORIO = 'relatorio_treino.json'
+VERSAO_FEATURES = 1  # incrementar quando mudar o preprocessamento (invalida o cache)
+SEMENTE = 42
+
+FEATURES = ['genero', 'etnia', 'idade', 'nivel_ensino', 'area_formacao',
+            'situacao_trabalho', 'cargo_atual', 'tempo_experiencia_dados', 'uf_residencia']
+
+# Candidatos da busca: nome → (classe, grade de hiperparâmetros)
+CANDIDATOS = {
+    'random_forest': (RandomForestRegressor, {
+        'n_estimators': [100, 200],
+        'max_depth': [10, 15, None],
+        'min_samples_split': [5],
+        'min_samples_leaf': [1, 2, 5],
+    }),
+    'gradient_boosting': (GradientBoostingRegressor, {
+        'n_estimators': [100, 300],
+        'learning_rate': [0.05, 0.1],
+        'max_depth': [3, 5],
+        'subsample': [0.8],
+    }),
+}
+
+# Configuração original do notebook (usada com --rapido)
+CANDIDATO_NOTEBOOK = ('random_forest', {'n_estimators': 100, 'max_depth': 15, 'min_samples_split': 5, 'min_samples_leaf': 2})
+
+
+def preprocessar_dados(df):
+    """Preprocessa os dados para o modelo"""
+    colunas_modelo = FEATURES + ['faixa_salarial']
+    df_modelo = df[colunas_modelo].copy()
+
+    # Remover linhas com cargo_atual faltante (variável muito importante)
+    df_modelo = df_modelo.dropna(subset=['cargo_atual'])
+
+    # Preencher valores faltantes (SP como padrão de UF, como no notebook)
+    df_modelo['area_formacao'] = df_modelo['area_formacao'].fillna('Outra opção')
+    df_modelo['uf_residencia'] = df_modelo['uf_residencia'].fillna('SP')
+
+    # Faixa salarial → valor numérico (tabela única de faixas_salariais.py) e descarta faixas inválidas
+    df_modelo['salario_valor'] = converter(df_modelo['faixa_salarial'])
+    return df_modelo[df_modelo['salario_valor'].notna()]
+
+
+def codificar_features(df_modelo, features=FEATURES):
+    """Matriz X (float32), alvo y e LabelEncoders das colunas de texto"""
+    X = df_modelo[features].copy()
+    label_encoders = {}
+    for coluna in features:
+        if not pd.api.types.is_numeric_dtype(X[coluna]):
+            le = LabelEncoder()
+            X[coluna] = le.fit_transform(X[coluna].astype(str).to_numpy(dtype=object))
+            label_encoders[coluna] = le
+    return X.to_numpy(dtype=np.float32), df_modelo['salario_valor'].to_numpy(dtype=np.float64), label_encoders
+
+
+def categorias_padrao(X, label_encoders, features=FEATURES):
+    """Código da categoria mais frequente de cada coluna codificada (usado para valores não vistos)"""
+    return {
+        coluna: int(np.bincount(X[:, features.index(coluna)].astype(np.int64)).argmax())
+        for coluna in label_encoders
+    }
+
+
+def _encoder_de_classes(classes):
+    le = LabelEncoder()
+    le.classes_ = np.array(classes, dtype=object)
+    return le
+
+
+def carregar_matriz(csv_path=CSV_PADRAO, pasta_cache=PASTA_CACHE, forcar=False):
+    """(X, y, label_encoders, veio_do_cache) — lê do cache se o CSV não mudou"""
+    os.makedirs(pasta_cache, exist_ok=True)
+    base = os.path.join(pasta_cache, os.path.splitext(os.path.basename(csv_path))[0] + '_features')
+    caminho_manifesto, caminho_npz = base + '.json', base + '.npz'
+
+    sha = hash_arquivo(csv_path)
+    manifesto = ler_json(caminho_manifesto)
+    if (not forcar and manifesto and os.path.exists(caminho_npz)
+            and manifesto.get('versao') == VERSAO_FEATURES
+            and manifesto.get('csv_sha256') == sha and manifesto.get('features') == FEATURES):
+        with np.load(caminho_npz) as dados:
+            X, y = dados['X'], dados['y']
+        encoders = {c: _encoder_de_classes(classes) for c, classes in manifesto['encoders'].items()}
+        return X, y, encoders, True
+
+    X, y, encoders = codificar_features(preprocessar_dados(pd.read_csv(csv_path)))
+
+    def escrever_npz(p):
+        with open(p, 'wb') as f:
+            np.savez(f, X=X, y=y)
+
+    escrever_atomico(caminho_npz, escrever_npz)
+    escrever_atomico(caminho_manifesto, lambda p: salvar_json(p, {
+        'versao': VERSAO_FEATURES,
+        'csv': os.path.abspath(csv_path),
+        'csv_sha256': sha,
+        'features': FEATURES,
+        'linhas': int(len(y)),
+        'encoders': {c: [str(v) for v in e.classes_] for c, e in encoders.items()},
+    }))
+    return X, y, encoders, False
+
+
+def gerar_configuracoes(candidatos=CANDIDATOS):
+    """Lista de (nome, parâmetros) com todas as combinações de cada grade"""
+    configuracoes = []
+    for nome, (_, grade) in candidatos.items():
+        chaves = list(grade)
+        for valores in itertools.product(*(grade[c] for c in chaves)):
+            configuracoes.append((nome, dict(zip(chaves, valores))))
+    return configuracoes
+
+
+def criar_modelo(nome, parametros, n_jobs=1):
+    classe = CANDIDATOS[nome][0]
+    extras = {'n_jobs': n_jobs} if classe is RandomForestRegressor else {}
+    return classe(random_state=SEMENTE, **parametros, **extras)
+
+
+# Dados de treino de cada processo: enviados uma vez pelo initializer, não a cada tarefa
+_X_WORKER = None
+_Y_WORKER = None
+
+
+def _iniciar_worker(X, y):
+    global _X_WORKER, _Y_WORKER
+    _X_WORKER, _Y_WORKER = X, y
+
+
+def _avaliar_fold(indice, nome, parametros, idx_treino, idx_validacao):
+    """Ajusta um candidato em um fold e devolve as métricas de validação"""
+    inicio = time.perf_counter()
+    modelo = criar_modelo(nome, parametros)
+    modelo.fit(_X_WORKER[idx_treino], _Y_WORKER[idx_treino])
+    pred = modelo.predict(_X_WORKER[idx_validacao])
+    real = _Y_WORKER[idx_validacao]
+    return indice, {
+        'rmse': float(np.sqrt(mean_squared_error(real, pred))),
+        'mae': float(mean_absolute_error(real, pred)),
+        'r2': float(r2_score(real, pred)),
+        'segundos': time.perf_counter() - inicio,
+    }
+
+
+def busca_hiperparametros(X, y, configuracoes, folds=5, workers=None, verbose=True):
+    """Validação cruzada de todas as configurações em paralelo (um processo por tarefa)
+
+    Retorna as configurações ordenadas pelo RMSE médio (melhor primeiro).
+    """
+    divisoes = list(KFold(folds, shuffle=True, random_state=SEMENTE).split(X))
+    tarefas = [(i, nome, params, tr, va)
+               for i, (nome, params) in enumerate(configuracoes)
+               for tr, va in divisoes]
+    por_config = {i: [] for i in range(len(configuracoes))}
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_worker, initargs=(X, y)) as pool:
+        futuros = [pool.submit(_avaliar_fold, *t) for t in tarefas]
+        for n, futuro in enumerate(as_completed(futuros), 1):
+            i, metricas = futuro.result()
+            por_config[i].append(metricas)
+            if verbose and (n % folds == 0 or n == len(futuros)):
+                print(f"  {n}/{len(futuros)} ajustes concluídos")
+
+    resultados = []
+    for i, (nome, params) in enumerate(configuracoes):
+        folds_i = por_config[i]
+        resultados.append({
+            'candidato': nome,
+            'parametros': params,
+            **{f'{m}_medio': float(np.mean([f[m] for f in folds_i])) for m in ('rmse', 'mae', 'r2')},
+            'rmse_std': float(np.std([f['rmse'] for f in folds_i])),
+            'segundos_ajuste': float(sum(f['segundos'] for f in folds_i)),
+        })
+    return sorted(resultados, key=lambda r: r['rmse_medio'])
+
+
+def treinar_modelo(csv_path=CSV_PADRAO, folds=5, workers=None, rapido=False, usar_cache=True,
+                   arquivo_modelo=ARQUIVO_MODELO, pasta_modelo=PASTA_MODELO,
+                   arquivo_relatorio=ARQUIVO_RELATORIO, verbose=True):
+    """Treina o modelo de machine learning (REGRESSÃO) e salva modelo e relatório"""
+    tempos = {}
+    inicio_total = time.perf_counter()
+
+    inicio = time.perf_counter()
+    X, y, label_encoders, do_cache = carregar_matriz(csv_path, forcar=not usar_cache)
+    tempos['matriz_features'] = time.perf_counter() - inicio
+    if verbose:
+        origem = 'cache' if do_cache else 'CSV'
+        print(f"Matriz de features ({origem}): {X.shape[0]} registros × {X.shape[1]} features "
+              f"em {tempos['matriz_features']:.2f}s")
+
+    # Mesma divisão treino/teste do notebook; a busca usa só o treino
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=SEMENTE)
+
+    if rapido:
+        ranking = [{'candidato': CANDIDATO_NOTEBOOK[0], 'parametros': CANDIDATO_NOTEBOOK[1]}]
+        tempos['busca'] = 0.0
+    else:
+        configuracoes = gerar_configuracoes()
+        if verbose:
+            print(f"Busca: {len(configuracoes)} configurações × {folds} folds "
+                  f"({workers or os.cpu_count()} processos)")
+        inicio = time.perf_counter()
+        ranking = busca_hiperparametros(X_train, y_train, configuracoes, folds, workers, verbose)
+        tempos['busca'] = time.perf_counter() - inicio
+    melhor = ranking[0]
+    if verbose:
+        print(f"Melhor: {melhor['candidato']} {melhor['parametros']}")
+
+    inicio = time.perf_counter()
+    modelo = criar_modelo(melhor['candidato'], melhor['parametros'], n_jobs=-1)
+    modelo.fit(X_train, y_train)
+    tempos['ajuste_final'] = time.perf_counter() - inicio
+
+    y_pred = modelo.predict(X_test)
+    metricas = {
+        'r2': float(r2_score(y_test, y_pred)),
+        'rmse': float(np.sqrt(mean_squared_error(y_test, y_pred))),
+        'mae': float(mean_absolute_error(y_test, y_pred)),
+    }
+    if verbose:
+        print(f"R² Score: {metricas['r2']:.3f} | RMSE: R$ {metricas['rmse']:,.2f} | MAE: R$ {metricas['mae']:,.2f}")
+
+    # Criar dicionário com tudo que precisamos para fazer predições
+    modelo_completo = {
+        'modelo': modelo,
+        'label_encoders': label_encoders,
+        'categorias_padrao': categorias_padrao(X_train, label_encoders),
+        'features': FEATURES,
+        'tipo': 'regressao',
+        'metricas': metricas,
+    }
+
+    inicio = time.perf_counter()
+    with open(arquivo_modelo, 'wb') as f:
+        pickle.dump(modelo_completo, f)
+    exportar_modelo(modelo_completo, pasta_modelo)
+    tempos['salvar'] = time.perf_counter() - inicio
+    tempos['total'] = time.perf_counter() - inicio_total
+
+    relatorio = {
+        'csv': os.path.abspath(csv_path),
+        'matriz_do_cache': do_cache,
+        'registros': int(len(y)),
+        'folds': 0 if rapido else folds,
+        'workers': workers or os.cpu_count(),
+        'melhor': melhor,
+        'metricas_teste': metricas,
+        'tempos_segundos': tempos,
+        'ranking': ranking,
+    }
+    with open(arquivo_relatorio, 'w', encoding='utf-8') as f:
+        json.dump(relatorio, f, ensure_ascii=False, indent=2)
+    if verbose:
+        print(f"Modelo salvo como '{arquivo_modelo}' e '{pasta_modelo}/'; relatório em '{arquivo_relatorio}' "
+              f"(total {tempos['total']:.1f}s)")
+    return modelo_completo
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Treina o modelo de predição de salários da calculadora")
+    parser.add_argument('--csv', default=CSV_PADRAO)
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=None, help="Processos da busca (padrão: todos os núcleos)")
+    parser.add_argument('--rapido', action='store_true', help="Sem busca: treina só a configuração do notebook")
+    parser.add_argument('--sem-cache', action='store_true', help="Refaz a matriz de features mesmo se o CSV não mudou")
+    parser.add_argument('--relatorio', default=ARQUIVO_RELATORIO)
+    args = parser.parse_args()
+
+    treinar_modelo(args.csv, args.folds, args.workers, args.rapido, not args.sem_cache,
+                   arquivo_relatorio=args.relatorio)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""
+Predição de salários em lote
+Aula 04 - Machine Learning Básico
+
+Pontua muitos perfis de uma vez com o modelo salvo (formato compacto em
+'modelo_salarios/' ou o pickle 'modelo_salarios.pkl'):
+as colunas categóricas são codificadas de forma vetorizada pelo
+codificador do modelo e todas as linhas vão num único predict. Arquivos
+CSV grandes são lidos e gravados em pedaços (chunks).
+
+Uso:
+    python predicao.py candidatos.csv -o candidatos_com_salario.csv
+    python predicao.py candidatos.csv -o saida.csv --modelo modelo_salarios.pkl --chunksize 50000
+"""
+
+import argparse
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from modelo_compacto import (
+    ModeloCompacto, PASTA_MODELO, carregar_modelo_compacto, codificador_do_modelo, existe_modelo_compacto
+)
+
+ARQUIVO_MODELO = 'modelo_salarios.pkl'
+TAMANHO_CHUNK_PADRAO = 50_000
+QUANTIS_PADRAO = (0.025, 0.975)  # intervalo de ~95% entre as árvores
+
+
+def carregar_modelo_arquivo(caminho=ARQUIVO_MODELO):
+    """Carrega o dicionário salvo pelo treino (modelo, encoders, features, métricas)
+
+    Aceita a pasta do formato compacto ou o pickle.
+    """
+    if os.path.isdir(caminho):
+        return carregar_modelo_compacto(caminho)
+    with open(caminho, 'rb') as f:
+        return pickle.load(f)
+
+
+def carregar_modelo_padrao(pasta=PASTA_MODELO, arquivo=ARQUIVO_MODELO):
+    """Formato compacto (memory-map) se existir; senão o pickle"""
+    if existe_modelo_compacto(pasta):
+        return carregar_modelo_compacto(pasta)
+    return carregar_modelo_arquivo(arquivo)
+
+
+def e_floresta(modelo):
+    """Se a predição do modelo é a média das árvores (tem incerteza entre árvores)"""
+    if isinstance(modelo, ModeloCompacto):
+        return modelo.agregacao == 'media'
+    # scikit-learn só é importado para o modelo em pickle (que já o carregou ao
+    # desserializar): com o formato compacto, o app não paga ~2s de import
+    from sklearn.ensemble import ExtraTreesRegressor, RandomForestRegressor
+
+    return isinstance(modelo, (RandomForestRegressor, ExtraTreesRegressor))
+
+
+def codificar_lote(df, modelo_completo):
+    """Matriz de features do modelo, com as categorias convertidas para os códigos de treino
+
+    Categorias não vistas no treino recebem a categoria padrão da coluna (a
+    mais frequente no treino) e ficam contadas no codificador do modelo (codificador_do_modelo(...).nao_vistos).
+    """
+    X, _ = codificador_do_modelo(modelo_completo).codificar(df)
+    return pd.DataFrame(X, columns=modelo_completo['features'], index=df.index)
+
+
+def _matriz_modelo(X):
+    """X como no treino (ndarray float32, sem nomes de colunas): o modelo foi ajustado assim"""
+    return np.ascontiguousarray(X, dtype=np.float32)
+
+
+def prever_lote(df, modelo_completo):
+    """Salário previsto para cada linha do DataFrame (uma única chamada ao predict)"""
+    return modelo_completo['modelo'].predict(_matriz_modelo(codificar_lote(df, modelo_completo)))
+
+
+def predicoes_por_arvore(modelo, X):
+    """Matriz (árvores × linhas) com a predição de cada árvore da floresta
+
+    Converte X uma única vez e chama direto a estrutura de cada árvore
+    (tree_.predict), sem a validação de entrada de arvore.predict. Com
+    n_jobs > 1 as árvores são divididas entre threads, como no predict
+    do próprio scikit-learn. O modelo compacto tem sua própria versão.
+    """
+    if isinstance(modelo, ModeloCompacto):
+        return modelo.predicoes_por_arvore(X)
+    Xf = _matriz_modelo(X)
+    arvores = modelo.estimators_
+    matriz = np.empty((len(arvores), Xf.shape[0]))
+
+    def preencher(i):
+        matriz[i] = arvores[i].tree_.predict(Xf).reshape(Xf.shape[0], -1)[:, 0]
+
+    n_jobs = getattr(modelo, 'n_jobs', None)
+    if n_jobs in (None, 1) or len(Xf) < 1000:
+        for i in range(len(arvores)):
+            preencher(i)
+    else:
+        from joblib import Parallel, delayed
+
+        Parallel(n_jobs=n_jobs, prefer='threads')(delayed(preencher)(i) for i in range(len(arvores)))
+    return matriz
+
+
+def incerteza_da_matriz(modelo, X, quantis=QUANTIS_PADRAO):
+    """Predição, desvio-padrão e quantis entre as árvores para a matriz X já codificada
+
+    Para florestas a predição é a média das árvores, então sai da mesma
+    matriz sem um predict extra. Outros modelos não têm incerteza (std 0).
+    """
+    if e_floresta(modelo):
+        matriz = predicoes_por_arvore(modelo, X)
+        predito = matriz.mean(axis=0)
+        std = matriz.std(axis=0)
+        inferior, superior = np.quantile(matriz, quantis, axis=0)
+    else:
+        predito = np.asarray(modelo.predict(_matriz_modelo(X)), dtype=float)
+        std = np.zeros(len(X))
+        inferior = superior = predito
+    return predito, std, inferior, superior
+
+
+def prever_com_incerteza(df, modelo_completo, quantis=QUANTIS_PADRAO):
+    """Predição, desvio-padrão entre as árvores e intervalo por quantis, linha a linha"""
+    X = codificar_lote(df, modelo_completo)
+    predito, std, inferior, superior = incerteza_da_matriz(modelo_completo['modelo'], X, quantis)
+    return pd.DataFrame({
+        'salario_predito': predito,
+        'std_predicao': std,
+        'intervalo_confianca': 1.96 * std,
+        'limite_inferior': inferior,
+        'limite_superior': superior,
+    }, index=df.index)
+
+
+def pontuar_dataframe(df, modelo_completo, coluna_saida='salario_predito', com_incerteza=True):
+    """Cópia do DataFrame com o salário previsto (e, opcionalmente, a incerteza)"""
+    if com_incerteza:
+        resultado = prever_com_incerteza(df, modelo_completo)
+        return pd.concat([df, resultado.rename(columns={'salario_predito': coluna_saida})], axis=1)
+    return df.assign(**{coluna_saida: prever_lote(df, modelo_completo)})
+
+
+def pontuar_csv(entrada, saida, modelo_completo, tamanho_chunk=TAMANHO_CHUNK_PADRAO, com_incerteza=True):
+    """Lê o CSV de perfis em chunks e grava cada chunk já pontuado na saída"""
+    total = 0
+    leitor = pd.read_csv(entrada, chunksize=tamanho_chunk)
+    for i, chunk in enumerate(leitor):
+        pontuar_dataframe(chunk, modelo_completo, com_incerteza=com_incerteza).to_csv(
+            saida, mode='w' if i == 0 else 'a', header=(i == 0), index=False
+        )
+        total += len(chunk)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prevê o salário de todos os perfis de um CSV")
+    parser.add_argument('entrada', help="CSV com as colunas usadas pelo modelo")
+    parser.add_argument('-o', '--saida', required=True, help="CSV de saída (entrada + salario_predito e incerteza)")
+    parser.add_argument('--modelo', default=None, help="Pasta do modelo compacto ou arquivo .pkl (padrão: modelo_salarios/ ou modelo_salarios.pkl)")
+    parser.add_argument('--chunksize', type=int, default=TAMANHO_CHUNK_PADRAO)
+    parser.add_argument('--sem-incerteza', action='store_true', help="Não calcula desvio-padrão e intervalo entre as árvores")
+    args = parser.parse_args()
+
+    modelo_completo = carregar_modelo_arquivo(args.modelo) if args.modelo else carregar_modelo_padrao()
+    total = pontuar_csv(args.entrada, args.saida, modelo_completo, args.chunksize, not args.sem_incerteza)
+    print(f"✅ {total} perfis pontuados em {args.saida}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+"""
+Tabela pré-calculada de predições da calculadora
+Aula 04 - Machine Learning Básico
+
+Todas as entradas da calculadora, menos a idade, são categorias, então o
+espaço de perfis é finito. Este job percorre esse espaço (ou a parte mais
+frequente dele, dentro de um limite de chaves) em lotes vetorizados e grava
+a predição e o intervalo de cada perfil em arrays densos: a posição é uma
+chave de base mista (um dígito por feature, com a idade agrupada em
+faixas). Na calculadora a consulta vira um cálculo de índice e uma leitura
+em memória; perfis fora da tabela continuam indo para o modelo.
+
+Cada geração grava os arrays em uma subpasta nova e só no fim troca o
+manifest.json (escrita atômica), que aponta para ela; as subpastas antigas
+são apagadas depois. Um worker lendo a tabela nunca vê arrays de uma
+geração com o manifesto de outra.
+
+Uso:
+    python tabela_predicoes.py
+    python tabela_predicoes.py --max-chaves 5000000 --largura-idade 3
+"""
+
+import argparse
+import glob
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from dados_cache import CSV_PADRAO, escrever_atomico, hash_arquivo, ler_json, salvar_json
+from modelo_compacto import ARQUIVO_MANIFESTO, ARRAYS, PASTA_MODELO
+from predicao import ARQUIVO_MODELO, QUANTIS_PADRAO, carregar_modelo_padrao, codificar_lote, incerteza_da_matriz
+
+PASTA_TABELA = 'tabela_predicoes'
+VERSAO_TABELA = 2
+MAX_CHAVES_PADRAO = 2_000_000
+TAMANHO_LOTE_PADRAO = 50_000
+IDADE_MIN, IDADE_MAX = 18, 65  # limites do slider da calculadora
+LARGURA_IDADE_PADRAO = 5
+COLUNAS = ('salario_predito', 'std_predicao', 'limite_inferior', 'limite_superior')
+
+
+def assinatura_modelo(pasta_modelo=PASTA_MODELO, arquivo_modelo=ARQUIVO_MODELO):
+    """Hash do modelo que a calculadora carrega (compacto se existir, senão o pickle)
+
+    No formato compacto entram o manifest.json e todos os arrays .npy.
+    """
+    manifesto = os.path.join(pasta_modelo, ARQUIVO_MANIFESTO)
+    if not os.path.exists(manifesto):
+        return hash_arquivo(arquivo_modelo)
+    arquivos = [manifesto] + [os.path.join(pasta_modelo, f'{nome}.npy') for nome in ARRAYS]
+    return hashlib.sha256(''.join(hash_arquivo(a) for a in arquivos).encode()).hexdigest()
+
+
+def _remover_geracoes_antigas(pasta, atual):
+    """Apaga as subpastas de gerações anteriores (e os .npy soltos do formato 1)"""
+    for caminho in glob.glob(os.path.join(glob.escape(pasta), 'geracao-*')):
+        if os.path.basename(caminho) != atual:
+            shutil.rmtree(caminho, ignore_errors=True)  # ainda aberta (Windows): fica para a próxima
+    for coluna in COLUNAS:
+        try:
+            os.remove(os.path.join(pasta, f'{coluna}.npy'))
+        except OSError:
+            pass
+
+
+def frequencias_categorias(modelo_completo, csv_path=CSV_PADRAO):
+    """Quantas vezes cada classe de cada encoder aparece nos dados de treino"""
+    from modelo_salarios import preprocessar_dados
+
+    X = codificar_lote(preprocessar_dados(pd.read_csv(csv_path)), modelo_completo)
+    return {
+        coluna: np.bincount(X[coluna].to_numpy(dtype=np.int64), minlength=len(encoder.classes_))
+        for coluna, encoder in modelo_completo['label_encoders'].items()
+    }
+
+
+def escolher_valores(frequencias, n_idades, max_chaves):
+    """Valores de cada feature que entram na tabela, do mais para o menos frequente
+
+    Enquanto o produto das cardinalidades passa de max_chaves, descarta o
+    valor de menor participação (entre todas as features) que ainda não é
+    o último da sua feature.
+    """
+    escolhidos = {c: list(np.argsort(-f, kind='stable')) for c, f in frequencias.items()}
+    totais = {c: f.sum() or 1 for c, f in frequencias.items()}
+
+    def tamanho():
+        return n_idades * int(np.prod([len(v) for v in escolhidos.values()], dtype=np.float64))
+
+    while tamanho() > max_chaves:
+        candidatos = [(frequencias[c][v[-1]] / totais[c], c) for c, v in escolhidos.items() if len(v) > 1]
+        if not candidatos:
+            break
+        _, coluna = min(candidatos)
+        escolhidos[coluna].pop()
+    return escolhidos
+
+
+def gerar_tabela(modelo_completo, pasta=PASTA_TABELA, csv_path=CSV_PADRAO, max_chaves=MAX_CHAVES_PADRAO,
+                 largura_idade=LARGURA_IDADE_PADRAO, tamanho_lote=TAMANHO_LOTE_PADRAO,
+                 assinatura=None, verbose=True):
+    """Calcula as predições de todas as chaves e grava arrays .npy (subpasta nova) + manifest.json"""
+    features = modelo_completo['features']
+    encoders = modelo_completo['label_encoders']
+    bordas = list(range(IDADE_MIN, IDADE_MAX + 1, largura_idade))
+    idades = [min(b + largura_idade // 2, IDADE_MAX) for b in bordas]  # idade representante de cada faixa
+
+    escolhidos = escolher_valores(frequencias_categorias(modelo_completo, csv_path), len(idades), max_chaves)
+    # Dígitos da chave: na ordem das features do modelo ('idade' usa a faixa)
+    dimensoes = [np.asarray(escolhidos[f]) if f in encoders else np.asarray(idades, dtype=np.float32)
+                 for f in features]
+    forma = tuple(len(d) for d in dimensoes)
+    total = int(np.prod(forma, dtype=np.int64))
+    if verbose:
+        print(f"Tabela com {total:,} chaves ({' × '.join(map(str, forma))})")
+
+    os.makedirs(pasta, exist_ok=True)
+    geracao = tempfile.mkdtemp(dir=pasta, prefix='geracao-')
+    os.chmod(geracao, 0o755)  # mkdtemp cria só com permissão do dono
+    inicio = time.perf_counter()
+    try:
+        saidas = {
+            c: np.lib.format.open_memmap(os.path.join(geracao, f'{c}.npy'), mode='w+', dtype=np.float32, shape=(total,))
+            for c in COLUNAS
+        }
+        modelo = modelo_completo['modelo']
+        for ini in range(0, total, tamanho_lote):
+            chaves = np.arange(ini, min(ini + tamanho_lote, total))
+            digitos = np.unravel_index(chaves, forma)
+            X = np.column_stack([d[k] for d, k in zip(dimensoes, digitos)]).astype(np.float32)
+            predito, std, inferior, superior = incerteza_da_matriz(modelo, X, QUANTIS_PADRAO)
+            for coluna, valores in zip(COLUNAS, (predito, std, inferior, superior)):
+                saidas[coluna][chaves] = valores
+            if verbose and (ini // tamanho_lote) % 20 == 0:
+                print(f"  {chaves[-1] + 1:,}/{total:,} chaves ({time.perf_counter() - inicio:.1f}s)")
+        for array in saidas.values():
+            array.flush()
+        saidas.clear()
+    except BaseException:
+        shutil.rmtree(geracao, ignore_errors=True)
+        raise
+
+    manifesto = {
+        'versao': VERSAO_TABELA,
+        'assinatura_modelo': assinatura or assinatura_modelo(),
+        'arrays': os.path.basename(geracao),
+        'features': features,
+        'valores': {f: [str(encoders[f].classes_[i]) for i in escolhidos[f]] for f in features if f in encoders},
+        'idade': {'minima': IDADE_MIN, 'maxima': IDADE_MAX, 'largura': largura_idade},
+        'forma': list(forma),
+        'chaves': total,
+        'segundos': time.perf_counter() - inicio,
+    }
+    # O manifesto novo passa a apontar para a geração nova de uma vez só
+    escrever_atomico(os.path.join(pasta, 'manifest.json'), lambda p: salvar_json(p, manifesto))
+    _remover_geracoes_antigas(pasta, manifesto['arrays'])
+    return manifesto
+
+
+class TabelaPredicoes:
+    """Consulta O(1) da tabela gerada por gerar_tabela (arrays em memory-map)"""
+
+    def __init__(self, pasta=PASTA_TABELA, manifesto=None):
+        self.manifesto = manifesto or ler_json(os.path.join(pasta, 'manifest.json'))
+        self.features = self.manifesto['features']
+        self.idade = self.manifesto['idade']
+        self.posicoes = {f: {v: i for i, v in enumerate(vals)} for f, vals in self.manifesto['valores'].items()}
+        forma = self.manifesto['forma']
+        # Peso de cada dígito na chave de base mista (o último varia mais rápido)
+        self.pesos = np.cumprod([1] + forma[:0:-1])[::-1].tolist()
+        geracao = os.path.join(pasta, self.manifesto['arrays'])
+        self.arrays = {c: np.load(os.path.join(geracao, f'{c}.npy'), mmap_mode='r') for c in COLUNAS}
+        self.acertos = 0
+        self.falhas = 0
+
+    def faixa_idade(self, idade):
+        """(início, fim) da faixa de idade usada na tabela, ou None se estiver fora"""
+        if not self.idade['minima'] <= idade <= self.idade['maxima']:
+            return None
+        inicio = self.idade['minima'] + (idade - self.idade['minima']) // self.idade['largura'] * self.idade['largura']
+        return inicio, min(inicio + self.idade['largura'] - 1, self.idade['maxima'])
+
+    def chave(self, dados):
+        """Posição do perfil na tabela, ou None se algum valor não estiver nela"""
+        chave = 0
+        for feature, peso in zip(self.features, self.pesos):
+            if feature == 'idade':
+                faixa = self.faixa_idade(int(dados['idade']))
+                if faixa is None:
+                    return None
+                digito = (faixa[0] - self.idade['minima']) // self.idade['largura']
+            else:
+                digito = self.posicoes[feature].get(str(dados[feature]))
+                if digito is None:
+                    return None
+            chave += digito * peso
+        return chave
+
+    def consultar(self, dados):
+        """(salario_predito, std_predicao, intervalo_confianca, (inferior, superior)) ou None"""
+        chave = self.chave(dados)
+        if chave is None:
+            self.falhas += 1
+            return None
+        self.acertos += 1
+        predito, std, inferior, superior = (float(self.arrays[c][chave]) for c in COLUNAS)
+        return predito, std, 1.96 * std, (inferior, superior)
+
+    def estatisticas(self):
+        total = self.acertos + self.falhas
+        return {
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'taxa_acerto': self.acertos / total if total else 0.0,
+        }
+
+
+def carregar_tabela_predicoes(pasta=PASTA_TABELA, assinatura=None):
+    """Tabela pronta para consulta, ou None se não existir ou for de outro modelo"""
+    manifesto = ler_json(os.path.join(pasta, 'manifest.json'))
+    if not manifesto or manifesto.get('versao') != VERSAO_TABELA:
+        return None
+    if manifesto['assinatura_modelo'] != (assinatura or assinatura_modelo()):
+        return None
+    try:
+        return TabelaPredicoes(pasta, manifesto)
+    except FileNotFoundError:  # outra geração terminou e apagou esta entre as duas leituras
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pré-calcula as predições da calculadora para os perfis mais frequentes")
+    parser.add_argument('--csv', default=CSV_PADRAO, help="Dataset usado para ordenar as categorias por frequência")
+    parser.add_argument('--saida', default=PASTA_TABELA)
+    parser.add_argument('--max-chaves', type=int, default=MAX_CHAVES_PADRAO)
+    parser.add_argument('--largura-idade', type=int, default=LARGURA_IDADE_PADRAO, help="Anos por faixa de idade")
+    parser.add_argument('--lote', type=int, default=TAMANHO_LOTE_PADRAO, help="Chaves avaliadas por vez")
+    args = parser.parse_args()
+
+    manifesto = gerar_tabela(carregar_modelo_padrao(), args.saida, args.csv, args.max_chaves,
+                             args.largura_idade, args.lote)
+    print(f"✅ {manifesto['chaves']:,} predições gravadas em {args.saida}/ em {manifesto['segundos']:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
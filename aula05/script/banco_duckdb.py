@@ -0,0 +1,144 @@
+"""
+Banco DuckDB persistente do chat
+
+Materializa a tabela do chat (dataset + salario_numerico) uma única vez em
+um arquivo .duckdb em data/cache/, ao lado do cache Arrow/Parquet de
+dados_cache.py. Cada versão dos dados tem o seu arquivo
+(<nome>.<versão>.duckdb): o DuckDB reaproveita a instância já aberta para o
+mesmo caminho, então trocar o conteúdo no mesmo arquivo deixaria o processo
+lendo dados velhos. Conexões somente-leitura já abertas em outros workers
+continuam válidas até serem renovadas.
+
+Quando o CSV só recebeu linhas novas (novas partes no cache Parquet), o
+banco anterior é copiado e só as partes novas são inseridas, sem refazer a
+tabela inteira.
+"""
+
+import glob
+import json
+import os
+import shutil
+
+import duckdb
+
+from dados_cache import CSV_PADRAO, PASTA_CACHE, construir_cache, escrever_atomico, ler_json, salvar_json
+from faixas_salariais import sql_tabela_faixas
+
+# Incrementar sempre que mudar o SQL de criação da tabela: força a reconstrução
+VERSAO_BANCO = 2
+
+# Conexões de leitura do chat: limites valem para todas as consultas do processo
+# e o SQL do LLM não lê arquivos nem URLs fora do banco
+CONFIG_LEITURA = {
+    'threads': 2,
+    'memory_limit': '1GB',
+    'enable_external_access': False,
+}
+
+
+def _caminhos_banco(csv_path, pasta_cache):
+    base = os.path.join(pasta_cache, os.path.splitext(os.path.basename(csv_path))[0])
+    return {'base': base, 'manifesto': base + '.duckdb.json'}
+
+
+def _arquivo_banco(base, versao):
+    return f'{base}.{versao[:16]}.duckdb'
+
+
+def _select_com_salario(parquets):
+    """SELECT das partes Parquet com o salario_numerico da tabela de faixas"""
+    lista = ', '.join(f"'{p}'" for p in parquets)
+    # Valores das faixas vêm de faixas_salariais.py (mesma tabela do dashboard e do modelo)
+    return f"""
+        SELECT d.*,
+            COALESCE(f.salario_numerico, 0.0) AS salario_numerico
+        FROM read_parquet([{lista}]) AS d
+        LEFT JOIN faixas_salariais AS f USING (faixa_salarial)"""
+
+
+def _resumo(con, tabela):
+    total, max_salario = con.execute(f"SELECT COUNT(*), MAX(salario_numerico) FROM {tabela}").fetchone()
+    con.execute("CHECKPOINT")
+    return total, max_salario
+
+
+def criar_banco(destino, parquets, tabela):
+    """Cria o arquivo .duckdb com a tabela de faixas e a tabela do chat"""
+    con = duckdb.connect(destino)
+    try:
+        con.execute(sql_tabela_faixas('faixas_salariais'))
+        con.execute(f"CREATE OR REPLACE TABLE {tabela} AS {_select_com_salario(parquets)}")
+        return _resumo(con, tabela)
+    finally:
+        con.close()
+
+
+def anexar_ao_banco(destino, parquets, tabela):
+    """Insere as partes novas na tabela de um .duckdb já existente"""
+    con = duckdb.connect(destino)
+    try:
+        con.execute(f"INSERT INTO {tabela} BY NAME {_select_com_salario(parquets)}")
+        return _resumo(con, tabela)
+    finally:
+        con.close()
+
+
+def _remover_versoes_antigas(base, atual):
+    """Apaga os .duckdb (e o esquema salvo ao lado) de versões anteriores"""
+    # base + '.duckdb': nome do arquivo único usado antes das versões
+    for banco in glob.glob(glob.escape(base) + '.*.duckdb') + [base + '.duckdb']:
+        if banco == atual:
+            continue
+        for caminho in (banco, os.path.splitext(banco)[0] + '.esquema.json'):
+            try:
+                os.remove(caminho)
+            except OSError:  # ainda aberto (Windows) ou já removido por outro worker
+                pass
+
+
+def materializar_banco(csv_path=CSV_PADRAO, tabela='dados', pasta_cache=PASTA_CACHE, forcar=False):
+    """(caminho do .duckdb, versão dos dados); só refaz o que mudou no CSV ou no esquema"""
+    caminhos = _caminhos_banco(csv_path, pasta_cache)
+    cache = construir_cache(csv_path, pasta_cache)
+    versao, partes = cache['versao_dados'], cache['partes']
+    destino = _arquivo_banco(caminhos['base'], versao)
+    manifesto = ler_json(caminhos['manifesto'])
+    atual = {'versao': VERSAO_BANCO, 'tabela': tabela}
+    valido = (not forcar and manifesto and all(manifesto.get(k) == v for k, v in atual.items())
+              and os.path.exists(manifesto.get('banco', '')))
+    if valido and manifesto['versao_dados'] == versao:
+        return manifesto['banco'], versao
+
+    resumo = {}
+    ja_inseridas = manifesto['partes'] if valido else []
+    novas = partes[len(ja_inseridas):]
+    if ja_inseridas and [p['id'] for p in partes[:len(ja_inseridas)]] == ja_inseridas:
+        # Só chegaram linhas novas: copia o banco atual e insere apenas o lote
+        def escrever_banco(tmp):
+            shutil.copyfile(manifesto['banco'], tmp)
+            resumo['linhas'], resumo['max_salario'] = anexar_ao_banco(tmp, [p['parquet'] for p in novas], tabela)
+        acao = f"+{sum(p['linhas'] for p in novas)} linhas anexadas"
+    else:
+        def escrever_banco(tmp):
+            os.remove(tmp)  # o DuckDB precisa criar o arquivo do zero
+            resumo['linhas'], resumo['max_salario'] = criar_banco(tmp, [p['parquet'] for p in partes], tabela)
+        acao = "materializada"
+
+    escrever_atomico(destino, escrever_banco)
+    escrever_atomico(caminhos['manifesto'], lambda p: salvar_json(p, {
+        **atual, 'versao_dados': versao, 'banco': destino, 'partes': [p['id'] for p in partes], **resumo,
+    }))
+    _remover_versoes_antigas(caminhos['base'], destino)
+    print(f"✅ Tabela '{tabela}' {acao} em {destino} "
+          f"({resumo['linhas']} linhas, max_salario=R$ {resumo['max_salario']}).")
+    return destino, versao
+
+
+def conectar(caminho, config=None):
+    """Conexão somente-leitura ao arquivo .duckdb (CONFIG_LEITURA por padrão)"""
+    return duckdb.connect(caminho, read_only=True, config=CONFIG_LEITURA if config is None else config)
+
+
+if __name__ == '__main__':
+    caminho, versao = materializar_banco(forcar=True)
+    print(json.dumps({'banco': caminho, 'versao_dados': versao}, indent=2))
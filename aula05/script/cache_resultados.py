@@ -0,0 +1,179 @@
+"""
+Cache de resultados das consultas do chat
+
+Guarda o resultado (tabela Arrow) e a interpretação do LLM de cada SQL já
+executado. A chave é a árvore sintática do SQL gerada pelo próprio parser do
+DuckDB (json_serialize_sql), normalizada: sem posições no texto,
+identificadores em minúsculas e aliases de tabela trocados por nomes
+canônicos. A lista do SELECT fica com a grafia original, porque ela dá os
+rótulos das colunas do resultado, que a tabela e a interpretação guardada
+mostram. Assim, consultas que só diferem em espaços, maiúsculas fora do
+SELECT ou alias de tabela caem na mesma entrada; com outros aliases de
+coluna, não. A versão da tabela (hash do CSV) entra na chave, então dados novos
+invalidam tudo. Cache LRU em memória com limite de itens e de bytes,
+compartilhado pelo processo (via st.cache_resource).
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+import duckdb
+import pyarrow as pa
+
+
+def _normalizar(no, manter_grafia=False):
+    """Cópia da árvore sem 'query_location' e com identificadores em minúsculas
+
+    Dentro da lista do SELECT a grafia fica como veio: aliases e nomes
+    escritos ali viram os rótulos das colunas do resultado.
+    """
+    if isinstance(no, dict):
+        novo = {}
+        for chave, valor in no.items():
+            if chave == 'query_location':
+                continue
+            if not manter_grafia and chave in ('column_names', 'table_name', 'alias') and valor:
+                valor = [v.lower() for v in valor] if isinstance(valor, list) else valor.lower()
+            novo[chave] = _normalizar(valor, manter_grafia or chave == 'select_list')
+        return novo
+    if isinstance(no, list):
+        return [_normalizar(v, manter_grafia) for v in no]
+    return no
+
+
+def _renomear(no, tabelas):
+    """Troca aliases de tabela (e as referências a eles) por nomes canônicos
+
+    Um alias mapeado para None some junto com o prefixo das colunas
+    (consulta com uma única tabela: 'd.cargo_atual' = 'cargo_atual').
+    """
+    if isinstance(no, dict):
+        if no.get('class') == 'COLUMN_REF':
+            nomes = list(no['column_names'])
+            if len(nomes) == 2 and nomes[0] in tabelas:
+                nomes = [nomes[1]] if tabelas[nomes[0]] is None else [tabelas[nomes[0]], nomes[1]]
+            no = {**no, 'column_names': nomes}
+        if no.get('type') == 'BASE_TABLE' and no.get('alias') in tabelas:
+            no = {**no, 'alias': tabelas[no['alias']] or ''}
+        return {k: v if k == 'column_names' else _renomear(v, tabelas) for k, v in no.items()}
+    if isinstance(no, list):
+        return [_renomear(v, tabelas) for v in no]
+    return no
+
+
+def _tabelas_base(no, encontradas):
+    """Lista (nome, alias) de todas as tabelas lidas pela consulta"""
+    if isinstance(no, dict):
+        if no.get('type') == 'BASE_TABLE':
+            encontradas.append((no['table_name'], no.get('alias', '')))
+        for valor in no.values():
+            _tabelas_base(valor, encontradas)
+    elif isinstance(no, list):
+        for valor in no:
+            _tabelas_base(valor, encontradas)
+    return encontradas
+
+
+def _aliases_tabela(arvore):
+    """Alias (ou nome) de tabela → nome canônico; None quando só há uma tabela"""
+    tabelas = _tabelas_base(arvore, [])
+    if len(tabelas) == 1:
+        nome, alias = tabelas[0]
+        return {nome: None, **({alias: None} if alias else {})}
+    aliases = {}
+    for _, alias in tabelas:
+        if alias:
+            aliases.setdefault(alias, f't{len(aliases)}')
+    return aliases
+
+
+class CanonizadorSQL:
+    """Árvore normalizada do SQL pelo parser do DuckDB (não precisa das tabelas)"""
+
+    def __init__(self):
+        self._con = duckdb.connect()
+        self._lock = threading.Lock()
+
+    def arvore(self, sql):
+        """Árvore do único SELECT do texto, ou None (erro de sintaxe, vários comandos, não-SELECT)"""
+        with self._lock:
+            texto = self._con.execute("SELECT json_serialize_sql(?)", [sql]).fetchone()[0]
+        dados = json.loads(texto)
+        if dados.get('error') or len(dados.get('statements', [])) != 1:
+            return None
+        return dados['statements'][0]['node']
+
+    def canonizar(self, sql):
+        """Chave do SQL, ou None se não der para usar cache"""
+        arvore = self.arvore(sql)
+        if arvore is None:
+            return None
+        arvore = _normalizar(arvore)
+        arvore = _renomear(arvore, _aliases_tabela(arvore))
+        return hashlib.sha256(json.dumps(arvore, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class CacheResultados:
+    """LRU de (tabela Arrow, interpretação) por SQL canônico + versão da tabela (thread-safe)"""
+
+    def __init__(self, max_itens=256, max_bytes=256 * 1024 * 1024):
+        self.max_itens = max_itens
+        self.max_bytes = max_bytes
+        self.canonizador = CanonizadorSQL()
+        self._itens = OrderedDict()  # chave → [tabela, interpretação]
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    def _chave(self, sql, versao):
+        chave = self.canonizador.canonizar(sql)
+        return (versao, chave) if chave else None
+
+    def obter(self, sql, versao):
+        """(DataFrame, interpretação ou None) da consulta, ou None"""
+        chave = self._chave(sql, versao)
+        with self._lock:
+            item = self._itens.get(chave) if chave else None
+            if item is None:
+                self.falhas += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            tabela, interpretacao = item
+        return tabela.to_pandas(), interpretacao
+
+    def guardar(self, sql, versao, df):
+        chave = self._chave(sql, versao)
+        if chave is None:
+            return
+        tabela = pa.Table.from_pandas(df, preserve_index=False)
+        if tabela.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if chave in self._itens:
+                self._bytes -= self._itens.pop(chave)[0].nbytes
+            self._itens[chave] = [tabela, None]
+            self._bytes += tabela.nbytes
+            while len(self._itens) > self.max_itens or self._bytes > self.max_bytes:
+                _, (antiga, _) = self._itens.popitem(last=False)
+                self._bytes -= antiga.nbytes
+
+    def guardar_interpretacao(self, sql, versao, texto):
+        chave = self._chave(sql, versao)
+        with self._lock:
+            if chave in self._itens:
+                self._itens[chave][1] = texto
+
+    def estatisticas(self):
+        with self._lock:
+            total = self.acertos + self.falhas
+            return {
+                'itens': len(self._itens),
+                'bytes': self._bytes,
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'taxa_acerto': self.acertos / total if total else 0.0,
+            }
@@ -0,0 +1,191 @@
+"""
+Cache semântico das traduções pergunta → SQL do chat
+
+Antes de chamar o LLM, a pergunta é normalizada (minúsculas, sem acentos,
+pontuação e espaços extras) e procurada no cache. Se não houver entrada
+idêntica, um segundo nível opcional aceita uma pergunta já vista que tenha
+exatamente as mesmas palavras de conteúdo (tudo menos artigos, preposições
+e verbos de pedido como "qual", "mostre"; plural simples ignorado) e
+similaridade TF-IDF dessas palavras, em ordem, acima do limiar (n-gramas
+de caracteres, tudo local, sem rede). Assim "qual o salário médio em SP?"
+reaproveita "salário médio em SP", mas "mulheres em SP", "menos de 10
+anos" ou "SP para PcD" nunca caem no SQL de outra pergunta. O cache tem limite de itens (LRU) e
+tempo de vida (TTL), é salvo em JSON em data/cache/ e conta acertos por
+nível. A versão do prompt de sistema faz parte do arquivo: mudou o prompt,
+o cache começa vazio.
+"""
+
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+ARQUIVO_CACHE = os.path.join('data', 'cache', 'cache_sql.json')
+LIMIAR_SIMILARIDADE = 0.9
+# Palavras que não mudam o sentido da pergunta (já normalizadas: sem acento)
+PALAVRAS_VAZIAS = {
+    'o', 'a', 'os', 'as', 'um', 'uma', 'uns', 'umas', 'de', 'da', 'do', 'das', 'dos',
+    'em', 'no', 'na', 'nos', 'nas', 'ao', 'aos', 'pelo', 'pela', 'pelos', 'pelas',
+    'e', 'que', 'qual', 'quais', 'me', 'mostre', 'mostrar', 'liste', 'listar', 'sao',
+}
+
+
+def normalizar_pergunta(texto):
+    """Chave do cache: minúsculas, sem acentos, sem pontuação e com espaços simples"""
+    texto = unicodedata.normalize('NFKD', texto.lower())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    texto = re.sub(r'[^\w\s]', ' ', texto)
+    return ' '.join(texto.split())
+
+
+def _palavras_conteudo(chave):
+    """Palavras de conteúdo da chave, em ordem (sem palavras vazias, plural simples removido)"""
+    return [t[:-1] if len(t) > 3 and t.endswith('s') else t for t in chave.split() if t not in PALAVRAS_VAZIAS]
+
+
+def termos_conteudo(chave):
+    """Conjunto das palavras de conteúdo: precisa ser igual no acerto por similaridade"""
+    return frozenset(_palavras_conteudo(chave))
+
+
+class CacheSemanticoSQL:
+    """LRU + TTL de pergunta normalizada → SQL, com nível opcional de similaridade (thread-safe)"""
+
+    def __init__(self, caminho=ARQUIVO_CACHE, versao='', max_itens=1000, ttl=7 * 24 * 3600,
+                 limiar_similaridade=LIMIAR_SIMILARIDADE):
+        self.caminho = caminho
+        self.versao = versao
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self.limiar_similaridade = limiar_similaridade
+        self._itens = OrderedDict()  # chave normalizada → (instante, sql)
+        self._lock = threading.Lock()
+        self._versao_itens = 0  # muda quando entra ou sai uma chave (não quando só muda a ordem LRU)
+        self._grupos = None     # (versão, {termos de conteúdo: [chaves]})
+        self.acertos_exatos = 0
+        self.acertos_similares = 0
+        self.falhas = 0
+        self._carregar()
+
+    def _carregar(self):
+        try:
+            with open(self.caminho, encoding='utf-8') as f:
+                dados = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        if dados.get('versao') != self.versao:
+            return
+        agora = time.time()
+        for chave, instante, sql in dados.get('itens', []):
+            if self.ttl is None or agora - instante <= self.ttl:
+                self._itens[chave] = (instante, sql)
+
+    def salvar(self):
+        """Grava o cache em JSON (arquivo temporário + rename)"""
+        with self._lock:
+            dados = {'versao': self.versao, 'itens': [[k, t, s] for k, (t, s) in self._itens.items()]}
+        pasta = os.path.dirname(self.caminho) or '.'
+        os.makedirs(pasta, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=pasta, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(dados, f, ensure_ascii=False)
+        os.replace(tmp, self.caminho)
+
+    def _expirado(self, instante):
+        return self.ttl is not None and time.time() - instante > self.ttl
+
+    def _mais_similar(self, chave):
+        """Chave já vista com os mesmos termos de conteúdo e similaridade acima do limiar, ou None"""
+        if self.limiar_similaridade is None or not self._itens:
+            return None
+        if self._grupos is None or self._grupos[0] != self._versao_itens:
+            grupos = {}
+            for k in self._itens:
+                grupos.setdefault(termos_conteudo(k), []).append(k)
+            self._grupos = (self._versao_itens, grupos)
+        candidatas = self._grupos[1].get(termos_conteudo(chave))
+        if not candidatas:
+            return None
+        try:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+        except ImportError:
+            return None
+        # Compara só as palavras de conteúdo, em ordem ("homens x mulheres" ≠ "mulheres x homens"),
+        # com o vetorizador ajustado nas candidatas e na pergunta: nenhum n-grama dela fica de fora
+        textos = [' '.join(_palavras_conteudo(k)) for k in candidatas + [chave]]
+        matriz = TfidfVectorizer(analyzer='char', ngram_range=(3, 5)).fit_transform(textos)
+        similaridades = (matriz[:-1] @ matriz[-1].T).toarray().ravel()
+        melhor = int(similaridades.argmax())
+        if similaridades[melhor] < self.limiar_similaridade:
+            return None
+        return candidatas[melhor]
+
+    def obter(self, pergunta):
+        """(sql, 'exato' | 'similar') ou (None, None)"""
+        chave = normalizar_pergunta(pergunta)
+        with self._lock:
+            item = self._itens.get(chave)
+            if item is not None and self._expirado(item[0]):
+                del self._itens[chave]
+                self._versao_itens += 1
+                item = None
+            if item is not None:
+                self._itens.move_to_end(chave)
+                self.acertos_exatos += 1
+                return item[1], 'exato'
+            similar = self._mais_similar(chave)
+            if similar is not None and not self._expirado(self._itens[similar][0]):
+                self._itens.move_to_end(similar)
+                self.acertos_similares += 1
+                return self._itens[similar][1], 'similar'
+            self.falhas += 1
+            return None, None
+
+    def guardar(self, pergunta, sql):
+        with self._lock:
+            chave = normalizar_pergunta(pergunta)
+            self._itens.pop(chave, None)
+            self._itens[chave] = (time.time(), sql)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+            self._versao_itens += 1
+        self.salvar()
+
+    def remover(self, pergunta):
+        """Descarta a tradução da pergunta (ex.: o SQL guardado falhou ao executar)"""
+        with self._lock:
+            removido = self._itens.pop(normalizar_pergunta(pergunta), None)
+            self._versao_itens += 1
+        if removido is not None:
+            self.salvar()
+
+    def obter_ou_gerar(self, pergunta, gerar):
+        """(sql, origem): do cache quando possível; senão gerar() e guarda. origem None = gerado agora"""
+        sql, origem = self.obter(pergunta)
+        if sql is None:
+            sql = gerar()
+            self.guardar(pergunta, sql)
+        return sql, origem
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self._versao_itens += 1
+        self.salvar()
+
+    def estatisticas(self):
+        with self._lock:
+            acertos = self.acertos_exatos + self.acertos_similares
+            total = acertos + self.falhas
+            return {
+                'itens': len(self._itens),
+                'acertos': acertos,
+                'acertos_exatos': self.acertos_exatos,
+                'acertos_similares': self.acertos_similares,
+                'falhas': self.falhas,
+                'taxa_acerto': acertos / total if total else 0.0,
+            }
@@ -6,105 +6,101 @@ Uso:
     streamlit run challenge_llm.py
 """
 
-import os, duckdb, pandas as pd, ast
+import os, asyncio, hashlib, time, pandas as pd
+from contextlib import nullcontext
+import duckdb
+import pyarrow as pa
 from dotenv import load_dotenv
-from langchain_community.utilities import SQLDatabase
-from langchain_openai import ChatOpenAI
 import streamlit as st
+from banco_duckdb import conectar, materializar_banco
+from cache_resultados import CacheResultados
+from cache_sql import CacheSemanticoSQL
+from esquema_prompt import EsquemaTabela, carregar_esquema
+from guarda_sql import TIMEOUT_CONSULTA, LimiteTempo, SQLRecusado, validar_sql
+from llm_async import TIMEOUT_INTERPRETACAO, TIMEOUT_SQL, LimitadorLLM, invocar, transmitir
+from metricas import Metricas
 load_dotenv()
 
 # ────────────────────────────────────────────────────────────────────────────────
-# 1. CRIA TABELA EM DUCKDB (com coluna salario_rank pré‑calculada)
+# 1. BANCO DUCKDB (com coluna salario_numerico pré‑calculada)
+#    A tabela é materializada uma vez em data/cache/*.duckdb (banco_duckdb.py)
+#    e só é refeita quando o CSV muda; aqui só abrimos conexões somente-leitura.
 # ────────────────────────────────────────────────────────────────────────────────
-def build_duckdb(csv_path: str, table: str, db_file: str = ":memory:") -> SQLDatabase:
-    create_table_sql = f"""
-    CREATE OR REPLACE TABLE {table} AS
-    SELECT *,
-        CASE
-            WHEN faixa_salarial = 'Acima de R$ 40.001/mês'              THEN 45000.0
-            WHEN faixa_salarial = 'de R$ 30.001/mês a R$ 40.000/mês'    THEN 35000.0
-            WHEN faixa_salarial = 'de R$ 25.001/mês a R$ 30.000/mês'    THEN 27500.0
-            WHEN faixa_salarial = 'de R$ 20.001/mês a R$ 25.000/mês'    THEN 22500.0
-            WHEN faixa_salarial = 'de R$ 16.001/mês a R$ 20.000/mês'    THEN 18000.0
-            WHEN faixa_salarial = 'de R$ 12.001/mês a R$ 16.000/mês'    THEN 14000.0
-            WHEN faixa_salarial = 'de R$ 8.001/mês a R$ 12.000/mês'     THEN 10000.0
-            WHEN faixa_salarial = 'de R$ 6.001/mês a R$ 8.000/mês'      THEN  7000.0
-            WHEN faixa_salarial = 'de R$ 4.001/mês a R$ 6.000/mês'      THEN  5000.0
-            WHEN faixa_salarial = 'de R$ 3.001/mês a R$ 4.000/mês'      THEN  3500.0
-            WHEN faixa_salarial = 'de R$ 2.001/mês a R$ 3.000/mês'      THEN  2500.0
-            WHEN faixa_salarial = 'de R$ 1.001/mês a R$ 2.000/mês'      THEN  1500.0
-            WHEN faixa_salarial = 'Menos de R$ 1.000/mês'               THEN   500.0
-            ELSE 0.0
-        END AS salario_numerico
-    FROM read_csv_auto('{csv_path}');
-    """
+def connect_duckdb(db_file: str) -> duckdb.DuckDBPyConnection:
+    # Conexão read-only direta (sem o wrapper do LangChain): cada consulta abre
+    # um cursor próprio, então várias sessões leem o mesmo arquivo ao mesmo tempo.
+    return conectar(db_file)
 
-    db_uri = f"duckdb:///{db_file}" if db_file != ":memory:" else "duckdb:///:memory:"
-    db = SQLDatabase.from_uri(db_uri)
-    db.run(create_table_sql)
 
-    # Tenta diferentes formas de obter os dados da tabela
-    try:
-        query_result = db.run(f"SELECT COUNT(*), MAX(salario_numerico) FROM {table}")
-        print(f"Query result raw: {repr(query_result)}")
-        
-        # Tenta parsear como string literal
-        if isinstance(query_result, str):
-            parsed = ast.literal_eval(query_result)
-            total, max_salario = parsed[0]
-        else:
-            # Se já é uma lista/tupla
-            total, max_salario = query_result[0] if isinstance(query_result, list) else query_result
-            
-    except Exception as e:
-        print(f"Erro ao parsear resultado: {e}")
-        # Fallback: apenas conta as linhas
-        total = len(pd.read_csv(csv_path))
-        max_salario = 45000.0
-        
-    print(f"✅ Tabela '{table}' criada ({total} linhas, max_salario=R$ {max_salario}).")
-    return db
+def build_duckdb(csv_path: str, table: str) -> duckdb.DuckDBPyConnection:
+    db_file, _ = materializar_banco(csv_path, table)
+    return connect_duckdb(db_file)
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_database(db_file: str, versao: str) -> duckdb.DuckDBPyConnection:
+    """Uma conexão por processo; cada versão dos dados tem o seu arquivo .duckdb"""
+    return connect_duckdb(db_file)
 
 # ────────────────────────────────────────────────────────────────────────────────
 # 2. CARREGA LLM OpenAI
+#    langchain_openai leva ~2s para importar: só entra na primeira pergunta,
+#    não na primeira renderização da página (cold start do container).
 # ────────────────────────────────────────────────────────────────────────────────
 def build_llm():
+    from langchain_openai import ChatOpenAI
+
     return ChatOpenAI(model="gpt-4o-mini", temperature=0)
 
+
+@st.cache_resource(show_spinner=False)
+def get_llm():
+    """Um cliente por processo, criado na primeira pergunta"""
+    return build_llm()
+
+
+@st.cache_resource(show_spinner=False)
+def get_llm_limiter() -> LimitadorLLM:
+    """Limite de chamadas simultâneas ao LLM, compartilhado por todas as sessões do processo"""
+    return LimitadorLLM()
+
+
+PORTA_METRICAS = 9105
+
+
+@st.cache_resource(show_spinner=False)
+def get_metrics() -> Metricas:
+    """Tempos por etapa e acertos dos caches (por processo), em /metrics no formato do Prometheus"""
+    metricas = Metricas('chat')
+    metricas.iniciar_servidor(PORTA_METRICAS)
+    return metricas
+
 # ────────────────────────────────────────────────────────────────────────────────
 # 3. PROMPT DE SISTEMA – garante que "mais bem pago" usa salario_numerico
+#    O esquema vem do próprio banco (esquema_prompt.py) e só detalha as colunas
+#    que têm a ver com a pergunta: prompt menor e valores sempre atualizados.
 # ────────────────────────────────────────────────────────────────────────────────
-def create_system_prompt() -> str:
-    return """
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_schema(db_file: str, table: str, versao: str) -> EsquemaTabela:
+    """Resumo da tabela (tipos, valores mais comuns), recalculado só quando os dados mudam"""
+    return carregar_esquema(db_file, table, versao)
+
+
+def create_system_prompt(schema: EsquemaTabela, user_question: str = "") -> str:
+    schema_text, _ = schema.contexto(user_question)
+    return f"""
 Você é UM TRADUTOR NL→SQL para DuckDB.
 Gere apenas o comando SQL (sem nada além dele).
 
 ### REGRAS CRÍTICAS
 1. Perguntas sobre "maior salário / mais bem paga / melhor remuneração / profissão que paga melhor"
    → SEMPRE calcule AVG(salario_numerico) e ordene DESC. Use valores em reais.
-2. Use sempre a tabela `dados`.
+2. Use sempre a tabela `{schema.tabela}`.
 3. Nunca devolva explicações, apenas o `SELECT … ;`.
-4. Use aspas simples para strings: 'SP', 'Masculino', etc.
-
-### ESQUEMA COMPLETO
-- faixa_etaria TEXT (ex: '17-21', '22-25', '26-30', etc.)
-- genero TEXT ('Masculino', 'Feminino', 'Prefiro não informar', 'Outro')
-- etnia TEXT ('Branca', 'Parda', 'Preta', etc.)
-- idade INTEGER
-- uf_residencia TEXT ('SP', 'MG', 'PR', 'RJ', 'RS', 'SC', 'DF', 'CE', 'PE', 'BA', etc.)
-- nivel_ensino TEXT ('Pós-graduação', 'Graduação/Bacharelado', 'Mestrado', 'Estudante de Graduação', 'Doutorado ou Phd', 'Não tenho graduação formal')
-- cargo_atual TEXT (valores principais):
-  * 'Analista de Dados/Data Analyst'
-  * 'Cientista de Dados/Data Scientist'  
-  * 'Engenheiro de Dados/Data Engineer/Data Architect'
-  * 'Analista de BI/BI Analyst'
-  * 'Analytics Engineer'
-  * 'Analista de Negócios/Business Analyst'
-  * 'Engenheiro de Machine Learning/ML Engineer/AI Engineer'
-  * 'Data Product Manager/ Product Manager (PM/APM/DPM/GPM/PO)'
-  * 'Arquiteto de Dados/Data Architect'
-- tempo_experiencia_dados TEXT ('de 1 a 2 anos', 'de 3 a 4 anos', 'de 5 a 6 anos', 'Mais de 10 anos', 'Menos de 1 ano', 'Não tenho experiência na área de dados')
-- salario_numerico REAL (valor em reais, ex: 10000.0 = R$ 10.000)
+4. Use aspas simples para strings, escritas exatamente como nos valores do esquema: 'SP', 'Masculino', etc.
+
+### ESQUEMA (colunas relevantes para a pergunta)
+{schema_text}
 
 ### EXEMPLOS
 Usuário: Qual a profissão mais bem paga?
@@ -136,25 +132,103 @@ GROUP BY genero
 ORDER BY salario_medio DESC;
 """
 
+
+def prompt_version(schema: EsquemaTabela) -> str:
+    """Versão do cache de SQL: muda com o texto fixo do prompt ou com o esquema"""
+    template = create_system_prompt(EsquemaTabela(schema.tabela, {}))
+    return hashlib.sha256((template + schema.assinatura).encode("utf-8")).hexdigest()[:16]
+
 # ────────────────────────────────────────────────────────────────────────────────
 # 4. GERA A QUERY SQL
 # ────────────────────────────────────────────────────────────────────────────────
-def generate_sql_query(llm, user_question: str) -> str:
+def sql_messages(schema: EsquemaTabela, user_question: str) -> list:
     # ChatOpenAI → lista de mensagens
-    raw = llm.invoke([
-        {"role": "system", "content": create_system_prompt()},
+    return [
+        {"role": "system", "content": create_system_prompt(schema, user_question)},
         {"role": "user",   "content": user_question}
-    ])
-    sql_text = raw.content
+    ]
 
+
+def clean_sql(sql_text: str) -> str:
     # limpa markdown ou lixo eventual
     sql_text = sql_text.replace("```sql", "").replace("```", "").strip()
     # pega apenas até o primeiro ';'
     p = sql_text.find(';')
     return sql_text[:p+1] if p != -1 else sql_text
 
+
+def generate_sql_query(llm, schema: EsquemaTabela, user_question: str) -> str:
+    return clean_sql(llm.invoke(sql_messages(schema, user_question)).content)
+
+
+async def agenerate_sql_query(llm, schema: EsquemaTabela, user_question: str, limiter: LimitadorLLM) -> str:
+    return clean_sql(await invocar(llm, sql_messages(schema, user_question), limiter, TIMEOUT_SQL))
+
+
+@st.cache_resource(show_spinner=False)
+def get_sql_cache(versao: str) -> CacheSemanticoSQL:
+    """Cache pergunta → SQL compartilhado pelo processo (e salvo em data/cache/)"""
+    return CacheSemanticoSQL(versao=versao)
+
+# ────────────────────────────────────────────────────────────────────────────────
+# 5. EXECUTA O SQL
+# ────────────────────────────────────────────────────────────────────────────────
+MAX_LINHAS = 10_000          # linhas mostradas na tela (a consulta recebe LIMIT MAX_LINHAS + 1)
+LINHAS_POR_LOTE = 2_048
+LINHAS_INTERPRETACAO = 50    # linhas enviadas ao LLM para interpretar
+
+
+def run_sql(db: duckdb.DuckDBPyConnection, sql: str, max_linhas: int = MAX_LINHAS,
+            timeout: float = TIMEOUT_CONSULTA, metrics: Metricas | None = None) -> tuple[pd.DataFrame, bool]:
+    """(DataFrame, truncado): resultado em Arrow, lido em lotes até max_linhas
+
+    Antes de executar, o SQL passa pela validação de guarda_sql.py (só
+    SELECT, LIMIT garantido, custo estimado pelo EXPLAIN); SQLRecusado ou
+    TimeoutError sobem para quem chamou. Os nomes das colunas são os do
+    próprio DuckDB (alias, subconsulta, CTE…). Com `metrics`, mede a
+    validação e a execução como etapas separadas.
+    """
+    etapa = metrics.etapa if metrics is not None else lambda nome: nullcontext()
+    cursor = db.cursor()
+    try:
+        with etapa('validar_sql'):
+            sql = validar_sql(cursor, sql, max_linhas + 1)
+        with etapa('executar_sql'), LimiteTempo(cursor, timeout):
+            leitor = cursor.execute(sql).to_arrow_reader(LINHAS_POR_LOTE)
+            lotes, linhas, truncado = [], 0, False
+            for lote in leitor:
+                if linhas + lote.num_rows > max_linhas:
+                    lotes.append(lote.slice(0, max_linhas - linhas))
+                    truncado = True
+                    break
+                lotes.append(lote)
+                linhas += lote.num_rows
+        return pa.Table.from_batches(lotes, schema=leitor.schema).to_pandas(), truncado
+    finally:
+        cursor.close()
+
+
+def interpretation_prompt(user_question: str, df: pd.DataFrame) -> str:
+    return f"""
+Explique para um leigo o resultado abaixo, respondendo à pergunta "{user_question}".
+
+Os valores de salário estão em reais (R$). Por exemplo: 10000.0 = R$ 10.000,00 por mês.
+
+Resultado{f" (primeiras {LINHAS_INTERPRETACAO} de {len(df)} linhas)" if len(df) > LINHAS_INTERPRETACAO else ""}:
+{df.head(LINHAS_INTERPRETACAO).to_string(index=False)}
+
+Interprete os valores salariais e explique de forma clara e em português, formatando os valores monetários adequadamente.
+"""
+
+
+@st.cache_resource(show_spinner=False)
+def get_result_cache() -> CacheResultados:
+    """Resultados + interpretações por SQL canônico, compartilhados pelo processo"""
+    return CacheResultados()
+
+
 # ────────────────────────────────────────────────────────────────────────────────
-# 5. APP STREAMLIT
+# 6. APP STREAMLIT
 # ────────────────────────────────────────────────────────────────────────────────
 def main():
     # Configurações padrão
@@ -203,73 +277,117 @@ def main():
         st.error(f"❌ Arquivo {csv_path} não encontrado.")
         st.stop()
 
-    with st.spinner("🔄 Carregando dados…"):
-        db = build_duckdb(csv_path, table_name)
+    metrics = get_metrics()
+    with st.spinner("🔄 Carregando dados…"), metrics.etapa('carregar_banco'):
+        # Barato quando nada mudou: só confere tamanho/mtime do CSV
+        db_file, versao = materializar_banco(csv_path, table_name)
+        db = get_database(db_file, versao)
+        schema = get_schema(db_file, table_name, versao)
+
+    metrics.registrar_cache('sql', get_sql_cache(prompt_version(schema)).estatisticas)
+    metrics.registrar_cache('resultados', get_result_cache().estatisticas)
 
-    llm = build_llm()
+    with st.sidebar.expander("⚙️ Caches do chat"):
+        stats = get_sql_cache(prompt_version(schema)).estatisticas()
+        st.caption(
+            f"{stats['itens']} perguntas · {stats['taxa_acerto']:.0%} de acerto "
+            f"({stats['acertos_exatos']} idênticas, {stats['acertos_similares']} similares, {stats['falhas']} falhas)"
+        )
+        stats = get_result_cache().estatisticas()
+        st.caption(f"Resultados: {stats['itens']} consultas · {stats['taxa_acerto']:.0%} de acerto")
+        stats = get_llm_limiter().estatisticas()
+        st.caption(
+            f"LLM: {stats['em_andamento']}/{stats['max_simultaneas']} chamadas em andamento, "
+            f"{stats['na_fila']} na fila, {stats['recusadas']} recusadas"
+        )
 
     if prompt := st.chat_input("Sua pergunta em PT‑BR…"):
-        with st.spinner("🎲 Gerando SQL…"):
-            sql = generate_sql_query(llm, prompt)
+        # Um loop asyncio por pergunta: se o usuário mandar outra pergunta, o
+        # Streamlit interrompe o script e as chamadas em andamento são canceladas
+        with metrics.etapa('carregar_llm'):
+            llm = get_llm()
+        asyncio.run(answer(prompt, llm, db, schema, versao))
+
+
+async def answer(prompt: str, llm, db: duckdb.DuckDBPyConnection, schema: EsquemaTabela, versao: str):
+    """Pergunta → SQL → tabela (assim que a consulta termina) → interpretação em streaming"""
+    sql_cache = get_sql_cache(prompt_version(schema))
+    result_cache = get_result_cache()
+    limiter = get_llm_limiter()
+    metrics = get_metrics()
 
-        with st.expander("🔍 Ver SQL gerado"):
-            st.code(sql, language="sql")
+    # Perguntas repetidas (ou quase iguais) não passam pelo LLM
+    with metrics.etapa('cache_sql'):
+        sql, origem = sql_cache.obter(prompt)
+    if sql is None:
+        with st.spinner("🎲 Gerando SQL…"), metrics.etapa('gerar_sql'):
+            try:
+                sql = await agenerate_sql_query(llm, schema, prompt, limiter)
+            except TimeoutError as e:
+                st.error(f"⏱️ Não foi possível gerar o SQL: {e or 'tempo esgotado'}")
+                return
+        sql_cache.guardar(prompt, sql)
 
+    with st.expander("🔍 Ver SQL gerado"):
+        if origem:
+            st.caption(f"⚡ SQL reaproveitado do cache (pergunta {'idêntica' if origem == 'exato' else 'similar'})")
+        else:
+            st.caption("Colunas detalhadas no prompt: " + ", ".join(schema.colunas_relevantes(prompt)))
+        st.code(sql, language="sql")
+
+    # Mesma consulta (a menos de espaços, maiúsculas e alias de tabela) sobre a mesma versão dos dados → cache
+    with metrics.etapa('cache_resultados'):
+        cached = result_cache.obter(sql, versao)
+    if cached is not None:
+        df, interp_text = cached
+        st.caption("⚡ Resultado reaproveitado do cache")
+    else:
         try:
-            result = db.run(sql)
+            # Em outra thread: o loop continua livre enquanto o DuckDB trabalha
+            df, truncado = await asyncio.to_thread(run_sql, db, sql, metrics=metrics)
+        except SQLRecusado as e:
+            sql_cache.remover(prompt)
+            st.error("🛡️ Consulta recusada: " + str(e))
+            return
+        except TimeoutError as e:
+            st.error("⏱️ " + str(e).capitalize())
+            return
         except Exception as e:
+            sql_cache.remover(prompt)
             st.error("❌ Erro ao executar SQL: " + str(e))
             return
+        if truncado:
+            st.caption(f"Mostrando as primeiras {MAX_LINHAS:,} linhas do resultado".replace(",", "."))
+        result_cache.guardar(sql, versao, df)
+        interp_text = None
 
-        # Parse o resultado de forma robusta
-        try:
-            if isinstance(result, str):
-                parsed_result = ast.literal_eval(result)
-            else:
-                # Se já é uma lista/tupla
-                parsed_result = result if isinstance(result, list) else [result]
-        except Exception as e:
-            st.error(f"❌ Erro ao parsear resultado: {e}")
-            st.write(f"Resultado bruto: {repr(result)}")
-            return
-        
-        # Cria DataFrame a partir das tuplas
-        if parsed_result:
-            # Extrai nomes das colunas do SQL (método simples)
-            # Para consultas SELECT, pega tudo entre SELECT e FROM
-            sql_upper = sql.upper()
-            select_part = sql_upper.split('SELECT')[1].split('FROM')[0]
-            # Remove aliases (AS ...) e limpa
-            columns = []
-            for col in select_part.split(','):
-                col = col.strip()
-                if ' AS ' in col:
-                    col = col.split(' AS ')[1]
-                elif '.' in col and ' ' not in col.split('.')[-1]:
-                    col = col.split('.')[-1]
-                columns.append(col.strip())
-            
-            df = pd.DataFrame(parsed_result, columns=columns)
-        else:
-            df = pd.DataFrame()
-            
+    with metrics.etapa('mostrar_tabela'):
         st.dataframe(df, use_container_width=True)
 
-        # interpretação amigável
-        with st.spinner("💡 Interpretando…"):
-            interp_prompt = f"""
-Explique para um leigo o resultado abaixo, respondendo à pergunta "{prompt}".
-
-Os valores de salário estão em reais (R$). Por exemplo: 10000.0 = R$ 10.000,00 por mês.
-
-Resultado:
-{df.to_string(index=False)}
-
-Interprete os valores salariais e explique de forma clara e em português, formatando os valores monetários adequadamente.
-"""
-            interp = llm.invoke(interp_prompt)
-            st.write(interp.content if hasattr(interp, "content") else interp)
+    # interpretação amigável, mostrada à medida que o LLM escreve
+    if interp_text is not None:
+        st.write(interp_text)
+        return
+    area = st.empty()
+    area.caption("💡 Interpretando…")
+    texto = ""
+    inicio = time.perf_counter()
+    try:
+        with metrics.etapa('interpretar'):
+            async for pedaco in transmitir(llm, interpretation_prompt(prompt, df), limiter, TIMEOUT_INTERPRETACAO):
+                if inicio is not None:  # tempo até o primeiro pedaço: o que o usuário sente
+                    metrics.observar('interpretar_primeiro_pedaco', time.perf_counter() - inicio)
+                    inicio = None
+                texto += pedaco
+                area.markdown(texto + "▌")
+    except TimeoutError as e:
+        area.markdown(texto)
+        st.warning(f"⏱️ Interpretação interrompida: {e or 'tempo esgotado'}")
+        return
+    area.markdown(texto)
+    result_cache.guardar_interpretacao(sql, versao, texto)
 
 # ────────────────────────────────────────────────────────────────────────────────
 if __name__ == "__main__":
-    main()
+    with get_metrics().iniciar_rerun():
+        main()
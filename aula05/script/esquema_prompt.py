@@ -0,0 +1,184 @@
+"""
+Esquema da tabela do chat para o prompt de sistema
+
+Em vez de uma lista fixa (e desatualizada) de colunas e valores, o esquema
+é lido do próprio banco DuckDB: tipo de cada coluna, número de
+valores distintos, faixa dos numéricos e os valores mais frequentes dos
+textos. O resumo é calculado uma vez por versão dos dados e salvo em JSON
+ao lado do .duckdb.
+
+Para cada pergunta, só entram no prompt as colunas que têm a ver com ela:
+palavras da pergunta (sem acentos, comparadas pelo radical) contra o nome
+da coluna, sinônimos e os valores da coluna ("SP" → uf_residencia,
+"mulheres" → genero). As demais aparecem só com nome e tipo. Valores de
+texto livre longos (ex.: as frases de xp_profissional_prejudicada) não
+contam na escolha nem são listados, e a lista de cada coluna tem limite de
+bytes, para o prompt continuar pequeno.
+"""
+
+import hashlib
+import json
+import os
+from collections import Counter
+
+from banco_duckdb import conectar
+from cache_sql import normalizar_pergunta
+from dados_cache import escrever_atomico, ler_json, salvar_json
+
+VERSAO_ESQUEMA = 1
+TOP_VALORES = 12      # guardados no resumo
+VALORES_NO_PROMPT = 8  # mostrados por coluna
+MAX_TAMANHO_VALOR = 80     # valores mais longos (texto livre) não são comparados nem listados
+MAX_BYTES_VALORES = 400    # bytes de valores listados por coluna
+TAMANHO_RAIZ = 6
+COLUNAS_SEMPRE = ('salario_numerico',)
+TIPOS_TEXTO = ('VARCHAR',)
+UFS = {
+    'ac', 'al', 'ap', 'am', 'ba', 'ce', 'df', 'es', 'go', 'ma', 'mt', 'ms', 'mg', 'pa',
+    'pb', 'pr', 'pe', 'pi', 'rj', 'rn', 'rs', 'ro', 'rr', 'sc', 'sp', 'se', 'to',
+}
+
+# Palavras que o usuário usa e que não aparecem no nome nem nos valores da coluna
+SINONIMOS = {
+    'faixa_etaria': ['faixa etaria', 'etaria', 'jovens', 'velhos', 'geracao'],
+    'idade': ['idade', 'anos de idade', 'velho', 'novo'],
+    'genero': ['genero', 'sexo', 'mulher', 'mulheres', 'homem', 'homens'],
+    'etnia': ['etnia', 'raca', 'cor', 'negros', 'negras', 'brancos', 'pardos'],
+    'pcd': ['pcd', 'deficiencia', 'deficientes'],
+    'xp_profissional_prejudicada': ['prejudicada', 'discriminacao', 'preconceito'],
+    'uf_residencia': ['estado', 'estados', 'uf', 'regiao', 'regioes', 'mora', 'residencia'],
+    'nivel_ensino': ['ensino', 'escolaridade', 'formacao', 'graduados', 'mestres', 'doutores', 'educacao'],
+    'area_formacao': ['curso', 'formados', 'formou'],
+    'situacao_trabalho': ['situacao', 'empregado', 'empregados', 'desempregados', 'clt', 'pj', 'freelancer'],
+    'cargo_atual': ['cargo', 'cargos', 'profissao', 'profissoes', 'funcao', 'analista', 'cientista',
+                    'engenheiro', 'engenheiros', 'cientistas', 'analistas'],
+    'tempo_experiencia_dados': ['experiencia', 'senioridade', 'anos de experiencia', 'tempo'],
+    'satisfacao_remuneracao': ['satisfacao', 'satisfeitos', 'remuneracao'],
+    'satisfacao_beneficios': ['beneficios'],
+    'salario_numerico': ['salario', 'salarios', 'ganha', 'ganham', 'remuneracao', 'pago', 'paga', 'pagam'],
+}
+
+# Palavras frequentes demais nos valores para indicar uma coluna
+PALAVRAS_VAZIAS = {'dados', 'data', 'anos', 'mais', 'menos', 'outra', 'outro', 'outras', 'opcao',
+                   'prefiro', 'informar', 'tenho', 'area', 'analista', 'analyst', 'brasil', 'empresa',
+                   'trabalho', 'profissional', 'profissionais'}
+
+
+def _raizes(texto):
+    """Radicais (prefixos) das palavras do texto normalizado"""
+    return {p[:TAMANHO_RAIZ] for p in normalizar_pergunta(texto).split() if len(p) >= 4}
+
+
+def introspectar_tabela(con, tabela, top_valores=TOP_VALORES):
+    """{coluna: {tipo, distintos, nulos, valores | minimo/maximo}} lido do banco (uma consulta por coluna)"""
+    total = con.execute(f'SELECT COUNT(*) FROM "{tabela}"').fetchone()[0]
+    resumo = {}
+    for coluna, tipo, *_ in con.execute(f'DESCRIBE "{tabela}"').fetchall():
+        distintos, nulos = con.execute(
+            f'SELECT COUNT(DISTINCT "{coluna}"), COUNT(*) - COUNT("{coluna}") FROM "{tabela}"'
+        ).fetchone()
+        info = {'tipo': tipo, 'distintos': int(distintos), 'nulos': nulos / total if total else 0.0}
+        if tipo in TIPOS_TEXTO:
+            info['valores'] = [v for v, in con.execute(
+                f'SELECT "{coluna}" FROM "{tabela}" WHERE "{coluna}" IS NOT NULL '
+                f'GROUP BY 1 ORDER BY COUNT(*) DESC, 1 LIMIT {int(top_valores)}'
+            ).fetchall()]
+        else:
+            info['minimo'], info['maximo'] = con.execute(
+                f'SELECT MIN("{coluna}"), MAX("{coluna}") FROM "{tabela}"'
+            ).fetchone()
+        resumo[coluna] = info
+    return resumo
+
+
+def _valores_curtos(info):
+    """Valores da coluna que cabem no prompt (sem os de texto livre longo)"""
+    return [v for v in info.get('valores', []) if len(str(v)) <= MAX_TAMANHO_VALOR]
+
+
+class EsquemaTabela:
+    """Resumo da tabela + escolha das colunas relevantes para cada pergunta"""
+
+    def __init__(self, tabela, colunas):
+        self.tabela = tabela
+        self.colunas = colunas
+        self._indice = {}  # coluna → (radicais do nome/sinônimos, radicais dos valores, valores curtos)
+        vazias = {p[:TAMANHO_RAIZ] for p in PALAVRAS_VAZIAS}
+        nomes = {c: _raizes(c.replace('_', ' ')) - vazias for c in colunas}
+        # Radical presente no nome de várias colunas (ex.: 'salari') não escolhe nenhuma
+        repetidas = Counter(r for raizes in nomes.values() for r in raizes)
+        for coluna, info in colunas.items():
+            nome = {r for r in nomes[coluna] if repetidas[r] < 3} | _raizes(' '.join(SINONIMOS.get(coluna, [])))
+            valores = _valores_curtos(info)
+            raizes_valores = set().union(*(_raizes(str(v)) for v in valores)) - vazias if valores else set()
+            curtos = {normalizar_pergunta(str(v)) for v in valores if len(str(v)) <= 3}
+            self._indice[coluna] = (nome, raizes_valores, curtos)
+
+    @property
+    def assinatura(self):
+        """Hash do resumo: entra na versão do cache de SQL"""
+        texto = json.dumps([self.tabela, self.colunas, MAX_TAMANHO_VALOR, MAX_BYTES_VALORES],
+                           sort_keys=True, default=str)
+        return hashlib.sha256(texto.encode('utf-8')).hexdigest()[:16]
+
+    def colunas_relevantes(self, pergunta):
+        """Colunas citadas na pergunta (pelo nome, sinônimo ou valor), mais as de COLUNAS_SEMPRE"""
+        raizes = _raizes(pergunta)
+        palavras = set(normalizar_pergunta(pergunta).split())
+        escolhidas = []
+        for coluna, (nome, valores, curtos) in self._indice.items():
+            siglas = curtos & palavras
+            if coluna != 'uf_residencia':
+                siglas -= UFS  # 'pa', 'to'... só valem como UF
+            if raizes & nome or raizes & valores or siglas:
+                escolhidas.append(coluna)
+        return [c for c in self.colunas if c in escolhidas or c in COLUNAS_SEMPRE]
+
+    def descrever_coluna(self, coluna, pergunta='', max_valores=VALORES_NO_PROMPT):
+        """Linha do esquema: os valores mais comuns e também os citados na pergunta"""
+        info = self.colunas[coluna]
+        if 'valores' in info:
+            raizes = _raizes(pergunta) - {p[:TAMANHO_RAIZ] for p in PALAVRAS_VAZIAS}
+            curtos = _valores_curtos(info)
+            if not curtos:
+                exemplo = str(info['valores'][0])[:MAX_TAMANHO_VALOR // 2]
+                return (f"- {coluna} {info['tipo']} ({info['distintos']} valores de texto livre, "
+                        f"como '{exemplo}…'; filtre com ILIKE)")
+            candidatos = curtos[:max_valores] + [v for v in curtos[max_valores:] if raizes & _raizes(str(v))]
+            mostrados, tamanho = [], 0
+            for v in candidatos:
+                tamanho += len(str(v).encode('utf-8')) + 4
+                if mostrados and tamanho > MAX_BYTES_VALORES:
+                    break
+                mostrados.append(v)
+            valores = ', '.join(f"'{v}'" for v in mostrados)
+            if info['distintos'] > len(mostrados):
+                return f"- {coluna} {info['tipo']} ({info['distintos']} valores; entre eles: {valores})"
+            return f"- {coluna} {info['tipo']} ({valores})"
+        return f"- {coluna} {info['tipo']} (de {info['minimo']} a {info['maximo']})"
+
+    def contexto(self, pergunta):
+        """(texto do esquema para o prompt, colunas detalhadas)"""
+        colunas = self.colunas_relevantes(pergunta)
+        linhas = [self.descrever_coluna(c, pergunta) for c in colunas]
+        outras = [f"{c} {self.colunas[c]['tipo']}" for c in self.colunas if c not in colunas]
+        if outras:
+            linhas.append(f"- Outras colunas (sem valores listados): {', '.join(outras)}")
+        return '\n'.join(linhas), colunas
+
+
+def carregar_esquema(db_file, tabela, versao, top_valores=TOP_VALORES):
+    """Esquema da tabela, lido do JSON ao lado do banco ou recalculado se `versao` mudou"""
+    caminho = os.path.splitext(db_file)[0] + '.esquema.json'
+    atual = {'versao_esquema': VERSAO_ESQUEMA, 'versao_dados': versao, 'tabela': tabela, 'top_valores': top_valores}
+    salvo = ler_json(caminho)
+    if salvo and all(salvo.get(k) == v for k, v in atual.items()):
+        return EsquemaTabela(tabela, salvo['colunas'])
+
+    con = conectar(db_file)
+    try:
+        colunas = introspectar_tabela(con, tabela, top_valores)
+    finally:
+        con.close()
+    escrever_atomico(caminho, lambda p: salvar_json(p, {**atual, 'colunas': colunas}))
+    return EsquemaTabela(tabela, colunas)
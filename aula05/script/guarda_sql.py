@@ -0,0 +1,122 @@
+"""
+Validação do SQL gerado pelo LLM antes de executar
+
+O chat executa o que o modelo devolve, então uma consulta ruim (produto
+cartesiano, sem LIMIT, varredura enorme) poderia prender o worker que
+atende todo mundo. Antes de executar:
+
+1. o texto precisa ser um único SELECT (parser do DuckDB);
+2. o LIMIT é garantido: sem LIMIT (ou com um maior que o permitido), a
+   consulta é embrulhada em SELECT * FROM (...) LIMIT n;
+3. o EXPLAIN estima o maior resultado intermediário do plano (produtos
+   cartesianos sem estimativa usam o produto das entradas) e recusa
+   consultas acima do limite;
+4. na execução, um timer interrompe a consulta que passar do tempo.
+
+Os limites de threads e memória ficam na conexão somente-leitura
+(banco_duckdb.CONFIG_LEITURA): no DuckDB eles valem para a instância toda,
+ou seja, para todas as consultas do chat no processo.
+"""
+
+import json
+import threading
+
+import duckdb
+
+MAX_LINHAS_SQL = 10_001          # LIMIT imposto quando falta ou é maior que isso
+MAX_CARDINALIDADE = 50_000_000   # linhas estimadas em qualquer operador do plano
+TIMEOUT_CONSULTA = 15.0          # segundos
+OPERADORES_PRODUTO = ('CROSS_PRODUCT', 'NESTED_LOOP_JOIN', 'BLOCKWISE_NL_JOIN', 'PIECEWISE_MERGE_JOIN')
+
+
+class SQLRecusado(ValueError):
+    """Consulta que não passou na validação (mensagem para o usuário)"""
+
+
+def _limite(arvore):
+    """Valor do LIMIT constante no nível de fora da consulta, ou None"""
+    for modificador in arvore.get('modifiers', []):
+        if modificador.get('type') != 'LIMIT_MODIFIER':
+            continue
+        limite = modificador.get('limit') or {}
+        if limite.get('class') == 'CONSTANT' and not limite['value'].get('is_null'):
+            return limite['value']['value']
+    return None
+
+
+def _cardinalidade(no):
+    """(estimativa do operador, maior estimativa da subárvore) a partir do EXPLAIN em JSON"""
+    filhos = [_cardinalidade(f) for f in no.get('children', [])]
+    estimativa = (no.get('extra_info') or {}).get('Estimated Cardinality')
+    if estimativa is not None:
+        propria = int(estimativa)
+    elif no.get('name') in OPERADORES_PRODUTO:
+        propria = 1
+        for f, _ in filhos:
+            propria *= max(f, 1)
+    else:
+        propria = max((f for f, _ in filhos), default=0)
+    return propria, max([propria] + [m for _, m in filhos])
+
+
+def estimar_cardinalidade(con, sql):
+    """Maior número de linhas que o plano do DuckDB espera em algum operador"""
+    linhas = con.execute(f"EXPLAIN (FORMAT JSON) {sql}").fetchall()
+    plano = json.loads(linhas[0][1])
+    return max(_cardinalidade(no)[1] for no in plano)
+
+
+def validar_sql(con, sql, max_linhas=MAX_LINHAS_SQL, max_cardinalidade=MAX_CARDINALIDADE):
+    """SQL pronto para executar (com LIMIT garantido) ou SQLRecusado"""
+    try:
+        comandos = con.extract_statements(sql)
+    except duckdb.Error as e:
+        raise SQLRecusado(f"SQL inválido: {e}") from e
+    if len(comandos) != 1:
+        raise SQLRecusado("envie um único comando SQL")
+    if comandos[0].type != duckdb.StatementType.SELECT:
+        raise SQLRecusado(f"só consultas SELECT são permitidas (recebido: {comandos[0].type.name})")
+
+    sql = comandos[0].query.strip().rstrip(';')
+    dados = json.loads(con.execute("SELECT json_serialize_sql(?)", [sql]).fetchone()[0])
+    if dados.get('error'):
+        raise SQLRecusado(f"SQL inválido: {dados.get('error_message', '')}")
+    limite = _limite(dados['statements'][0]['node'])
+    if limite is None or limite > max_linhas:
+        sql = f"SELECT * FROM (\n{sql}\n) AS consulta LIMIT {max_linhas}"
+
+    try:
+        estimativa = estimar_cardinalidade(con, sql)
+    except duckdb.Error as e:
+        raise SQLRecusado(f"SQL inválido: {e}") from e
+    if estimativa > max_cardinalidade:
+        raise SQLRecusado(
+            f"consulta cara demais (~{estimativa:,} linhas estimadas em uma etapa; limite {max_cardinalidade:,})"
+        )
+    return sql
+
+
+class LimiteTempo:
+    """Interrompe a consulta em andamento no cursor se passar de `segundos` (with ...)"""
+
+    def __init__(self, cursor, segundos=TIMEOUT_CONSULTA):
+        self.cursor = cursor
+        self.segundos = segundos
+        self.estourou = False
+        self._timer = None
+
+    def _interromper(self):
+        self.estourou = True
+        self.cursor.interrupt()
+
+    def __enter__(self):
+        self._timer = threading.Timer(self.segundos, self._interromper)
+        self._timer.daemon = True
+        self._timer.start()
+        return self
+
+    def __exit__(self, tipo, erro, tb):
+        self._timer.cancel()
+        if self.estourou and tipo is not None and issubclass(tipo, duckdb.Error):
+            raise TimeoutError(f"consulta interrompida após {self.segundos:g}s") from erro
+        return False
@@ -0,0 +1,144 @@
+"""
+Chamadas assíncronas ao LLM do chat
+
+Cada sessão do Streamlit roda o fluxo pergunta → SQL → tabela →
+interpretação em um loop asyncio próprio (asyncio.run na thread do script).
+Aqui ficam as peças comuns a esses loops:
+
+- LimitadorLLM: no máximo N chamadas ao LLM em andamento por processo
+  (contador com trava de thread, porque cada sessão tem o seu loop); quem
+  passa do limite entra em uma fila e espera, sem polling, até que alguém
+  devolva a vaga (entregue direto ao loop de quem espera) ou até um tempo
+  máximo.
+- invocar: resposta completa, com timeout.
+- transmitir: gerador assíncrono com os pedaços do texto à medida que
+  chegam (llm.astream), com prazo total para a resposta.
+
+Cancelar a tarefa (ex.: o usuário manda outra pergunta e o Streamlit
+interrompe o script) fecha o stream e devolve a vaga do limitador.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+MAX_CHAMADAS_SIMULTANEAS = 4
+ESPERA_MAXIMA_FILA = 30.0    # segundos esperando vaga no limitador
+TIMEOUT_SQL = 30.0           # segundos para gerar o SQL
+TIMEOUT_INTERPRETACAO = 90.0 # segundos para a interpretação completa
+
+
+class LimitadorLLM:
+    """Semáforo de processo para chamadas ao LLM, usável de qualquer loop asyncio"""
+
+    def __init__(self, max_simultaneas=MAX_CHAMADAS_SIMULTANEAS, espera_maxima=ESPERA_MAXIMA_FILA):
+        self.max_simultaneas = max_simultaneas
+        self.espera_maxima = espera_maxima
+        self._lock = threading.Lock()
+        self._livres = max_simultaneas
+        self._fila = deque()  # (loop, future) de quem espera, em ordem de chegada
+        self.em_andamento = 0
+        self.na_fila = 0
+        self.recusadas = 0
+
+    def _liberar(self):
+        """Devolve uma vaga: vai direto para o primeiro da fila (no loop dele) ou fica livre"""
+        with self._lock:
+            while self._fila:
+                loop, espera = self._fila.popleft()
+                try:
+                    loop.call_soon_threadsafe(self._entregar, espera)
+                    return
+                except RuntimeError:  # loop daquela sessão já foi fechado
+                    continue
+            self._livres += 1
+
+    def _entregar(self, espera):
+        # Roda no loop de quem espera; se ele já desistiu (prazo ou cancelamento), passa adiante
+        if espera.done():
+            self._liberar()
+        else:
+            espera.set_result(None)
+
+    async def _adquirir(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._livres and not self._fila:
+                self._livres -= 1
+                return
+            espera = loop.create_future()
+            self._fila.append((loop, espera))
+            self.na_fila += 1
+        try:
+            await asyncio.wait_for(espera, self.espera_maxima)
+        except BaseException as e:
+            with self._lock:
+                try:
+                    self._fila.remove((loop, espera))
+                except ValueError:  # já saiu da fila: a vaga está a caminho ou já chegou
+                    pass
+            if espera.done() and not espera.cancelled():
+                self._liberar()  # a vaga chegou junto com o prazo/cancelamento
+            if isinstance(e, asyncio.TimeoutError):
+                with self._lock:
+                    self.recusadas += 1
+                raise TimeoutError("muitas perguntas ao mesmo tempo, tente de novo em instantes") from None
+            raise
+        finally:
+            with self._lock:
+                self.na_fila -= 1
+
+    @asynccontextmanager
+    async def vaga(self):
+        """Espera (sem bloquear o loop) por uma vaga; TimeoutError se a fila demorar demais"""
+        await self._adquirir()
+        with self._lock:
+            self.em_andamento += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.em_andamento -= 1
+            self._liberar()
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                'em_andamento': self.em_andamento,
+                'na_fila': self.na_fila,
+                'recusadas': self.recusadas,
+                'max_simultaneas': self.max_simultaneas,
+            }
+
+
+def _texto(mensagem):
+    return mensagem.content if hasattr(mensagem, 'content') else str(mensagem)
+
+
+async def invocar(llm, mensagens, limitador, timeout=TIMEOUT_SQL):
+    """Texto completo da resposta do LLM (TimeoutError se passar do prazo)"""
+    async with limitador.vaga():
+        return _texto(await asyncio.wait_for(llm.ainvoke(mensagens), timeout))
+
+
+async def transmitir(llm, mensagens, limitador, timeout=TIMEOUT_INTERPRETACAO):
+    """Pedaços do texto da resposta conforme chegam; o prazo vale para a resposta inteira"""
+    async with limitador.vaga():
+        prazo = time.monotonic() + timeout
+        stream = llm.astream(mensagens)
+        try:
+            while True:
+                restante = prazo - time.monotonic()
+                if restante <= 0:
+                    raise TimeoutError(f"interpretação passou de {timeout:.0f}s")
+                try:
+                    pedaco = await asyncio.wait_for(stream.__anext__(), restante)
+                except StopAsyncIteration:
+                    return
+                texto = _texto(pedaco)
+                if texto:
+                    yield texto
+        finally:
+            await stream.aclose()
@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+
+from cache_resultados import CacheResultados, CanonizadorSQL
+
+BASE = "SELECT cargo_atual, AVG(salario) AS media FROM dados WHERE uf_residencia = 'SP' GROUP BY cargo_atual"
+
+
+@pytest.fixture(scope='module')
+def canonizador():
+    return CanonizadorSQL()
+
+
+@pytest.mark.parametrize('sql', [
+    "select cargo_atual,   AVG(salario) AS media\nFROM dados WHERE uf_residencia = 'SP' GROUP BY cargo_atual",
+    "SELECT cargo_atual, AVG(salario) AS media FROM DADOS WHERE UF_RESIDENCIA = 'SP' GROUP BY CARGO_ATUAL",
+    "SELECT d.cargo_atual, AVG(d.salario) AS media FROM dados d WHERE d.uf_residencia = 'SP' GROUP BY d.cargo_atual",
+])
+def test_mesma_consulta_mesma_chave(canonizador, sql):
+    assert canonizador.canonizar(sql) == canonizador.canonizar(BASE)
+
+
+@pytest.mark.parametrize('sql', [
+    # Outro alias (ou só outra grafia dele) muda o rótulo que o app mostra
+    "SELECT cargo_atual, AVG(salario) AS salario_medio FROM dados WHERE uf_residencia = 'SP' GROUP BY cargo_atual",
+    "SELECT cargo_atual, AVG(salario) AS Media FROM dados WHERE uf_residencia = 'SP' GROUP BY cargo_atual",
+    "SELECT cargo_atual AS cargo, AVG(salario) AS media FROM dados WHERE uf_residencia = 'SP' GROUP BY cargo_atual",
+    "SELECT cargo_atual, AVG(salario) AS media FROM dados WHERE uf_residencia = 'RJ' GROUP BY cargo_atual",
+])
+def test_rotulo_ou_filtro_diferente_outra_chave(canonizador, sql):
+    assert canonizador.canonizar(sql) != canonizador.canonizar(BASE)
+
+
+def test_sql_invalido_nao_usa_cache(canonizador):
+    assert canonizador.canonizar("SELEC nada") is None
+    assert canonizador.canonizar("SELECT 1; SELECT 2") is None
+
+
+def test_interpretacao_so_volta_para_os_mesmos_rotulos():
+    cache = CacheResultados()
+    df = pd.DataFrame({'cargo_atual': ['Analista'], 'media': [8000.0]})
+    cache.guardar(BASE, 'v1', df)
+    cache.guardar_interpretacao(BASE, 'v1', "A media de Analista é 8000")
+
+    resultado, interpretacao = cache.obter(BASE.replace('SELECT', 'select'), 'v1')
+    assert list(resultado.columns) == ['cargo_atual', 'media']
+    assert interpretacao == "A media de Analista é 8000"
+    assert cache.obter(BASE.replace('AS media', 'AS salario_medio'), 'v1') is None
+    assert cache.obter(BASE, 'v2') is None
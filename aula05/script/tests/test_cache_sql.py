@@ -0,0 +1,90 @@
+import pytest
+
+from cache_sql import CacheSemanticoSQL, normalizar_pergunta
+
+PERGUNTAS = {
+    "salário médio em SP": "SELECT AVG(salario) FROM dados WHERE uf_residencia = 'SP'",
+    "salário médio das mulheres em SP": "SELECT AVG(salario) FROM dados WHERE uf_residencia = 'SP' AND genero = 'Feminino'",
+    "pessoas com mais de 10 anos de experiência": "SELECT COUNT(*) FROM dados WHERE tempo_experiencia_dados = 'Mais de 10 anos'",
+    "salário médio de Cientista de Dados": "SELECT AVG(salario) FROM dados WHERE cargo_atual = 'Cientista de Dados'",
+}
+
+
+class LLMFalso:
+    """Devolve o SQL conhecido da pergunta e conta as chamadas"""
+
+    def __init__(self):
+        self.chamadas = []
+
+    def gerar(self, pergunta):
+        self.chamadas.append(pergunta)
+        for original, sql in PERGUNTAS.items():
+            if normalizar_pergunta(original) == normalizar_pergunta(pergunta):
+                return sql
+        return f"SELECT '{pergunta}'"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = CacheSemanticoSQL(caminho=str(tmp_path / 'cache_sql.json'))
+    llm = LLMFalso()
+    for pergunta in PERGUNTAS:
+        cache.obter_ou_gerar(pergunta, lambda: llm.gerar(pergunta))
+    return cache
+
+
+def test_pergunta_repetida_nao_chama_o_llm(tmp_path):
+    cache = CacheSemanticoSQL(caminho=str(tmp_path / 'cache_sql.json'))
+    llm = LLMFalso()
+    for _ in range(3):
+        sql, _ = cache.obter_ou_gerar("Salário médio em SP?", lambda: llm.gerar("salário médio em SP"))
+    assert sql == PERGUNTAS["salário médio em SP"]
+    assert len(llm.chamadas) == 1
+    assert cache.estatisticas()['acertos_exatos'] == 2
+
+
+def test_pergunta_reescrita_acerta_por_similaridade(cache):
+    sql, origem = cache.obter("Qual o salário médio em SP?")
+    assert (sql, origem) == (PERGUNTAS["salário médio em SP"], 'similar')
+
+
+@pytest.mark.parametrize('pergunta', [
+    "salário médio dos homens em SP",
+    "salário médio em SP para PcD",
+    "salário médio em RJ",
+    "pessoas com menos de 10 anos de experiência",
+    "pessoas com mais de 5 anos de experiência",
+    "salário médio de Cientista de Dados júnior",
+    "salário médio de Engenheiro de Dados",
+])
+def test_pergunta_parecida_com_outro_sentido_nao_acerta(cache, pergunta):
+    assert cache.obter(pergunta) == (None, None)
+
+
+def test_sem_nivel_de_similaridade(tmp_path):
+    cache = CacheSemanticoSQL(caminho=str(tmp_path / 'cache_sql.json'), limiar_similaridade=None)
+    cache.guardar("salário médio em SP", "SELECT 1")
+    assert cache.obter("Qual o salário médio em SP?") == (None, None)
+
+
+def test_cache_persiste_por_versao(tmp_path):
+    caminho = str(tmp_path / 'cache_sql.json')
+    CacheSemanticoSQL(caminho=caminho, versao='v1').guardar("salário médio em SP", "SELECT 1")
+    assert CacheSemanticoSQL(caminho=caminho, versao='v1').obter("salário médio em SP") == ("SELECT 1", 'exato')
+    assert CacheSemanticoSQL(caminho=caminho, versao='v2').obter("salário médio em SP") == (None, None)
+
+
+def test_ordem_das_palavras_importa(tmp_path):
+    cache = CacheSemanticoSQL(caminho=str(tmp_path / 'cache_sql.json'))
+    cache.guardar("homens ganham mais que mulheres em SP", "SELECT 1")
+    assert cache.obter("mulheres ganham mais que homens em SP") == (None, None)
+
+
+def test_acerto_nao_refaz_o_indice(cache):
+    cache.obter("Qual o salário médio em SP?")
+    grupos = cache._grupos
+    cache.obter("Mostre o salário médio das mulheres em SP")
+    assert cache._grupos is grupos
+    cache.guardar("salário médio em MG", "SELECT 2")
+    cache.obter("Qual o salário médio em SP?")
+    assert cache._grupos is not grupos
@@ -0,0 +1,32 @@
+from esquema_prompt import MAX_BYTES_VALORES, EsquemaTabela
+
+FRASE = "Sim, acredito que a minha a experiência profissional seja afetada devido a minha Cor/Raça/Etnia"
+COLUNAS = {
+    'etnia': {'tipo': 'VARCHAR', 'distintos': 3, 'nulos': 0.0, 'valores': ['Branca', 'Parda', 'Preta']},
+    'tempo_experiencia_dados': {'tipo': 'VARCHAR', 'distintos': 2, 'nulos': 0.0,
+                                'valores': ['de 1 a 2 anos', 'Mais de 10 anos']},
+    'xp_profissional_prejudicada': {'tipo': 'VARCHAR', 'distintos': 2, 'nulos': 0.0,
+                                    'valores': [FRASE, FRASE.replace('Cor/Raça/Etnia', 'identidade de gênero')]},
+    'cargo_atual': {'tipo': 'VARCHAR', 'distintos': 60, 'nulos': 0.0,
+                    'valores': [f'Cargo número {i} com um nome bem comprido' for i in range(12)]},
+    'salario_numerico': {'tipo': 'DOUBLE', 'distintos': 10, 'nulos': 0.0, 'minimo': 500.0, 'maximo': 45000.0},
+}
+
+
+def test_texto_livre_longo_nao_escolhe_coluna():
+    esquema = EsquemaTabela('dados', COLUNAS)
+    assert esquema.colunas_relevantes("salário por tempo de experiência") == ['tempo_experiencia_dados', 'salario_numerico']
+    assert esquema.colunas_relevantes("salário médio por etnia") == ['etnia', 'salario_numerico']
+    assert 'xp_profissional_prejudicada' in esquema.colunas_relevantes("experiência prejudicada por discriminação")
+
+
+def test_texto_livre_longo_nao_vai_para_o_prompt():
+    linha = EsquemaTabela('dados', COLUNAS).descrever_coluna('xp_profissional_prejudicada')
+    assert FRASE not in linha
+    assert 'ILIKE' in linha
+
+
+def test_valores_listados_tem_limite_de_bytes():
+    linha = EsquemaTabela('dados', COLUNAS).descrever_coluna('cargo_atual')
+    assert "'Cargo número 0 com um nome bem comprido'" in linha
+    assert len(linha.encode('utf-8')) < MAX_BYTES_VALORES + 100
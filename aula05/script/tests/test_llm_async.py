@@ -0,0 +1,125 @@
+import asyncio
+import threading
+
+import pytest
+
+from llm_async import LimitadorLLM, invocar, transmitir
+
+
+class LLMFalso:
+    """Stream com um pedaço a cada `intervalo` segundos; registra se o stream foi fechado"""
+
+    def __init__(self, pedacos=('a', 'b', 'c', 'd'), intervalo=0.05):
+        self.pedacos = pedacos
+        self.intervalo = intervalo
+        self.fechados = 0
+
+    async def ainvoke(self, mensagens):
+        await asyncio.sleep(self.intervalo)
+        return ''.join(self.pedacos)
+
+    async def astream(self, mensagens):
+        try:
+            for pedaco in self.pedacos:
+                await asyncio.sleep(self.intervalo)
+                yield pedaco
+        finally:
+            self.fechados += 1
+
+
+async def _coletar(llm, limitador, timeout):
+    recebidos = []
+    async for texto in transmitir(llm, [], limitador, timeout=timeout):
+        recebidos.append(texto)
+    return recebidos
+
+
+def test_stream_completo_devolve_a_vaga():
+    llm, limitador = LLMFalso(), LimitadorLLM(max_simultaneas=1)
+    assert asyncio.run(_coletar(llm, limitador, timeout=5)) == ['a', 'b', 'c', 'd']
+    assert llm.fechados == 1
+    assert limitador.estatisticas()['em_andamento'] == 0
+
+
+def test_prazo_do_stream_vale_para_a_resposta_inteira():
+    llm, limitador = LLMFalso(intervalo=0.05), LimitadorLLM(max_simultaneas=1)
+    recebidos = []
+
+    async def consumir():
+        async for texto in transmitir(llm, [], limitador, timeout=0.12):
+            recebidos.append(texto)
+
+    # Cada pedaço chega dentro do prazo dele, mas a resposta inteira não
+    with pytest.raises(TimeoutError):
+        asyncio.run(consumir())
+    assert 0 < len(recebidos) < 4
+    assert llm.fechados == 1
+    assert limitador.estatisticas()['em_andamento'] == 0
+
+
+def test_cancelar_no_meio_do_stream_fecha_e_devolve_a_vaga():
+    llm, limitador = LLMFalso(intervalo=0.05), LimitadorLLM(max_simultaneas=1)
+
+    async def principal():
+        tarefa = asyncio.create_task(_coletar(llm, limitador, timeout=5))
+        await asyncio.sleep(0.08)
+        tarefa.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await tarefa
+        # A vaga voltou: a próxima chamada não espera na fila
+        return await asyncio.wait_for(invocar(llm, [], limitador), 1)
+
+    assert asyncio.run(principal()) == 'abcd'
+    assert llm.fechados == 1
+    assert limitador.estatisticas()['em_andamento'] == 0
+
+
+def test_fila_entre_loops_de_sessoes_diferentes():
+    limitador = LimitadorLLM(max_simultaneas=1, espera_maxima=2)
+    ocupada, liberar = threading.Event(), threading.Event()
+
+    async def segurar_vaga():
+        async with limitador.vaga():
+            ocupada.set()
+            await asyncio.get_running_loop().run_in_executor(None, liberar.wait)
+
+    sessao = threading.Thread(target=asyncio.run, args=(segurar_vaga(),))
+    sessao.start()
+    ocupada.wait()
+
+    async def esperar_vaga():
+        vaga = limitador.vaga()
+        esperando = asyncio.create_task(vaga.__aenter__())
+        await asyncio.sleep(0.05)
+        assert limitador.estatisticas()['na_fila'] == 1
+        liberar.set()  # a outra sessão (outro loop) devolve a vaga
+        await asyncio.wait_for(esperando, 1)
+        estatisticas = limitador.estatisticas()
+        await vaga.__aexit__(None, None, None)
+        return estatisticas
+
+    estatisticas = asyncio.run(esperar_vaga())
+    sessao.join()
+    assert estatisticas['em_andamento'] == 1
+    assert estatisticas['na_fila'] == 0
+    assert limitador.estatisticas()['em_andamento'] == 0
+
+
+def test_fila_cheia_recusa_e_nao_prende_vaga():
+    limitador = LimitadorLLM(max_simultaneas=1, espera_maxima=0.05)
+
+    async def principal():
+        async with limitador.vaga():
+            with pytest.raises(TimeoutError):
+                async with limitador.vaga():
+                    pass
+            vaga = limitador.vaga()
+            espera = asyncio.create_task(vaga.__aenter__())
+            await asyncio.sleep(0.01)
+            espera.cancel()
+        async with limitador.vaga():  # nenhuma vaga ficou presa
+            return limitador.estatisticas()
+
+    estatisticas = asyncio.run(principal())
+    assert estatisticas['recusadas'] == 1
+    assert estatisticas['na_fila'] == 0
@@ -0,0 +1,379 @@
+"""
+Benchmark de ponta a ponta do dashboard, da calculadora e do chat
+
+Para cada tamanho de dataset sintético (gerador_sintetico.py) e cada app,
+monta uma pasta de trabalho com o CSV no caminho que o app espera
+(data/processed/dataset_salarios_dados.csv) e roda o cenário do app em um
+processo separado, com a pasta do app (aula03/04/05) no PYTHONPATH, para que
+os caches em memória e os imports já feitos por um app não entrem na medição
+do outro. Tudo roda offline: o chat
+usa um LLM falso e o mapa do dashboard usa o GeoJSON versionado em
+aula03/script/data/geo/.
+
+Cenários medidos:
+- dashboard: cache Arrow/Parquet a partir do CSV, carregar_dados, filtro
+  original com isin, construção do cubo, cada agregação dos gráficos e o
+  app inteiro (primeira execução, rerun e rerun com filtro novo).
+- calculadora: carregar_modelo (frio e já em cache de disco), fazer_predicao
+  de um perfil, consulta à tabela pré-calculada e predição em lote de todas
+  as linhas do dataset.
+- chat: build_duckdb (frio e com o banco pronto), execução de consultas
+  típicas com leitura do resultado e a pergunta de ponta a ponta no app.
+
+O resultado vai para resultados/<data>_<commit>.json (medianas em ms);
+--comparar mostra o que ficou mais lento ou mais rápido que outro arquivo.
+
+Uso:
+    python benchmark_apps.py
+    python benchmark_apps.py --tamanhos 10000 1000000 --apps chat --repeticoes 10
+    python benchmark_apps.py --comparar resultados/20250101-120000_abc1234.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import gerador_sintetico
+
+PASTA_BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+RAIZ = os.path.dirname(PASTA_BENCHMARKS)
+PASTA_RESULTADOS = os.path.join(PASTA_BENCHMARKS, 'resultados')
+PASTA_TRABALHO = os.path.join(PASTA_BENCHMARKS, 'data', 'trabalho')
+VERSAO_RESULTADOS = 1
+TAMANHOS_PADRAO = (10_000, 100_000, 1_000_000)
+REPETICOES_PADRAO = 5
+LIMIAR_REGRESSAO = 0.2  # 20% mais lento (ou mais rápido) que a referência
+CSV_APP = os.path.join('data', 'processed', 'dataset_salarios_dados.csv')
+
+APPS = {
+    'dashboard': (os.path.join(RAIZ, 'aula03', 'script'), 'remuneracao_app.py'),
+    'calculadora': (os.path.join(RAIZ, 'aula04', 'script'), 'calculadora_salarios_app.py'),
+    'chat': (os.path.join(RAIZ, 'aula05', 'script'), 'challenge_llm.py'),
+}
+# Arquivos do app usados como estão (modelo treinado, tabela de predições, GeoJSON)
+ARTEFATOS = {
+    'dashboard': [os.path.join('data', 'geo')],
+    'calculadora': ['modelo_salarios', 'modelo_salarios.pkl', 'tabela_predicoes'],
+    'chat': [],
+}
+
+# Consultas do chat: do agregado pequeno ao resultado grande (cortado em MAX_LINHAS)
+CONSULTAS_CHAT = {
+    'media_por_cargo': """
+        SELECT cargo_atual, AVG(salario_numerico) AS salario_medio
+        FROM dados WHERE cargo_atual IS NOT NULL
+        GROUP BY cargo_atual ORDER BY salario_medio DESC LIMIT 5""",
+    'filtro_uf_genero': """
+        SELECT AVG(salario_numerico) AS salario_medio, COUNT(*) AS total
+        FROM dados WHERE uf_residencia = 'SP' AND genero = 'Feminino'""",
+    'group_by_grande': """
+        SELECT cargo_atual, uf_residencia, faixa_salarial, tempo_experiencia_dados, idade,
+               COUNT(*) AS total, AVG(salario_numerico) AS salario_medio
+        FROM dados GROUP BY ALL""",
+    'linhas_brutas': "SELECT * FROM dados",
+}
+PERGUNTA_CHAT = "Qual a profissão mais bem paga?"
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Medição
+# ────────────────────────────────────────────────────────────────────────────────
+def medir(funcao, repeticoes):
+    """Mediana, mínimo e máximo (ms) de `repeticoes` chamadas"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return {
+        'mediana_ms': statistics.median(tempos),
+        'min_ms': min(tempos),
+        'max_ms': max(tempos),
+        'repeticoes': repeticoes,
+    }
+
+
+def medir_uma_vez(funcao):
+    """(resultado, medida) de uma única chamada: para caminhos frios, que só acontecem uma vez"""
+    inicio = time.perf_counter()
+    resultado = funcao()
+    ms = (time.perf_counter() - inicio) * 1000
+    return resultado, {'mediana_ms': ms, 'min_ms': ms, 'max_ms': ms, 'repeticoes': 1}
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# LLM falso do chat (sem rede): mesmo SQL para qualquer pergunta
+# ────────────────────────────────────────────────────────────────────────────────
+class _Mensagem:
+    def __init__(self, content):
+        self.content = content
+
+
+class LLMFalso:
+    """Substitui langchain_openai.ChatOpenAI: respostas fixas, sem rede"""
+
+    sql = "```sql\n" + CONSULTAS_CHAT['media_por_cargo'].strip() + ";\n```"
+    interpretacao = "Os cargos de engenharia e arquitetura de dados têm as maiores médias salariais."
+    chamadas = 0
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def _responder(self, mensagens):
+        LLMFalso.chamadas += 1
+        return self.sql if isinstance(mensagens, list) else self.interpretacao
+
+    def invoke(self, mensagens):
+        return _Mensagem(self._responder(mensagens))
+
+    async def ainvoke(self, mensagens):
+        return self.invoke(mensagens)
+
+    async def astream(self, mensagens):
+        for palavra in self._responder(mensagens).split(' '):
+            yield _Mensagem(palavra + ' ')
+
+
+def instalar_llm_falso():
+    import langchain_openai
+
+    langchain_openai.ChatOpenAI = LLMFalso
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Cenários (rodam no processo filho, com a pasta de trabalho como diretório atual)
+# ────────────────────────────────────────────────────────────────────────────────
+def _app_test(app):
+    from streamlit.testing.v1 import AppTest
+
+    pasta, arquivo = APPS[app]
+    return AppTest.from_file(os.path.join(pasta, arquivo), default_timeout=3600)
+
+
+def cenario_dashboard(repeticoes):
+    from cubo_salarios import CuboContagens
+    from dados_cache import carregar_dados, construir_cache
+    from faixas_salariais import valores_das_categorias
+
+    r = {}
+    _, r['cache_csv_frio'] = medir_uma_vez(construir_cache)
+    r['carregar_dados'] = medir(carregar_dados, repeticoes)
+    df = carregar_dados()
+
+    # Filtros de um uso típico: alguns cargos, todos os gêneros, quase toda experiência
+    filtros = {
+        'cargo_atual': df['cargo_atual'].value_counts().index[:5].tolist(),
+        'genero': df['genero'].dropna().unique().tolist(),
+        'tempo_experiencia_dados': df['tempo_experiencia_dados'].dropna().unique().tolist()[:-1],
+    }
+    r['filtro_isin'] = medir(lambda: df[
+        df.cargo_atual.isin(filtros['cargo_atual'])
+        & df.genero.isin(filtros['genero'])
+        & df.tempo_experiencia_dados.isin(filtros['tempo_experiencia_dados'])
+    ], repeticoes)
+    cubo, r['cubo_construcao'] = medir_uma_vez(lambda: CuboContagens(df))
+    valores_faixa = valores_das_categorias(cubo.categorias['faixa_salarial'])
+    agregacoes = {
+        'faixa': lambda: cubo.contar('faixa_salarial', filtros),
+        'cargos': lambda: cubo.contar('cargo_atual', filtros),
+        'genero': lambda: cubo.contar('genero', filtros),
+        'experiencia': lambda: cubo.contar('tempo_experiencia_dados', filtros, manter_zeros=True),
+        'salario_genero': lambda: cubo.contar(['faixa_salarial', 'genero'], filtros),
+        'treemap': lambda: cubo.contar(['tempo_experiencia_dados', 'faixa_salarial'], filtros),
+        'mapa': lambda: cubo.media_ponderada('uf_residencia', 'faixa_salarial', valores_faixa, filtros),
+    }
+    for nome, funcao in agregacoes.items():
+        r[f'agregacao_{nome}'] = medir(funcao, repeticoes)
+
+    app = _app_test('dashboard')
+    _, r['app_primeira_execucao'] = medir_uma_vez(app.run)
+    r['app_rerun'] = medir(app.run, repeticoes)
+    cargos = app.multiselect[0]
+    _, r['app_filtro_novo'] = medir_uma_vez(lambda: cargos.set_value(cargos.value[:2]).run())
+    assert not app.exception, app.exception
+    return r
+
+
+def cenario_calculadora(repeticoes):
+    import pandas as pd
+
+    import calculadora_salarios_app as app
+    from modelo_salarios import FEATURES, preprocessar_dados
+    from predicao import carregar_modelo_padrao, pontuar_dataframe
+    from tabela_predicoes import carregar_tabela_predicoes
+
+    r = {}
+    try:
+        modelo, r['carregar_modelo_frio'] = medir_uma_vez(carregar_modelo_padrao)
+    except FileNotFoundError:
+        return {'pulado': "modelo não encontrado (treine com modelo_salarios.py)"}
+    r['carregar_modelo'] = medir(carregar_modelo_padrao, repeticoes)
+
+    perfis = preprocessar_dados(pd.read_csv(CSV_APP))[FEATURES]
+    perfil = perfis.iloc[0].to_dict()
+    r['fazer_predicao'] = medir(lambda: app.fazer_predicao(perfil, modelo), repeticoes * 10)
+    tabela = carregar_tabela_predicoes()
+    if tabela is not None:
+        r['tabela_predicoes'] = medir(lambda: tabela.consultar(perfil), repeticoes * 100)
+    r['predicao_lote'] = medir(lambda: pontuar_dataframe(perfis, modelo), max(1, repeticoes // 2))
+    r['predicao_lote']['linhas'] = len(perfis)
+    return r
+
+
+def cenario_chat(repeticoes):
+    instalar_llm_falso()
+    import challenge_llm as chat
+
+    r = {}
+    db, r['build_duckdb_frio'] = medir_uma_vez(lambda: chat.build_duckdb(CSV_APP, 'dados'))
+    r['build_duckdb'] = medir(lambda: chat.build_duckdb(CSV_APP, 'dados').close(), repeticoes)
+    for nome, sql in CONSULTAS_CHAT.items():
+        r[f'consulta_{nome}'] = medir(lambda: chat.run_sql(db, sql), repeticoes)
+    db.close()
+
+    app = _app_test('chat')
+    app.run()
+    _, r['pergunta_primeira'] = medir_uma_vez(lambda: app.chat_input[0].set_value(PERGUNTA_CHAT).run())
+    r['pergunta_repetida'] = medir(lambda: app.chat_input[0].set_value(PERGUNTA_CHAT).run(), repeticoes)
+    assert not app.exception and not app.error, (app.exception, app.error)
+    r['chamadas_llm'] = LLMFalso.chamadas
+    return r
+
+
+CENARIOS = {'dashboard': cenario_dashboard, 'calculadora': cenario_calculadora, 'chat': cenario_chat}
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Orquestração (processo pai)
+# ────────────────────────────────────────────────────────────────────────────────
+def preparar_pasta(app, csv_sintetico, tamanho):
+    """Pasta de trabalho nova (caches frios) com o CSV sintético e os artefatos do app"""
+    pasta = os.path.join(PASTA_TRABALHO, f'{app}_{tamanho}')
+    shutil.rmtree(pasta, ignore_errors=True)
+    os.makedirs(os.path.join(pasta, os.path.dirname(CSV_APP)))
+    os.symlink(os.path.abspath(csv_sintetico), os.path.join(pasta, CSV_APP))
+    pasta_app = APPS[app][0]
+    for artefato in ARTEFATOS[app]:
+        origem = os.path.join(pasta_app, artefato)
+        if os.path.exists(origem):
+            os.makedirs(os.path.dirname(os.path.join(pasta, artefato)) or pasta, exist_ok=True)
+            os.symlink(origem, os.path.join(pasta, artefato))
+    return pasta
+
+
+def rodar_cenario(app, csv_sintetico, tamanho, repeticoes):
+    """Roda o cenário em um processo filho e devolve as medidas (ou o erro)"""
+    pasta = preparar_pasta(app, csv_sintetico, tamanho)
+    saida = os.path.join(pasta, 'medidas.json')
+    # METRICAS_PORTA=0: sem endpoint /metrics nos processos do benchmark
+    ambiente = {**os.environ, 'PYTHONPATH': os.pathsep.join([APPS[app][0], PASTA_BENCHMARKS]), 'METRICAS_PORTA': '0'}
+    comando = [sys.executable, os.path.abspath(__file__), '--cenario', app,
+               '--repeticoes', str(repeticoes), '--saida-cenario', saida]
+    processo = subprocess.run(comando, cwd=pasta, env=ambiente, capture_output=True, text=True)
+    if processo.returncode != 0:
+        return {'erro': processo.stderr.strip().splitlines()[-1] if processo.stderr.strip() else 'falhou'}
+    with open(saida, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'desconhecido'
+
+
+def comparar(atual, referencia, limiar=LIMIAR_REGRESSAO):
+    """Linhas (app, tamanho, medida, antes, depois, razão) que mudaram mais que o limiar"""
+    mudancas = []
+    for app, por_tamanho in atual['resultados'].items():
+        for tamanho, medidas in por_tamanho.items():
+            anteriores = referencia['resultados'].get(app, {}).get(tamanho, {})
+            for nome, medida in medidas.items():
+                antes = anteriores.get(nome)
+                if not isinstance(medida, dict) or not isinstance(antes, dict) or not antes.get('mediana_ms'):
+                    continue
+                razao = medida['mediana_ms'] / antes['mediana_ms']
+                if abs(razao - 1) > limiar:
+                    mudancas.append((app, tamanho, nome, antes['mediana_ms'], medida['mediana_ms'], razao))
+    return mudancas
+
+
+def imprimir(resultados):
+    for app, por_tamanho in resultados.items():
+        print(f"\n## {app}")
+        for tamanho, medidas in por_tamanho.items():
+            print(f"  {int(tamanho):,} linhas")
+            for nome, medida in medidas.items():
+                if isinstance(medida, dict):
+                    print(f"    {nome:<28}{medida['mediana_ms']:>12.2f} ms")
+                else:
+                    print(f"    {nome:<28}{medida!s:>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de ponta a ponta dos apps com dados sintéticos")
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=list(TAMANHOS_PADRAO))
+    parser.add_argument('--apps', nargs='+', choices=list(APPS), default=list(APPS))
+    parser.add_argument('--repeticoes', type=int, default=REPETICOES_PADRAO)
+    parser.add_argument('--semente', type=int, default=gerador_sintetico.SEMENTE_PADRAO)
+    parser.add_argument('--saida', default=None, help="Arquivo JSON (padrão: resultados/<data>_<commit>.json)")
+    parser.add_argument('--comparar', default=None, help="JSON de uma execução anterior para comparar")
+    parser.add_argument('--cenario', choices=list(CENARIOS), help=argparse.SUPPRESS)
+    parser.add_argument('--saida-cenario', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.cenario:
+        # Processo filho: um app, um tamanho (o CSV já está em data/processed/)
+        medidas = CENARIOS[args.cenario](args.repeticoes)
+        with open(args.saida_cenario, 'w', encoding='utf-8') as f:
+            json.dump(medidas, f, indent=2)
+        return
+
+    commit = _commit()
+    resultado = {
+        'versao': VERSAO_RESULTADOS,
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'semente': args.semente,
+        'repeticoes': args.repeticoes,
+        'resultados': {app: {} for app in args.apps},
+    }
+    for tamanho in args.tamanhos:
+        csv_sintetico = gerador_sintetico.garantir_dataset(tamanho, 'csv', args.semente)
+        for app in args.apps:
+            print(f"▶ {app} com {tamanho:,} linhas…", flush=True)
+            resultado['resultados'][app][str(tamanho)] = rodar_cenario(app, csv_sintetico, tamanho, args.repeticoes)
+
+    imprimir(resultado['resultados'])
+    saida = args.saida or os.path.join(
+        PASTA_RESULTADOS, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}_{commit}.json")
+    os.makedirs(os.path.dirname(saida) or '.', exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=2)
+    print(f"\n✅ Resultados em {saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            referencia = json.load(f)
+        mudancas = comparar(resultado, referencia)
+        print(f"\nComparação com {referencia.get('commit', args.comparar)} (limiar {LIMIAR_REGRESSAO:.0%}):")
+        if not mudancas:
+            print("  nenhuma mudança acima do limiar")
+        for app, tamanho, nome, antes, depois, razao in sorted(mudancas, key=lambda m: -m[5]):
+            rotulo = "🔴 mais lento" if razao > 1 else "🟢 mais rápido"
+            print(f"  {rotulo:<15}{app}/{int(tamanho):,}/{nome}: {antes:.2f} → {depois:.2f} ms ({razao:.2f}×)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,247 @@
+"""
+Gerador de dados sintéticos do questionário para testes de carga e escala
+
+Aprende a distribuição conjunta das colunas do dataset processado
+(dataset_salarios_dados.csv, ~4,9 mil linhas) como uma árvore de Chow-Liu:
+cada coluna é sorteada condicionada a uma única coluna "pai", escolhida
+pela maior informação mútua (ex.: faixa_etaria ← idade, cargo_atual ←
+faixa_salarial). Todas as colunas são tratadas como categorias (vazio também
+é uma categoria), então a árvore preserva as combinações mais fortes entre
+pares de colunas e nunca inventa valores que não existem nos dados.
+
+A geração é em lotes vetorizados com NumPy (um sorteio por coluna por
+lote) e vai direto para CSV ou Parquet via pyarrow, sem passar por
+DataFrames de strings: dá para gerar de 1 milhão a 100 milhões de linhas
+com memória limitada pelo tamanho do lote. O resultado é determinístico
+pela semente, número de linhas e tamanho do lote: cada lote usa o seu
+próprio gerador derivado de SeedSequence(semente).
+
+Uso:
+    python gerador_sintetico.py --linhas 1000000
+    python gerador_sintetico.py --linhas 100000000 --formato csv --semente 7 --saida /tmp/salarios_100M.csv
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CSV_ORIGEM = os.path.join(RAIZ, 'aula02', 'script', 'data', 'processed', 'dataset_salarios_dados.csv')
+PASTA_SINTETICO = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'sintetico')
+TAMANHO_LOTE_PADRAO = 1_000_000
+SEMENTE_PADRAO = 42
+
+# Tipos das colunas no CSV processado (mesmos do dados_cache.py das aulas)
+TIPOS_NUMERICOS = {
+    'idade': pa.int16(),
+    'satisfacao_remuneracao': pa.float32(),
+    'importancia_salario_escolha_emprego': pa.float32(),
+    'satisfacao_beneficios': pa.float32(),
+    'importancia_beneficios_escolha_emprego': pa.float32(),
+}
+
+
+def _informacao_mutua(a, b, na, nb):
+    """Informação mútua (nats) entre dois vetores de códigos"""
+    conjunta = np.bincount(a * nb + b, minlength=na * nb).reshape(na, nb) / len(a)
+    pa_, pb_ = conjunta.sum(1, keepdims=True), conjunta.sum(0, keepdims=True)
+    nz = conjunta > 0
+    return float((conjunta[nz] * np.log(conjunta[nz] / (pa_ @ pb_)[nz])).sum())
+
+
+def _arvore_chow_liu(codigos, cardinalidades):
+    """Ordem de sorteio e pai de cada coluna (árvore geradora máxima por informação mútua, Prim)"""
+    colunas = list(codigos)
+    raiz = max(colunas, key=lambda c: cardinalidades[c])
+    ordem, pais = [raiz], {raiz: None}
+    melhor = {c: (_informacao_mutua(codigos[c], codigos[raiz], cardinalidades[c], cardinalidades[raiz]), raiz)
+              for c in colunas if c != raiz}
+    while melhor:
+        coluna = max(melhor, key=lambda c: (melhor[c][0], c))
+        pais[coluna] = melhor.pop(coluna)[1]
+        ordem.append(coluna)
+        for c in melhor:
+            mi = _informacao_mutua(codigos[c], codigos[coluna], cardinalidades[c], cardinalidades[coluna])
+            if mi > melhor[c][0]:
+                melhor[c] = (mi, coluna)
+    return ordem, pais
+
+
+class ModeloSintetico:
+    """Distribuição conjunta aproximada (árvore de Chow-Liu) das colunas do dataset"""
+
+    def __init__(self, colunas, valores, ordem, pais, acumuladas):
+        self.colunas = colunas        # ordem das colunas na saída (a mesma do CSV original)
+        self.valores = valores        # coluna → array com os valores de cada código (None = vazio)
+        self.ordem = ordem            # ordem de sorteio (pai antes do filho)
+        self.pais = pais              # coluna → coluna pai ou None (raiz)
+        self.acumuladas = acumuladas  # coluna → CDF (n_valores_pai × n_valores) ou (1 × n_valores)
+
+    @classmethod
+    def ajustar(cls, df, suavizacao=0.0):
+        """Estima a árvore e as tabelas P(coluna | pai) a partir de um DataFrame
+
+        `suavizacao` soma pseudo-contagens às tabelas condicionais: cria
+        combinações pai/filho que não existem nos dados (perfis novos),
+        ao custo de alguma distorção.
+        """
+        codigos, valores, cardinalidades = {}, {}, {}
+        for coluna in df.columns:
+            cod, uniq = pd.factorize(df[coluna], use_na_sentinel=True)
+            tem_vazio = (cod < 0).any()
+            codigos[coluna] = np.where(cod < 0, len(uniq), cod).astype(np.int64)
+            valores[coluna] = np.array(list(uniq) + ([None] if tem_vazio else []), dtype=object)
+            cardinalidades[coluna] = len(valores[coluna])
+
+        ordem, pais = _arvore_chow_liu(codigos, cardinalidades)
+        acumuladas = {}
+        for coluna in ordem:
+            n = cardinalidades[coluna]
+            pai = pais[coluna]
+            if pai is None:
+                contagens = np.bincount(codigos[coluna], minlength=n)[None, :].astype(np.float64)
+            else:
+                npai = cardinalidades[pai]
+                contagens = np.bincount(codigos[pai] * n + codigos[coluna], minlength=npai * n)
+                contagens = contagens.reshape(npai, n).astype(np.float64)
+            contagens += suavizacao
+            acumulada = np.cumsum(contagens / contagens.sum(1, keepdims=True), axis=1)
+            acumulada[:, -1] = 1.0  # evita u >= soma por arredondamento
+            acumuladas[coluna] = acumulada
+        return cls(list(df.columns), valores, ordem, pais, acumuladas)
+
+    def amostrar_codigos(self, n, rng):
+        """{coluna: códigos int} de n linhas sorteadas (vetorizado por coluna)"""
+        codigos = {}
+        for coluna in self.ordem:
+            acumulada = self.acumuladas[coluna]
+            u = rng.random(n)
+            pai = self.pais[coluna]
+            if pai is None:
+                codigos[coluna] = np.searchsorted(acumulada[0], u, side='right')
+            else:
+                # Todas as CDFs em um só vetor crescente: a linha do pai p ocupa (p, p + 1],
+                # então um único searchsorted de p + u acha o valor dentro da linha certa
+                npai, n_valores = acumulada.shape
+                plana = (acumulada + np.arange(npai)[:, None]).ravel()
+                p = codigos[pai]
+                codigos[coluna] = np.searchsorted(plana, p + u, side='right') - p * n_valores
+            codigos[coluna] = np.minimum(codigos[coluna], acumulada.shape[1] - 1).astype(np.int32)
+        return codigos
+
+    def _coluna_arrow(self, coluna, codigos, como_texto=False):
+        valores = self.valores[coluna]
+        if coluna in TIPOS_NUMERICOS and como_texto:
+            # Mesmo texto do CSV de origem (o pandas grava 1.0, o Arrow gravaria 1):
+            # relido, o CSV sintético tem os mesmos dtypes do original
+            textos = [None if pd.isna(v) else str(v) for v in valores]
+            dicionario = pa.array(textos, type=pa.string())
+        elif coluna in TIPOS_NUMERICOS:
+            dicionario = pa.array(valores, type=TIPOS_NUMERICOS[coluna], from_pandas=True)
+        else:
+            dicionario = pa.array(valores, type=pa.string(), from_pandas=True)
+        return dicionario.take(pa.array(codigos))
+
+    def amostrar_tabela(self, n, rng, como_texto=False):
+        """Tabela Arrow com n linhas sintéticas, nas colunas e tipos do CSV original
+
+        Com `como_texto`, as colunas numéricas vêm como o texto que o CSV
+        original tem (para gravar em CSV).
+        """
+        codigos = self.amostrar_codigos(n, rng)
+        return pa.table({c: self._coluna_arrow(c, codigos[c], como_texto) for c in self.colunas})
+
+    def amostrar(self, n, rng):
+        """DataFrame com n linhas sintéticas"""
+        return self.amostrar_tabela(n, rng).to_pandas()
+
+    def descrever(self):
+        """Arestas da árvore: coluna ← pai"""
+        return [f"{c} ← {self.pais[c] or '(raiz)'}" for c in self.ordem]
+
+
+def ajustar_modelo(csv_path=CSV_ORIGEM, suavizacao=0.0):
+    return ModeloSintetico.ajustar(pd.read_csv(csv_path), suavizacao)
+
+
+def _gerador_do_lote(semente, indice):
+    return np.random.default_rng(np.random.SeedSequence(semente, spawn_key=(indice,)))
+
+
+def gerar_arquivo(modelo, n_linhas, destino, formato=None, semente=SEMENTE_PADRAO,
+                  tamanho_lote=TAMANHO_LOTE_PADRAO, verbose=True):
+    """Grava n_linhas sintéticas em CSV ou Parquet, lote a lote (arquivo temporário + rename)"""
+    formato = formato or ('parquet' if destino.endswith('.parquet') else 'csv')
+    pasta = os.path.dirname(destino) or '.'
+    os.makedirs(pasta, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=pasta, suffix='.tmp')
+    os.close(fd)
+    inicio = time.perf_counter()
+    escritor = None
+    try:
+        try:
+            for indice, ini in enumerate(range(0, n_linhas, tamanho_lote)):
+                tabela = modelo.amostrar_tabela(min(tamanho_lote, n_linhas - ini), _gerador_do_lote(semente, indice),
+                                                como_texto=formato == 'csv')
+                if escritor is None:
+                    if formato == 'parquet':
+                        escritor = pq.ParquetWriter(tmp, tabela.schema, compression='zstd')
+                    else:
+                        escritor = pa_csv.CSVWriter(tmp, tabela.schema,
+                                                    write_options=pa_csv.WriteOptions(quoting_style='needed'))
+                escritor.write_table(tabela)
+                if verbose:
+                    feitas = ini + tabela.num_rows
+                    print(f"  {feitas:,}/{n_linhas:,} linhas ({time.perf_counter() - inicio:.1f}s)")
+        finally:
+            if escritor is not None:
+                escritor.close()
+        os.replace(tmp, destino)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return time.perf_counter() - inicio
+
+
+def caminho_sintetico(n_linhas, formato='parquet', semente=SEMENTE_PADRAO, pasta=PASTA_SINTETICO):
+    return os.path.join(pasta, f'salarios_{n_linhas}_s{semente}.{formato}')
+
+
+def garantir_dataset(n_linhas, formato='parquet', semente=SEMENTE_PADRAO, pasta=PASTA_SINTETICO,
+                     csv_origem=CSV_ORIGEM, verbose=False):
+    """Caminho do dataset sintético com n_linhas, gerando só se ainda não existir"""
+    destino = caminho_sintetico(n_linhas, formato, semente, pasta)
+    if not os.path.exists(destino):
+        gerar_arquivo(ajustar_modelo(csv_origem), n_linhas, destino, formato, semente, verbose=verbose)
+    return destino
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera respostas sintéticas do questionário (CSV ou Parquet)")
+    parser.add_argument('--linhas', type=int, default=1_000_000)
+    parser.add_argument('--csv', default=CSV_ORIGEM, help="Dataset processado usado para aprender a distribuição")
+    parser.add_argument('--saida', default=None, help="Arquivo de saída (padrão: data/sintetico/salarios_<linhas>_s<semente>.<formato>)")
+    parser.add_argument('--formato', choices=['csv', 'parquet'], default=None)
+    parser.add_argument('--semente', type=int, default=SEMENTE_PADRAO)
+    parser.add_argument('--lote', type=int, default=TAMANHO_LOTE_PADRAO, help="Linhas sorteadas por vez")
+    parser.add_argument('--suavizacao', type=float, default=0.0, help="Pseudo-contagem nas tabelas condicionais")
+    args = parser.parse_args()
+
+    formato = args.formato or ('csv' if args.saida and args.saida.endswith('.csv') else 'parquet')
+    saida = args.saida or caminho_sintetico(args.linhas, formato, args.semente)
+    modelo = ajustar_modelo(args.csv, args.suavizacao)
+    print("Árvore de dependências:\n  " + "\n  ".join(modelo.descrever()))
+    segundos = gerar_arquivo(modelo, args.linhas, saida, formato, args.semente, args.lote)
+    print(f"✅ {args.linhas:,} linhas em {saida} ({segundos:.1f}s, {args.linhas / segundos:,.0f} linhas/s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""
+Orçamento de tempo de import na primeira renderização de cada app
+
+O cold start do container (e a reação do autoscaling) é limitado pelo
+tempo até a primeira página: a maior parte dele é import de bibliotecas.
+Para cada app, roda a primeira renderização (AppTest, sem interação) em um
+processo novo com `python -X importtime`, na mesma pasta de trabalho do
+benchmark_apps.py, e soma só os imports feitos pelo app (o Streamlit em si
+aparece à parte, como base).
+
+Falha (código de saída 1) se algum app passar do orçamento em ORCAMENTO_MS
+ou importar na primeira página uma biblioteca que deveria ser preguiçosa
+(PROIBIDOS: o LLM do chat só na primeira pergunta, o plotly da calculadora
+só no botão).
+
+Uso:
+    python tempo_importacao.py
+    python tempo_importacao.py --apps chat --mostrar 20
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+
+import gerador_sintetico
+from benchmark_apps import APPS, preparar_pasta
+
+TAMANHO_DATASET = 10_000
+MARCADOR = '### primeira renderizacao'
+# Tempo de import (ms) permitido na primeira renderização, além do próprio Streamlit
+ORCAMENTO_MS = {
+    'dashboard': 1000,
+    'calculadora': 1000,
+    'chat': 1000,
+}
+# Módulos que o app não pode importar antes da primeira interação
+PROIBIDOS = {
+    'dashboard': [],
+    'calculadora': ['plotly.express'],
+    'chat': ['langchain_openai', 'langchain_core', 'openai'],
+}
+LINHA_IMPORTTIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)')
+
+CODIGO_FILHO = """
+import json, sys
+from streamlit.testing.v1 import AppTest
+antes = set(sys.modules)
+sys.stderr.flush()
+sys.stderr.write({marcador!r} + '\\n')
+sys.stderr.flush()
+app = AppTest.from_file({arquivo!r}, default_timeout=600)
+app.run()
+excecoes = [str(e.value) for e in app.exception]
+print(json.dumps({{'modulos': sorted(set(sys.modules) - antes), 'excecoes': excecoes}}))
+"""
+
+
+def ler_importtime(stderr):
+    """(base, app): listas de (módulo, cumulativo µs) dos imports de nível 0, antes e depois do marcador"""
+    base, app = [], []
+    atual = base
+    for linha in stderr.splitlines():
+        if linha.startswith(MARCADOR):
+            atual = app
+            continue
+        m = LINHA_IMPORTTIME.match(linha)
+        if m and not m.group(3):  # sem recuo: import feito diretamente (não por outro módulo)
+            atual.append((m.group(4), int(m.group(2))))
+    return base, app
+
+
+def medir_app(nome, csv_sintetico):
+    """Tempos de import da primeira renderização do app em um processo novo"""
+    pasta = preparar_pasta(nome, csv_sintetico, TAMANHO_DATASET)
+    ambiente = {**os.environ, 'PYTHONPATH': APPS[nome][0], 'METRICAS_PORTA': '0'}
+    codigo = CODIGO_FILHO.format(marcador=MARCADOR, arquivo=os.path.join(APPS[nome][0], APPS[nome][1]))
+    processo = subprocess.run([sys.executable, '-X', 'importtime', '-c', codigo],
+                              cwd=pasta, env=ambiente, capture_output=True, text=True)
+    if processo.returncode != 0:
+        return {'erro': processo.stderr.strip().splitlines()[-1] if processo.stderr.strip() else 'falhou'}
+    saida = json.loads(processo.stdout.strip().splitlines()[-1])
+    base, app = ler_importtime(processo.stderr)
+    modulos = set(saida['modulos'])
+    return {
+        'base_ms': sum(us for _, us in base) / 1000,
+        'app_ms': sum(us for _, us in app) / 1000,
+        'maiores': sorted(app, key=lambda x: -x[1]),
+        'proibidos': [m for m in PROIBIDOS[nome] if m in modulos],
+        'excecoes': saida['excecoes'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo de import na primeira renderização de cada app")
+    parser.add_argument('--apps', nargs='+', choices=list(APPS), default=list(APPS))
+    parser.add_argument('--mostrar', type=int, default=8, help="Imports mais pesados listados por app")
+    args = parser.parse_args()
+
+    csv_sintetico = gerador_sintetico.garantir_dataset(TAMANHO_DATASET, 'csv')
+    falhas = []
+    for nome in args.apps:
+        r = medir_app(nome, csv_sintetico)
+        print(f"\n## {nome}")
+        if 'erro' in r:
+            print(f"  ❌ {r['erro']}")
+            falhas.append(nome)
+            continue
+        print(f"  streamlit (base)  {r['base_ms']:8.0f} ms")
+        print(f"  imports do app    {r['app_ms']:8.0f} ms (orçamento {ORCAMENTO_MS[nome]} ms)")
+        for modulo, us in r['maiores'][:args.mostrar]:
+            print(f"    {modulo:<28} {us / 1000:8.1f} ms")
+        if r['excecoes']:
+            print(f"  ⚠️ exceção na renderização: {r['excecoes'][0]}")
+        if r['app_ms'] > ORCAMENTO_MS[nome]:
+            print("  ❌ acima do orçamento")
+            falhas.append(nome)
+        if r['proibidos']:
+            print(f"  ❌ importados na primeira página: {', '.join(r['proibidos'])}")
+            falhas.append(nome)
+
+    print(f"\n{'❌ Falhou: ' + ', '.join(dict.fromkeys(falhas)) if falhas else '✅ Todos dentro do orçamento'}")
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == '__main__':
+    main()
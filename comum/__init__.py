@@ -0,0 +1,9 @@
+"""
+Módulos compartilhados pelos scripts das aulas
+
+dados_cache (cache colunar do CSV processado), faixas_salariais (tabela
+faixa → valor) e metricas (tempos por etapa e /metrics) ficam só aqui.
+Cada pasta aulaNN/script/ tem um arquivo de mesmo nome que só aponta para
+o módulo daqui, então os scripts, os apps e os notebooks continuam usando
+`from dados_cache import ...` sem cópias para manter em sincronia.
+"""
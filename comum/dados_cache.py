@@ -0,0 +1,274 @@
+"""
+Cache colunar do dataset de salários
+
+Converte o CSV processado em um arquivo Arrow (IPC) tipado, com as colunas
+de texto codificadas como dicionário (categorias), e um Parquet equivalente
+para o DuckDB. O cache é gerado uma única vez e só é refeito quando o hash
+do CSV muda. O arquivo Arrow é lido via memory-map, então vários workers do
+Streamlit compartilham as mesmas páginas de memória do sistema operacional.
+
+Quando o CSV só cresceu no fim (anexo de novas respostas, ingestao.py
+--anexar na aula 01), só os bytes novos são lidos e viram mais uma "parte"
+do cache (outro par Arrow/Parquet): o custo da atualização depende do lote,
+não do histórico. Passando de MAX_PARTES, o cache é refeito em um arquivo só.
+"""
+
+import hashlib
+import io
+import json
+import os
+import tempfile
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from .faixas_salariais import TIPO_FAIXA
+
+CSV_PADRAO = os.path.join('data', 'processed', 'dataset_salarios_dados.csv')
+PASTA_CACHE = os.path.join('data', 'cache')
+
+# Incrementar sempre que mudar o esquema/tipos gravados: invalida caches antigos
+VERSAO_CACHE = 4
+MAX_PARTES = 32
+
+# Colunas de texto com poucos valores distintos: viram categorias (dictionary-encoded)
+COLUNAS_CATEGORICAS = [
+    'faixa_etaria', 'genero', 'etnia', 'pcd', 'xp_profissional_prejudicada',
+    'uf_residencia', 'nivel_ensino', 'area_formacao', 'situacao_trabalho',
+    'cargo_atual', 'faixa_salarial', 'tempo_experiencia_dados'
+]
+
+# Tipos explícitos para as colunas numéricas (evita inferência a cada leitura)
+TIPOS_NUMERICOS = {
+    'idade': 'Int16',
+    'satisfacao_remuneracao': 'float32',
+    'importancia_salario_escolha_emprego': 'float32',
+    'satisfacao_beneficios': 'float32',
+    'importancia_beneficios_escolha_emprego': 'float32',
+}
+
+
+def _sha256_prefixo(caminho, limite=None, tamanho_bloco=1 << 20):
+    """Objeto SHA-256 dos primeiros `limite` bytes do arquivo (todos se None)"""
+    h = hashlib.sha256()
+    resta = float('inf') if limite is None else limite
+    with open(caminho, 'rb') as f:
+        while resta > 0:
+            bloco = f.read(int(min(tamanho_bloco, resta)))
+            if not bloco:
+                break
+            h.update(bloco)
+            resta -= len(bloco)
+    return h
+
+
+def hash_arquivo(caminho, tamanho_bloco=1 << 20, limite=None):
+    """Calcula o SHA-256 do arquivo (ou dos primeiros `limite` bytes) lendo em blocos"""
+    return _sha256_prefixo(caminho, limite, tamanho_bloco).hexdigest()
+
+
+def _caminhos_cache(csv_path, pasta_cache):
+    nome = os.path.splitext(os.path.basename(csv_path))[0]
+    base = os.path.join(pasta_cache, nome)
+    return {
+        'manifesto': base + '.json',
+        'arrow': base + '.arrow',
+        'parquet': base + '.parquet',
+    }
+
+
+def _caminhos_parte(caminhos, indice):
+    """(arrow, parquet) da parte `indice` (a parte 0 usa os nomes de sempre)"""
+    if indice == 0:
+        return caminhos['arrow'], caminhos['parquet']
+    base = os.path.splitext(caminhos['arrow'])[0]
+    return f'{base}.parte{indice:04d}.arrow', f'{base}.parte{indice:04d}.parquet'
+
+
+def ler_json(caminho):
+    """Conteúdo do JSON em `caminho`, ou None se não existir ou estiver corrompido"""
+    try:
+        with open(caminho, encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def salvar_json(caminho, dados):
+    """Grava `dados` como JSON legível (UTF-8); combine com escrever_atomico"""
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(dados, f, ensure_ascii=False, indent=2)
+
+
+def escrever_atomico(destino, escrever):
+    """Escreve em arquivo temporário e renomeia (seguro com vários workers)"""
+    pasta = os.path.dirname(destino) or '.'
+    fd, tmp = tempfile.mkstemp(dir=pasta, suffix='.tmp')
+    os.close(fd)
+    try:
+        escrever(tmp)
+        os.replace(tmp, destino)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def ler_csv_tipado(csv_path):
+    """Lê o CSV processado (caminho ou buffer) já com os tipos definitivos"""
+    if isinstance(csv_path, (bytes, bytearray)):
+        csv_path = io.BytesIO(csv_path)
+    colunas = pd.read_csv(csv_path, nrows=0).columns
+    if hasattr(csv_path, 'seek'):
+        csv_path.seek(0)
+    dtype = {c: 'category' for c in COLUNAS_CATEGORICAS if c in colunas}
+    dtype.update({c: t for c, t in TIPOS_NUMERICOS.items() if c in colunas})
+    if 'faixa_salarial' in colunas:
+        dtype['faixa_salarial'] = TIPO_FAIXA  # categoria ordenada da menor para a maior faixa
+    return pd.read_csv(csv_path, dtype=dtype)
+
+
+def tabela_arrow(df):
+    """Converte o DataFrame para uma tabela Arrow (categorias → dictionary)"""
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def _gravar_parte(tabela, arrow, parquet):
+    def escrever_arrow(p):
+        # Sem compressão: é isso que permite o memory-map sem cópia
+        with pa.OSFile(p, 'wb') as sink, pa.ipc.new_file(sink, tabela.schema) as writer:
+            writer.write_table(tabela)
+
+    escrever_atomico(arrow, escrever_arrow)
+    escrever_atomico(parquet, lambda p: pq.write_table(tabela, p, compression='zstd'))
+
+
+def _com_partes(caminhos, manifesto):
+    """Caminhos do cache + lista das partes ({id, arrow, parquet, linhas}) e versão dos dados"""
+    partes = []
+    for i, parte in enumerate(manifesto['partes']):
+        arrow, parquet = _caminhos_parte(caminhos, i)
+        partes.append({'id': parte['id'], 'arrow': arrow, 'parquet': parquet, 'linhas': parte['linhas']})
+    return {**caminhos, 'partes': partes, 'versao_dados': manifesto['versao_dados']}
+
+
+def _anexar_parte(csv_path, caminhos, manifesto, stat, sha_prefixo):
+    """Lê só os bytes depois do fim já processado e grava como mais uma parte
+
+    `sha_prefixo` é o hash (hashlib) dos bytes até o fim antigo, já conferido;
+    continua com os bytes novos para virar o prefixo do próximo anexo.
+    """
+    inicio = manifesto['csv_tamanho']
+    with open(csv_path, 'rb') as f:
+        cabecalho = f.readline()
+        f.seek(inicio)
+        novos = f.read(stat.st_size - inicio)
+    novos = novos[:novos.rfind(b'\n') + 1]  # linha ainda sendo escrita fica para a próxima vez
+    if not novos:
+        return _com_partes(caminhos, manifesto)
+
+    base = _abrir_parte(caminhos['arrow']).schema
+    tabela = tabela_arrow(ler_csv_tipado(cabecalho + novos)).select(base.names).cast(base)
+    arrow, parquet = _caminhos_parte(caminhos, len(manifesto['partes']))
+    _gravar_parte(tabela, arrow, parquet)
+
+    versao = hashlib.sha256(f"{manifesto['versao_dados']}:".encode() + hashlib.sha256(novos).digest()).hexdigest()
+    fim = inicio + len(novos)
+    sha_prefixo.update(novos)
+    manifesto.update(
+        csv_sha256=None,  # não é mais o hash do arquivo inteiro; a versão é encadeada
+        versao_dados=versao,
+        csv_tamanho=fim,
+        csv_mtime_ns=stat.st_mtime_ns if fim == stat.st_size else None,
+        sha_prefixo=sha_prefixo.hexdigest(),
+        linhas=manifesto['linhas'] + tabela.num_rows,
+        partes=manifesto['partes'] + [{'id': versao, 'linhas': tabela.num_rows}],
+    )
+    escrever_atomico(caminhos['manifesto'], lambda p: salvar_json(p, manifesto))
+    return _com_partes(caminhos, manifesto)
+
+
+def construir_cache(csv_path=CSV_PADRAO, pasta_cache=PASTA_CACHE, forcar=False):
+    """Gera (se necessário) o cache Arrow/Parquet e retorna o caminho dos arquivos
+
+    Além de 'arrow'/'parquet' (a primeira parte), devolve 'partes' e
+    'versao_dados': o SHA-256 do CSV ou, depois de anexos, um hash
+    encadeado (versão anterior + bytes novos).
+    """
+    os.makedirs(pasta_cache, exist_ok=True)
+    caminhos = _caminhos_cache(csv_path, pasta_cache)
+    stat = os.stat(csv_path)
+    manifesto = ler_json(caminhos['manifesto'])
+
+    arquivos_ok = manifesto and all(
+        os.path.exists(c) for i in range(len(manifesto.get('partes', []))) for c in _caminhos_parte(caminhos, i)
+    )
+    if manifesto and manifesto.get('versao') == VERSAO_CACHE and arquivos_ok and not forcar:
+        # Atalho: mesmo tamanho e mtime → nem precisa recalcular o hash
+        if manifesto['csv_tamanho'] == stat.st_size and manifesto['csv_mtime_ns'] == stat.st_mtime_ns:
+            return _com_partes(caminhos, manifesto)
+        # Só cresceu no fim (todos os bytes até o fim antigo iguais): processa apenas o anexo.
+        # Ler o prefixo custa bem menos que reinterpretar o CSV inteiro.
+        if manifesto['csv_tamanho'] < stat.st_size and len(manifesto['partes']) < MAX_PARTES:
+            sha_prefixo = _sha256_prefixo(csv_path, manifesto['csv_tamanho'])
+            if sha_prefixo.hexdigest() == manifesto['sha_prefixo']:
+                return _anexar_parte(csv_path, caminhos, manifesto, stat, sha_prefixo)
+        sha = hash_arquivo(csv_path, limite=stat.st_size)
+        if manifesto['csv_sha256'] == sha:
+            manifesto.update(csv_tamanho=stat.st_size, csv_mtime_ns=stat.st_mtime_ns)
+            escrever_atomico(caminhos['manifesto'], lambda p: salvar_json(p, manifesto))
+            return _com_partes(caminhos, manifesto)
+    else:
+        sha = hash_arquivo(csv_path, limite=stat.st_size)
+
+    tabela = tabela_arrow(ler_csv_tipado(csv_path))
+    _gravar_parte(tabela, caminhos['arrow'], caminhos['parquet'])
+    for i in range(1, MAX_PARTES + 1):  # partes de anexos anteriores ficam obsoletas
+        for caminho in _caminhos_parte(caminhos, i):
+            if os.path.exists(caminho):
+                os.remove(caminho)
+    manifesto = {
+        'versao': VERSAO_CACHE,
+        'csv': os.path.abspath(csv_path),
+        'csv_sha256': sha,
+        'versao_dados': sha,
+        'csv_tamanho': stat.st_size,
+        'csv_mtime_ns': stat.st_mtime_ns,
+        'sha_prefixo': sha,  # hash dos bytes já processados (aqui, o arquivo inteiro)
+        'linhas': tabela.num_rows,
+        'partes': [{'id': sha, 'linhas': tabela.num_rows}],
+    }
+    escrever_atomico(caminhos['manifesto'], lambda p: salvar_json(p, manifesto))
+    return _com_partes(caminhos, manifesto)
+
+
+def _abrir_parte(caminho):
+    with pa.memory_map(caminho, 'r') as fonte:
+        return pa.ipc.open_file(fonte).read_all()
+
+
+def ler_partes(partes):
+    """Tabela com as partes dadas (memory-map), no esquema da primeira"""
+    tabelas = [_abrir_parte(p['arrow']) for p in partes]
+    return pa.concat_tables([t.cast(tabelas[0].schema) for t in tabelas])
+
+
+def carregar_tabela(csv_path=CSV_PADRAO, pasta_cache=PASTA_CACHE):
+    """Abre o cache Arrow via memory-map e retorna a pyarrow.Table"""
+    return ler_partes(construir_cache(csv_path, pasta_cache)['partes'])
+
+
+def carregar_dados(csv_path=CSV_PADRAO, pasta_cache=PASTA_CACHE):
+    """Carrega o dataset como DataFrame com colunas categóricas"""
+    return carregar_tabela(csv_path, pasta_cache).to_pandas()
+
+
+def caminhos_parquet(csv_path=CSV_PADRAO, pasta_cache=PASTA_CACHE):
+    """Arquivos Parquet atualizados do dataset, um por parte (para uso no DuckDB)"""
+    return [p['parquet'] for p in construir_cache(csv_path, pasta_cache)['partes']]
+
+
+if __name__ == '__main__':
+    caminhos = construir_cache(forcar=True)
+    print(f"Cache gerado: {caminhos['arrow']} e {caminhos['parquet']}")
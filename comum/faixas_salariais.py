@@ -0,0 +1,80 @@
+"""
+Faixas salariais do State of Data e seus valores numéricos
+
+Tabela única faixa → valor (R$/mês) usada por todos os apps: o dashboard,
+o treino do modelo e o chat com DuckDB. Cada faixa vale o ponto médio do
+intervalo; as faixas abertas usam 500 (abaixo de R$ 1.000) e 45.000
+(acima de R$ 40.001). A conversão é vetorizada: código da categoria →
+posição num array de valores (np.take), sem regex por linha.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Faixas em ordem crescente e o valor numérico de cada uma
+FAIXAS_SALARIAIS = [
+    ('Menos de R$ 1.000/mês', 500.0),
+    ('de R$ 1.001/mês a R$ 2.000/mês', 1500.0),
+    ('de R$ 2.001/mês a R$ 3.000/mês', 2500.0),
+    ('de R$ 3.001/mês a R$ 4.000/mês', 3500.0),
+    ('de R$ 4.001/mês a R$ 6.000/mês', 5000.0),
+    ('de R$ 6.001/mês a R$ 8.000/mês', 7000.0),
+    ('de R$ 8.001/mês a R$ 12.000/mês', 10000.0),
+    ('de R$ 12.001/mês a R$ 16.000/mês', 14000.0),
+    ('de R$ 16.001/mês a R$ 20.000/mês', 18000.0),
+    ('de R$ 20.001/mês a R$ 25.000/mês', 22500.0),
+    ('de R$ 25.001/mês a R$ 30.000/mês', 27500.0),
+    ('de R$ 30.001/mês a R$ 40.000/mês', 35000.0),
+    ('Acima de R$ 40.001/mês', 45000.0),
+]
+
+ORDEM_FAIXAS = [faixa for faixa, _ in FAIXAS_SALARIAIS]
+VALORES_FAIXAS = dict(FAIXAS_SALARIAIS)
+TIPO_FAIXA = pd.CategoricalDtype(ORDEM_FAIXAS, ordered=True)
+
+# Array de consulta: posição i = valor da faixa i; a última posição (código -1) é NaN
+_VALORES = np.array([valor for _, valor in FAIXAS_SALARIAIS] + [np.nan])
+
+
+def para_categoria(faixas):
+    """Converte uma Series de faixas para o tipo categórico ordenado"""
+    faixas = pd.Series(faixas)
+    if isinstance(faixas.dtype, pd.CategoricalDtype) and faixas.dtype == TIPO_FAIXA:
+        return faixas
+    if isinstance(faixas.dtype, pd.CategoricalDtype):
+        faixas = faixas.astype(object)
+    return faixas.astype(TIPO_FAIXA)
+
+
+def converter(faixas):
+    """Valor numérico (float) de cada faixa; faixas desconhecidas viram NaN"""
+    codigos = para_categoria(faixas).cat.codes.to_numpy()
+    return np.take(_VALORES, codigos)
+
+
+def valores_das_categorias(categorias):
+    """Valor de cada categoria (na ordem dada), ex.: para pesos de um cubo de contagens"""
+    return np.array([VALORES_FAIXAS.get(c, np.nan) for c in categorias])
+
+
+def tabela_faixas():
+    """A tabela faixa → valor como DataFrame (faixa_salarial, salario_numerico, ordem_faixa)"""
+    return pd.DataFrame({
+        'faixa_salarial': ORDEM_FAIXAS,
+        'salario_numerico': [valor for _, valor in FAIXAS_SALARIAIS],
+        'ordem_faixa': range(1, len(FAIXAS_SALARIAIS) + 1),
+    })
+
+
+def sql_tabela_faixas(nome='faixas_salariais'):
+    """CREATE TABLE com a tabela de faixas, para fazer JOIN no DuckDB"""
+    linhas = ',\n        '.join(
+        f"('{faixa}', {valor}::DOUBLE, {ordem})"
+        for ordem, (faixa, valor) in enumerate(FAIXAS_SALARIAIS, start=1)
+    )
+    return f"""
+    CREATE OR REPLACE TABLE {nome} AS
+    SELECT * FROM (VALUES
+        {linhas}
+    ) AS t(faixa_salarial, salario_numerico, ordem_faixa);
+    """
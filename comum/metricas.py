@@ -0,0 +1,238 @@
+"""
+Métricas de tempo por etapa dos apps Streamlit
+
+Camada mínima de instrumentação, sem dependências: cada etapa de um rerun
+(carregar dados, filtrar, montar figura, chamar o LLM, executar no DuckDB…)
+é medida com um context manager ou decorador e vai para um histograma de
+latência por processo. Caches registrados exportam acertos e falhas.
+
+Tudo é exposto em formato texto do Prometheus em http://localhost:<porta>/metrics
+(servidor em thread separada, um por processo). A porta vem da variável de
+ambiente METRICAS_PORTA ou do padrão de cada app; METRICAS_PORTA=0 desliga.
+
+Com METRICAS_PERFIL_MS definido, os reruns rodam sob o cProfile e os que
+passarem desse tempo (em ms) são gravados em data/perfis/*.prof para abrir
+com `python -m pstats` ou snakeviz. Só um rerun por processo é perfilado de
+cada vez: a partir do Python 3.12 só pode haver um profiler ativo (enable()
+de um segundo levanta ValueError) e ele vê todas as threads. Reruns de
+outras sessões que começam enquanto há um perfil em andamento são só
+cronometrados, e o .prof de um rerun pode incluir trabalho dessas sessões.
+
+Uso no app (o with garante a medida mesmo quando o Streamlit interrompe o
+rerun ou o script levanta uma exceção):
+    metricas = Metricas('dashboard')
+    metricas.iniciar_servidor(9103)
+    with metricas.iniciar_rerun():
+        with metricas.etapa('carregar_dados'):
+            df = carregar_dados()
+        ...
+"""
+
+import cProfile
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Limites dos buckets do histograma, em segundos
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PASTA_PERFIS = os.path.join('data', 'perfis')
+
+# Um perfil por processo de cada vez (ver docstring do módulo)
+_perfil_em_uso = threading.Lock()
+
+
+class Histograma:
+    """Contagens acumuladas por bucket, soma e total (como o histograma do Prometheus)"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.contagens = [0] * (len(buckets) + 1)  # último = +Inf
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, segundos):
+        for i, limite in enumerate(self.buckets):
+            if segundos <= limite:
+                break
+        else:
+            i = len(self.buckets)
+        self.contagens[i] += 1
+        self.soma += segundos
+        self.total += 1
+
+    def quantil(self, q):
+        """Quantil aproximado (limite superior do bucket), como histogram_quantile"""
+        if not self.total:
+            return 0.0
+        alvo, acumulado = q * self.total, 0
+        for limite, contagem in zip(self.buckets + (float('inf'),), self.contagens):
+            acumulado += contagem
+            if acumulado >= alvo:
+                return limite
+        return float('inf')
+
+
+class MedicaoRerun:
+    """Tempo de um rerun; com METRICAS_PERFIL_MS, grava o perfil dos reruns lentos"""
+
+    def __init__(self, metricas):
+        self.metricas = metricas
+        self.perfil = None
+        if metricas.limite_perfil_ms is not None and _perfil_em_uso.acquire(blocking=False):
+            self.perfil = cProfile.Profile()
+            try:
+                self.perfil.enable()
+            except ValueError:  # outro profiler (fora deste módulo) já está ativo
+                self.perfil = None
+                _perfil_em_uso.release()
+        self.inicio = time.perf_counter()
+
+    def finalizar(self):
+        if self.perfil is not None:
+            self.perfil.disable()
+            _perfil_em_uso.release()
+        segundos = time.perf_counter() - self.inicio
+        self.metricas.observar('rerun', segundos)
+        if self.perfil is not None and segundos * 1000 > self.metricas.limite_perfil_ms:
+            self.metricas._salvar_perfil(self.perfil, segundos)
+        self.perfil = None
+        return segundos
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.finalizar()
+        return False
+
+
+class Metricas:
+    """Histogramas de tempo por etapa e estatísticas de caches de um app (thread-safe)"""
+
+    def __init__(self, app):
+        self.app = app
+        self._histogramas = {}  # etapa → Histograma
+        self._caches = {}       # nome → função que devolve {'acertos', 'falhas', ...}
+        self._lock = threading.Lock()
+        self._servidor = None
+        self.limite_perfil_ms = float(os.environ['METRICAS_PERFIL_MS']) if os.environ.get('METRICAS_PERFIL_MS') else None
+
+    def observar(self, etapa, segundos):
+        with self._lock:
+            histograma = self._histogramas.get(etapa)
+            if histograma is None:
+                histograma = self._histogramas[etapa] = Histograma()
+            histograma.observar(segundos)
+
+    @contextmanager
+    def etapa(self, nome):
+        """Mede o bloco (inclusive quando ele termina com exceção)"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(nome, time.perf_counter() - inicio)
+
+    def cronometrar(self, nome):
+        """Decorador: mede cada chamada da função como a etapa `nome`"""
+        def decorador(funcao):
+            @functools.wraps(funcao)
+            def medida(*args, **kwargs):
+                with self.etapa(nome):
+                    return funcao(*args, **kwargs)
+            return medida
+        return decorador
+
+    def iniciar_rerun(self):
+        """Mede o rerun inteiro: use com with (ou finalizar() em um finally)"""
+        return MedicaoRerun(self)
+
+    def _salvar_perfil(self, perfil, segundos):
+        os.makedirs(PASTA_PERFIS, exist_ok=True)
+        nome = f"{self.app}_{datetime.now():%Y%m%d-%H%M%S-%f}_{segundos * 1000:.0f}ms.prof"
+        perfil.dump_stats(os.path.join(PASTA_PERFIS, nome))
+
+    def registrar_cache(self, nome, estatisticas):
+        """`estatisticas()` deve devolver um dict com 'acertos' e 'falhas'"""
+        with self._lock:
+            self._caches[nome] = estatisticas
+
+    def resumo(self):
+        """{etapa: (chamadas, média ms, p95 ms aproximado)}"""
+        with self._lock:
+            return {
+                etapa: (h.total, h.soma / h.total * 1000 if h.total else 0.0, h.quantil(0.95) * 1000)
+                for etapa, h in sorted(self._histogramas.items())
+            }
+
+    def texto_prometheus(self):
+        """Todas as métricas no formato texto de exposição do Prometheus"""
+        app = self.app
+        linhas = [
+            '# HELP app_etapa_segundos Tempo de cada etapa dos reruns.',
+            '# TYPE app_etapa_segundos histogram',
+        ]
+        with self._lock:
+            histogramas = {e: (list(h.contagens), h.soma, h.total, h.buckets) for e, h in self._histogramas.items()}
+            caches = dict(self._caches)
+        for etapa, (contagens, soma, total, buckets) in sorted(histogramas.items()):
+            rotulos = f'app="{app}",etapa="{etapa}"'
+            acumulado = 0
+            for limite, contagem in zip(buckets, contagens):
+                acumulado += contagem
+                linhas.append(f'app_etapa_segundos_bucket{{{rotulos},le="{limite}"}} {acumulado}')
+            linhas.append(f'app_etapa_segundos_bucket{{{rotulos},le="+Inf"}} {total}')
+            linhas.append(f'app_etapa_segundos_sum{{{rotulos}}} {soma}')
+            linhas.append(f'app_etapa_segundos_count{{{rotulos}}} {total}')
+
+        valores = {}
+        for nome, estatisticas in sorted(caches.items()):
+            try:
+                valores[nome] = estatisticas()
+            except Exception:  # um cache com problema não derruba o /metrics
+                continue
+        for metrica, tipo, chave, ajuda in (
+            ('app_cache_acertos_total', 'counter', 'acertos', 'Acertos do cache.'),
+            ('app_cache_falhas_total', 'counter', 'falhas', 'Falhas do cache.'),
+        ):
+            linhas += [f'# HELP {metrica} {ajuda}', f'# TYPE {metrica} {tipo}']
+            linhas += [f'{metrica}{{app="{app}",cache="{nome}"}} {stats.get(chave, 0)}' for nome, stats in valores.items()]
+        linhas += ['# HELP app_cache_taxa_acerto Acertos / (acertos + falhas).', '# TYPE app_cache_taxa_acerto gauge']
+        for nome, stats in valores.items():
+            total = stats.get('acertos', 0) + stats.get('falhas', 0)
+            linhas.append(f'app_cache_taxa_acerto{{app="{app}",cache="{nome}"}} {stats.get("acertos", 0) / total if total else 0.0}')
+        return '\n'.join(linhas) + '\n'
+
+    def iniciar_servidor(self, porta_padrao, host='127.0.0.1'):
+        """Serve /metrics em uma thread; porta de METRICAS_PORTA (0 desliga). Devolve a porta ou None"""
+        porta = int(os.environ.get('METRICAS_PORTA', porta_padrao))
+        if not porta or self._servidor is not None:
+            return self._servidor.server_port if self._servidor else None
+        metricas = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                corpo = metricas.texto_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(corpo)))
+                self.end_headers()
+                self.wfile.write(corpo)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            self._servidor = ThreadingHTTPServer((host, porta), Handler)
+        except OSError as e:  # porta ocupada (ex.: outro worker): segue sem endpoint
+            print(f"⚠️ Métricas sem endpoint: não foi possível abrir a porta {porta} ({e})")
+            return None
+        threading.Thread(target=self._servidor.serve_forever, daemon=True).start()
+        return self._servidor.server_port
@@ -0,0 +1,45 @@
+import pytest
+
+from comum.dados_cache import carregar_dados, construir_cache
+
+CABECALHO = 'idade,cargo_atual,faixa_salarial\n'
+
+
+def linhas(n, cargo='Analista de Dados', inicio=0):
+    return ''.join(f'{20 + (inicio + i) % 40},{cargo},de R$ 4.001/mês a R$ 6.000/mês\n' for i in range(n))
+
+
+@pytest.fixture
+def csv(tmp_path):
+    # Alguns MB: a edição no início fica longe do fim antigo do arquivo
+    caminho = tmp_path / 'dados.csv'
+    caminho.write_text(CABECALHO + linhas(40000), encoding='utf-8')
+    return caminho
+
+
+def test_anexo_vira_parte_nova(csv, tmp_path):
+    pasta = str(tmp_path / 'cache')
+    construir_cache(str(csv), pasta)
+    with open(csv, 'a', encoding='utf-8') as f:
+        f.write(linhas(10, 'Cientista de Dados'))
+
+    cache = construir_cache(str(csv), pasta)
+
+    assert [p['linhas'] for p in cache['partes']] == [40000, 10]
+    df = carregar_dados(str(csv), pasta)
+    assert (df['cargo_atual'] == 'Cientista de Dados').sum() == 10
+
+
+def test_edicao_no_inicio_com_crescimento_refaz_o_cache(csv, tmp_path):
+    pasta = str(tmp_path / 'cache')
+    construir_cache(str(csv), pasta)
+    # Edita a primeira linha sem mudar o tamanho (o fim antigo continua igual) e anexa mais linhas
+    texto = csv.read_text(encoding='utf-8').replace('\n20,', '\n99,', 1)
+    csv.write_text(texto + linhas(10, 'Cientista de Dados'), encoding='utf-8')
+
+    cache = construir_cache(str(csv), pasta)
+
+    assert [p['linhas'] for p in cache['partes']] == [40010]
+    df = carregar_dados(str(csv), pasta)
+    assert df['idade'].iloc[0] == 99
+    assert (df['cargo_atual'] == 'Cientista de Dados').sum() == 10
@@ -0,0 +1,19 @@
+from comum.metricas import Metricas
+
+
+def test_reruns_simultaneos_so_um_e_perfilado(monkeypatch, tmp_path):
+    monkeypatch.setenv('METRICAS_PERFIL_MS', '0')
+    monkeypatch.chdir(tmp_path)
+    metricas = Metricas('teste')
+
+    primeiro = metricas.iniciar_rerun()
+    segundo = metricas.iniciar_rerun()  # outra sessão começa com o perfil em andamento
+    assert primeiro.perfil is not None
+    assert segundo.perfil is None
+    segundo.finalizar()
+    primeiro.finalizar()
+
+    with metricas.iniciar_rerun() as terceiro:  # perfil livre de novo
+        assert terceiro.perfil is not None
+    assert metricas.resumo()['rerun'][0] == 3
+    assert len(list((tmp_path / 'data' / 'perfis').glob('teste_*.prof'))) == 2